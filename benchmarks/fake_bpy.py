@@ -0,0 +1,735 @@
+"""
+Lightweight stand-ins for the ``bpy`` and ``mathutils`` modules.
+
+Only the parts of the Blender API that the importer touches are implemented.
+Every call that creates data or pushes bulk data into Blender is counted by
+``RECORDER``, together with the amount of items that were handed over, so the
+benchmark can report data volumes next to the timings.
+"""
+
+import math
+import sys
+import types
+from collections import Counter
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.calls = Counter()
+        self.items = Counter()
+
+    def record(self, name: str, items: int = 0) -> None:
+        self.calls[name] += 1
+        self.items[name] += items
+
+    def reset(self) -> None:
+        self.calls.clear()
+        self.items.clear()
+
+
+RECORDER = Recorder()
+
+
+# ------------------------------------------------
+# mathutils
+# ------------------------------------------------
+
+
+class Vector:
+    def __init__(self, values=(0.0, 0.0, 0.0)) -> None:
+        self._values = [float(v) for v in values]
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __setitem__(self, index, value) -> None:
+        self._values[index] = float(value)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __add__(self, other):
+        return Vector([a + b for a, b in zip(self, other)])
+
+    def __sub__(self, other):
+        return Vector([a - b for a, b in zip(self, other)])
+
+    def __mul__(self, scalar):
+        return Vector([a * scalar for a in self])
+
+    def length(self) -> float:
+        return math.sqrt(sum(a * a for a in self))
+
+    def normalized(self):
+        length = self.length()
+        if length == 0.0:
+            return Vector(self)
+        return self * (1.0 / length)
+
+
+class Quaternion(Vector):
+    def to_matrix(self):
+        w, x, y, z = self._values
+        return Matrix(
+            [
+                [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+                [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+                [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+            ]
+        )
+
+
+class Matrix:
+    def __init__(self, rows=None) -> None:
+        if rows == None:
+            rows = [[1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+        self.rows = [[float(v) for v in row] for row in rows]
+
+    @classmethod
+    def Translation(cls, vector):
+        matrix = cls()
+        for i in range(3):
+            matrix.rows[i][3] = vector[i]
+        return matrix
+
+    def to_4x4(self):
+        matrix = Matrix()
+        for i, row in enumerate(self.rows[:3]):
+            matrix.rows[i][:3] = row[:3]
+        return matrix
+
+    def identity(self) -> None:
+        self.rows = Matrix().rows
+
+    def __matmul__(self, other):
+        size = len(self.rows)
+        return Matrix(
+            [
+                [sum(self.rows[i][k] * other.rows[k][j] for k in range(size)) for j in range(size)]
+                for i in range(size)
+            ]
+        )
+
+    def inverted(self):
+        # rigid transforms only, which is all the importer produces
+        rotation = [[self.rows[j][i] for j in range(3)] for i in range(3)]
+        translation = [
+            -sum(rotation[i][k] * self.rows[k][3] for k in range(3)) for i in range(3)
+        ]
+        matrix = Matrix()
+        for i in range(3):
+            matrix.rows[i][:3] = rotation[i]
+            matrix.rows[i][3] = translation[i]
+        return matrix
+
+    def decompose(self):
+        translation = Vector([self.rows[i][3] for i in range(3)])
+        m = self.rows
+        w = math.sqrt(max(0.0, 1.0 + m[0][0] + m[1][1] + m[2][2])) / 2.0
+        if w > 1e-6:
+            rotation = Quaternion(
+                (
+                    w,
+                    (m[2][1] - m[1][2]) / (4 * w),
+                    (m[0][2] - m[2][0]) / (4 * w),
+                    (m[1][0] - m[0][1]) / (4 * w),
+                )
+            )
+        else:
+            rotation = Quaternion((1.0, 0.0, 0.0, 0.0))
+        return translation, rotation, Vector((1.0, 1.0, 1.0))
+
+
+# ------------------------------------------------
+# bpy.types
+# ------------------------------------------------
+
+
+class ID:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.users = 0
+        self._properties = {}
+
+    def __getitem__(self, key):
+        return self._properties[key]
+
+    def __setitem__(self, key, value) -> None:
+        self._properties[key] = value
+
+    def get(self, key, default=None):
+        return self._properties.get(key, default)
+
+
+class DataCollection:
+    def __init__(self, factory) -> None:
+        self._factory = factory
+        self._items = {}
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _unique_name(self, name: str) -> str:
+        unique_name = name
+        suffix = 1
+        while unique_name in self._items:
+            unique_name = f"{name}.{suffix:03d}"
+            suffix += 1
+        return unique_name
+
+    def _add(self, datablock):
+        datablock.name = self._unique_name(datablock.name)
+        self._items[datablock.name] = datablock
+        return datablock
+
+    def new(self, name: str, *args, **kwargs):
+        RECORDER.record(f"{self._factory.__name__}.new")
+        return self._add(self._factory(name, *args, **kwargs))
+
+    def get(self, name: str, default=None):
+        return self._items.get(name, default)
+
+    def remove(self, datablock, do_unlink: bool = True) -> None:
+        RECORDER.record(f"{self._factory.__name__}.remove")
+        self._items.pop(datablock.name, None)
+        if isinstance(datablock, Object):
+            datablock.data = None
+            datablock.parent = None
+
+
+class Socket:
+    def __init__(self, name) -> None:
+        self.name = name
+        self.default_value = 0.0
+
+
+class Sockets:
+    def __init__(self) -> None:
+        self._sockets = {}
+
+    def __getitem__(self, key):
+        if key not in self._sockets:
+            self._sockets[key] = Socket(key)
+        return self._sockets[key]
+
+
+class Node:
+    TYPES = {
+        "ShaderNodeOutputMaterial": "OUTPUT_MATERIAL",
+        "ShaderNodeBsdfPrincipled": "BSDF_PRINCIPLED",
+    }
+
+    def __init__(self, bl_idname: str) -> None:
+        self.bl_idname = bl_idname
+        self.type = self.TYPES.get(bl_idname, bl_idname)
+        self.name = bl_idname
+        self.label = ""
+        self.location = (0, 0)
+        self.width = 140
+        self.image = None
+        self.node_tree = None
+        self.operation = None
+        self.space = None
+        self.inputs = Sockets()
+        self.outputs = Sockets()
+
+
+class Nodes:
+    def __init__(self) -> None:
+        self._nodes = []
+
+    def __iter__(self):
+        return iter(list(self._nodes))
+
+    def __getitem__(self, name: str):
+        for node in self._nodes:
+            if node.name == name:
+                return node
+        raise KeyError(name)
+
+    def new(self, bl_idname: str):
+        RECORDER.record("nodes.new")
+        node = Node(bl_idname)
+        self._nodes.append(node)
+        return node
+
+    def remove(self, node) -> None:
+        self._nodes.remove(node)
+
+
+class Links:
+    def new(self, output_socket, input_socket) -> None:
+        RECORDER.record("links.new")
+
+
+class Interface:
+    def new_socket(self, name: str, in_out: str, socket_type: str):
+        RECORDER.record("interface.new_socket")
+        return Socket(name)
+
+
+class ShaderNodeTree(ID):
+    def __init__(self, name: str, tree_type: str = "ShaderNodeTree") -> None:
+        super().__init__(name)
+        self.nodes = Nodes()
+        self.links = Links()
+        self.interface = Interface()
+
+
+class Material(ID):
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.blend_method = "OPAQUE"
+        self.node_tree = None
+
+    @property
+    def use_nodes(self) -> bool:
+        return self.node_tree != None
+
+    @use_nodes.setter
+    def use_nodes(self, value: bool) -> None:
+        if value and self.node_tree == None:
+            self.node_tree = ShaderNodeTree(self.name)
+            self.node_tree.nodes.new("ShaderNodeBsdfPrincipled")
+            self.node_tree.nodes.new("ShaderNodeOutputMaterial")
+
+
+class Image(ID):
+    def __init__(
+        self,
+        name: str,
+        width: int = 0,
+        height: int = 0,
+        alpha: bool = False,
+        filepath: str = "",
+    ) -> None:
+        super().__init__(name)
+        self.size = (width, height)
+        self.filepath = filepath
+        self.source = "FILE" if filepath else "GENERATED"
+        self.file_format = "PNG"
+        self.alpha_mode = "STRAIGHT"
+        self.colorspace_settings = types.SimpleNamespace(name="sRGB")
+        self._pixels = []
+
+    @property
+    def pixels(self):
+        return self._pixels
+
+    @pixels.setter
+    def pixels(self, value) -> None:
+        RECORDER.record("Image.pixels", len(value))
+        self._pixels = value
+
+    def scale(self, width: int, height: int) -> None:
+        self.size = (width, height)
+
+    def reload(self) -> None:
+        RECORDER.record("Image.reload")
+
+
+class Images(DataCollection):
+    def __init__(self) -> None:
+        super().__init__(Image)
+
+    def load(self, filepath: str, check_existing: bool = False):
+        RECORDER.record("Image.load")
+        if check_existing:
+            for image in self:
+                if image.filepath == filepath:
+                    return image
+        return self._add(Image(filepath.replace("\\", "/").split("/")[-1], filepath=filepath))
+
+
+class MeshElements:
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, count: int) -> None:
+        self._len += count
+
+    def foreach_set(self, attribute: str, values) -> None:
+        RECORDER.record(f"{self._name}.{attribute}", len(values))
+
+
+class MeshLayer:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.data = MeshElements(name)
+
+
+class MeshLayers:
+    def __init__(self, kind: str) -> None:
+        self._kind = kind
+        self._layers = []
+
+    def new(self, name: str = "", type: str = "", domain: str = ""):
+        layer = MeshLayer(f"{self._kind}.{name or len(self._layers)}")
+        self._layers.append(layer)
+        return layer
+
+
+class Mesh(ID):
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.vertices = MeshElements("vertices")
+        self.loops = MeshElements("loops")
+        self.polygons = MeshElements("polygons")
+        self.uv_layers = MeshLayers("uv_layers")
+        self.color_attributes = MeshLayers("color_attributes")
+        self.materials = []
+
+    def update(self, calc_edges: bool = False) -> None:
+        RECORDER.record("Mesh.update")
+
+    def validate(self) -> None:
+        RECORDER.record("Mesh.validate", len(self.polygons))
+
+    def normals_split_custom_set_from_vertices(self, normals) -> None:
+        RECORDER.record("Mesh.normals", len(normals))
+
+
+class EditBone:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.parent = None
+        self._head = Vector()
+        self._tail = Vector((0.0, 1.0, 0.0))
+
+    @property
+    def head(self):
+        return self._head
+
+    @head.setter
+    def head(self, value) -> None:
+        self._head = Vector(value)
+
+    @property
+    def tail(self):
+        return self._tail
+
+    @tail.setter
+    def tail(self, value) -> None:
+        self._tail = Vector(value)
+
+    @property
+    def head_local(self):
+        return self._head
+
+
+class EditBones:
+    def __init__(self) -> None:
+        self._bones = []
+
+    def __iter__(self):
+        return iter(self._bones)
+
+    def __len__(self) -> int:
+        return len(self._bones)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._bones[key]
+        for bone in self._bones:
+            if bone.name == key:
+                return bone
+        raise KeyError(key)
+
+    def get(self, name: str, default=None):
+        for bone in self._bones:
+            if bone.name == name:
+                return bone
+        return default
+
+    def new(self, name: str):
+        RECORDER.record("edit_bones.new")
+        bone = EditBone(name)
+        self._bones.append(bone)
+        return bone
+
+
+class Armature(ID):
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.display_type = "OCTAHEDRAL"
+        self.edit_bones = EditBones()
+
+    @property
+    def bones(self):
+        return self.edit_bones
+
+
+class PoseBone:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.matrix_basis = Matrix()
+        self.matrix = Matrix()
+        self.rotation_mode = "QUATERNION"
+
+
+class Pose:
+    def __init__(self, armature: Armature) -> None:
+        self._armature = armature
+        self._bones = {}
+
+    @property
+    def bones(self):
+        for bone in self._armature.edit_bones:
+            if bone.name not in self._bones:
+                self._bones[bone.name] = PoseBone(bone.name)
+        return PoseBones(self._bones)
+
+
+class PoseBones(dict):
+    def __iter__(self):
+        return iter(list(self.values()))
+
+
+class VertexGroup:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def add(self, index, weight: float, type: str) -> None:
+        RECORDER.record("VertexGroup.add", len(index))
+
+
+class VertexGroups:
+    def __init__(self) -> None:
+        self._groups = {}
+
+    def new(self, name: str = "Group"):
+        RECORDER.record("vertex_groups.new")
+        group = VertexGroup(name)
+        self._groups.setdefault(name, group)
+        return group
+
+    def get(self, name: str, default=None):
+        return self._groups.get(name, default)
+
+
+class Modifiers:
+    def new(self, name: str, type: str):
+        RECORDER.record("modifiers.new")
+        return types.SimpleNamespace(name=name, type=type)
+
+
+class Object(ID):
+    def __init__(self, name: str, data=None) -> None:
+        super().__init__(name)
+        self._data = None
+        self.data = data
+        self.parent = None
+        self.location = (0.0, 0.0, 0.0)
+        self.scale = (1.0, 1.0, 1.0)
+        self.rotation_euler = (0.0, 0.0, 0.0)
+        self.matrix_basis = Matrix()
+        self.show_in_front = False
+        self.animation_data = None
+        self.vertex_groups = VertexGroups()
+        self.modifiers = Modifiers()
+        self.pose = Pose(data) if isinstance(data, Armature) else None
+        self.type = "ARMATURE" if isinstance(data, Armature) else "MESH" if data else "EMPTY"
+
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self, data) -> None:
+        if self._data != None:
+            self._data.users -= 1
+        if data != None:
+            data.users += 1
+        self._data = data
+
+    @property
+    def active_material(self):
+        if isinstance(self._data, Mesh) and self._data.materials:
+            return self._data.materials[0]
+        return None
+
+    @active_material.setter
+    def active_material(self, material) -> None:
+        if isinstance(self._data, Mesh):
+            if self._data.materials:
+                self._data.materials[0] = material
+            else:
+                self._data.materials.append(material)
+
+    @property
+    def children_recursive(self):
+        children = []
+        for obj in _data.objects:
+            parent = obj.parent
+            while parent != None:
+                if parent is self:
+                    children.append(obj)
+                    break
+                parent = parent.parent
+        return children
+
+
+Texture = Image
+
+
+class Context:
+    pass
+
+
+class Operator:
+    pass
+
+
+# ------------------------------------------------
+# bpy.data, bpy.context, bpy.ops
+# ------------------------------------------------
+
+
+class CollectionObjects:
+    def __init__(self, recorded_name: str) -> None:
+        self._recorded_name = recorded_name
+        self._objects = []
+
+    def __iter__(self):
+        return iter(list(self._objects))
+
+    def link(self, obj) -> None:
+        RECORDER.record(self._recorded_name)
+        self._objects.append(obj)
+
+    def unlink(self, obj) -> None:
+        self._objects.remove(obj)
+
+
+class CollectionChildren:
+    def __init__(self) -> None:
+        self._children = {}
+
+    def __iter__(self):
+        return iter(list(self._children.values()))
+
+    def get(self, name: str, default=None):
+        return self._children.get(name, default)
+
+    def link(self, collection) -> None:
+        RECORDER.record("collection.children.link")
+        self._children[collection.name] = collection
+
+    def unlink(self, collection) -> None:
+        self._children.pop(collection.name, None)
+
+
+class Collection(ID):
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.objects = CollectionObjects("collection.objects.link")
+        self.children = CollectionChildren()
+
+
+class LayerObjects:
+    def __init__(self, collection) -> None:
+        self._collection = collection
+        self.active = None
+
+    def get(self, name: str, default=None):
+        collections = [self._collection]
+        while collections:
+            collection = collections.pop()
+            for obj in collection.objects:
+                if obj.name == name:
+                    return obj
+            collections.extend(collection.children)
+        return default
+
+
+def _new_data():
+    return types.SimpleNamespace(
+        objects=DataCollection(Object),
+        meshes=DataCollection(Mesh),
+        materials=DataCollection(Material),
+        images=Images(),
+        node_groups=DataCollection(ShaderNodeTree),
+        armatures=DataCollection(Armature),
+        actions=DataCollection(ID),
+        collections=DataCollection(Collection),
+    )
+
+
+def _new_context():
+    scene_collection = types.SimpleNamespace(
+        objects=CollectionObjects("scene.objects.link"), children=CollectionChildren()
+    )
+    return types.SimpleNamespace(
+        scene=types.SimpleNamespace(
+            collection=scene_collection,
+            render=types.SimpleNamespace(fps=24),
+            frame_start=1,
+            frame_end=250,
+        ),
+        view_layer=types.SimpleNamespace(objects=LayerObjects(scene_collection)),
+    )
+
+
+def _op(name: str):
+    def op(*args, **kwargs):
+        RECORDER.record(f"ops.{name}")
+        return {"FINISHED"}
+
+    return op
+
+
+_data = _new_data()
+
+bpy = types.ModuleType("bpy")
+bpy.data = _data
+bpy.context = _new_context()
+bpy.ops = types.SimpleNamespace(
+    object=types.SimpleNamespace(mode_set=_op("object.mode_set"), select_all=_op("object.select_all")),
+    pose=types.SimpleNamespace(armature_apply=_op("pose.armature_apply")),
+)
+bpy.types = types.SimpleNamespace(
+    ID=ID,
+    Object=Object,
+    Collection=Collection,
+    Mesh=Mesh,
+    Image=Image,
+    Texture=Texture,
+    Material=Material,
+    ShaderNodeTree=ShaderNodeTree,
+    Node=Node,
+    Context=Context,
+    Operator=Operator,
+)
+bpy.utils = types.SimpleNamespace(
+    escape_identifier=lambda s: s.replace("\\", "\\\\").replace('"', '\\"')
+)
+
+mathutils = types.ModuleType("mathutils")
+mathutils.Vector = Vector
+mathutils.Quaternion = Quaternion
+mathutils.Matrix = Matrix
+
+
+def install() -> None:
+    """Registers the fake modules, must run before the importer is imported."""
+    sys.modules["bpy"] = bpy
+    sys.modules["mathutils"] = mathutils
+
+
+def reset() -> None:
+    """Starts over with an empty blend file and clears the recorded calls."""
+    global _data
+    _data = _new_data()
+    bpy.data = _data
+    bpy.context = _new_context()
+    RECORDER.reset()
@@ -0,0 +1,342 @@
+"""
+Headless benchmark of the import pipeline.
+
+Generates a synthetic CoD2 asset folder, then drives ``import_ibsp``,
+``import_xmodel`` and ``import_xmodels`` against a recording stand-in of
+``bpy``. Reports the wall time of each importer stage, the time spent
+converting the loaded assets from Rust into Python objects, the amount of data
+handed to the Blender API and the Python memory blocks each stage allocates.
+
+The compiled extension is required, build it in place first:
+
+    python setup.py build_rust --inplace --release
+    python benchmarks/run.py
+    python benchmarks/run.py --scenario map --entities 512 --repeat 3 --json results.json
+"""
+
+import argparse
+import dataclasses
+import gc
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import traceback
+from collections import defaultdict
+from contextlib import contextmanager
+
+import fake_bpy
+from synthetic_assets import SyntheticAssets
+
+fake_bpy.install()
+
+try:
+    from cod_asset_importer import importer
+except ModuleNotFoundError:
+    sys.path.insert(
+        0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "python")
+    )
+    try:
+        from cod_asset_importer import importer
+    except ImportError as error:
+        sys.exit(f"{error}\nthe compiled extension is missing, build it in place first")
+
+SCENARIOS = ("map", "xmodel", "xmodels")
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.stages = defaultdict(lambda: {"calls": 0, "time": 0.0, "blocks": 0})
+        self.conversions = defaultdict(lambda: {"calls": 0, "time": 0.0, "items": 0})
+        self.errors = []
+        self.importer_time = 0.0
+        self._depth = 0
+
+    @contextmanager
+    def stage(self, name: str):
+        self._depth += 1
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._depth -= 1
+            stage = self.stages[name]
+            stage["calls"] += 1
+            stage["time"] += elapsed
+            stage["blocks"] += sys.getallocatedblocks() - blocks
+            # the time outside the outermost stages is spent in the loader
+            if self._depth == 0:
+                self.importer_time += elapsed
+
+    def conversion(self, name: str, elapsed: float, items: int) -> None:
+        conversion = self.conversions[name]
+        conversion["calls"] += 1
+        conversion["time"] += elapsed
+        conversion["items"] += items
+
+
+class Recorded:
+    """Times every getter of a loaded asset, the getters convert Rust data into Python objects."""
+
+    __slots__ = ("_loaded", "_stats")
+
+    def __init__(self, loaded, stats: Stats) -> None:
+        self._loaded = loaded
+        self._stats = stats
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._loaded, name)
+        if not callable(attribute):
+            return attribute
+
+        conversion = f"{type(self._loaded).__name__}.{name}"
+        stats = self._stats
+
+        def getter(*args, **kwargs):
+            start = time.perf_counter()
+            value = attribute(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            items = len(value) if isinstance(value, (list, tuple, dict)) else 1
+            stats.conversion(conversion, elapsed, items)
+            return _recorded(value, stats)
+
+        return getter
+
+
+def _is_loaded(value) -> bool:
+    return type(value).__name__.startswith("Loaded")
+
+
+def _recorded(value, stats: Stats):
+    if isinstance(value, Recorded):
+        return value
+    if _is_loaded(value):
+        return Recorded(value, stats)
+    if isinstance(value, list) and len(value) > 0 and _is_loaded(value[0]):
+        return [Recorded(v, stats) for v in value]
+    if isinstance(value, dict) and len(value) > 0 and _is_loaded(next(iter(value.values()))):
+        return {k: Recorded(v, stats) for k, v in value.items()}
+    return value
+
+
+class BenchmarkImporter(importer.Importer):
+    stats = Stats()
+
+    def xmodel(self, loaded_model):
+        return self._stage("xmodel", super().xmodel, loaded_model)
+
+    def ibsp(self, loaded_ibsp):
+        return self._stage("ibsp", super().ibsp, loaded_ibsp)
+
+    def material(self, loaded_material, has_ext=True, append_asset_path=""):
+        return self._stage(
+            "material",
+            super().material,
+            loaded_material,
+            has_ext=has_ext,
+            append_asset_path=append_asset_path,
+        )
+
+    def _import_texture(self, loaded_texture):
+        return self._stage("texture", super()._import_texture, loaded_texture)
+
+    def _stage(self, name, method, loaded, **kwargs):
+        with self.stats.stage(name):
+            try:
+                return method(_recorded(loaded, self.stats), **kwargs)
+            except Exception:
+                # the loader only logs the errors of the importer, keep them for the report
+                self.stats.errors.append(traceback.format_exc())
+                raise
+
+
+importer.Importer = BenchmarkImporter
+
+
+@contextmanager
+def captured_stdout(verbose: bool):
+    """Captures the log lines the extension writes to the process stdout."""
+    output = []
+    sys.stdout.flush()
+    stdout_fd = os.dup(1)
+    with tempfile.TemporaryFile(mode="w+b") as capture:
+        os.dup2(capture.fileno(), 1)
+        try:
+            yield output
+        finally:
+            sys.stdout.flush()
+            os.dup2(stdout_fd, 1)
+            os.close(stdout_fd)
+            capture.seek(0)
+            output.extend(capture.read().decode(errors="replace").splitlines())
+            if verbose:
+                print("\n".join(output))
+
+
+def run_scenario(scenario: str, asset_path: str, assets: SyntheticAssets, args) -> dict:
+    fake_bpy.reset()
+    stats = Stats()
+    BenchmarkImporter.stats = stats
+    gc.collect()
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    with captured_stdout(args.verbose) as output:
+        start = time.perf_counter()
+        if scenario == "map":
+            importer.import_ibsp(
+                asset_path=asset_path,
+                file_path=os.path.join(asset_path, "maps", "mp", "bench_map.d3dbsp"),
+                merge_surfaces=args.merge_surfaces,
+                validate_meshes=not args.skip_validation,
+                model_cache_path=args.model_cache,
+                chunk_size=args.chunk_size,
+                weld_tolerance=args.weld,
+                bulk_assembly=args.bulk_assembly,
+            )
+        elif scenario == "xmodel":
+            for file_path in assets.model_file_paths(asset_path):
+                importer.import_xmodel(
+                    asset_path=asset_path,
+                    file_path=file_path,
+                    selected_version=importer.GAME_VERSION.CoD2,
+                    merge_surfaces=args.merge_surfaces,
+                    validate_meshes=not args.skip_validation,
+                    model_cache_path=args.model_cache,
+                    weld_tolerance=args.weld,
+                )
+        elif scenario == "xmodels":
+            importer.import_xmodels(
+                asset_path=asset_path,
+                file_paths=assets.model_file_paths(asset_path),
+                selected_version=importer.GAME_VERSION.CoD2,
+                merge_surfaces=args.merge_surfaces,
+                validate_meshes=not args.skip_validation,
+                model_cache_path=args.model_cache,
+                weld_tolerance=args.weld,
+                bulk_assembly=args.bulk_assembly,
+            )
+        total = time.perf_counter() - start
+
+    peak_memory = None
+    if args.tracemalloc:
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    errors = stats.errors + [line for line in output if line.startswith("[ERROR]")]
+    if fake_bpy.RECORDER.calls["Mesh.new"] == 0:
+        errors.append("no meshes were imported")
+
+    return {
+        "total": total,
+        "importer": stats.importer_time,
+        "loader": total - stats.importer_time,
+        "peak_memory": peak_memory,
+        "stages": dict(stats.stages),
+        "conversions": dict(stats.conversions),
+        "bpy": {
+            name: {"calls": calls, "items": fake_bpy.RECORDER.items[name]}
+            for name, calls in fake_bpy.RECORDER.calls.items()
+        },
+        "errors": errors,
+    }
+
+
+def print_result(scenario: str, result: dict, totals: list[float]) -> None:
+    print(
+        f"\n== {scenario}: {result['total']:.3f}s"
+        f" (importer {result['importer']:.3f}s, loader {result['loader']:.3f}s)"
+        f", median of {len(totals)} runs {statistics.median(totals):.3f}s"
+    )
+    if result["peak_memory"] != None:
+        print(f"peak python memory {result['peak_memory'] / 1024 / 1024:.1f} MiB")
+
+    print(f"\n{'stage':<40}{'calls':>10}{'time (s)':>12}{'blocks':>12}")
+    for name, stage in sorted(result["stages"].items(), key=lambda s: -s[1]["time"]):
+        print(f"{name:<40}{stage['calls']:>10}{stage['time']:>12.4f}{stage['blocks']:>12}")
+
+    print(f"\n{'conversion':<40}{'calls':>10}{'time (s)':>12}{'items':>12}")
+    for name, conversion in sorted(result["conversions"].items(), key=lambda c: -c[1]["time"]):
+        print(
+            f"{name:<40}{conversion['calls']:>10}"
+            f"{conversion['time']:>12.4f}{conversion['items']:>12}"
+        )
+
+    print(f"\n{'blender api':<40}{'calls':>10}{'':>12}{'items':>12}")
+    for name, call in sorted(result["bpy"].items()):
+        print(f"{name:<40}{call['calls']:>10}{'':>12}{call['items']:>12}")
+
+    for error in result["errors"]:
+        print(error)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--assets", help="generate the assets into this folder and keep them")
+    parser.add_argument("--json", help="write the results into this file")
+    parser.add_argument("--tracemalloc", action="store_true", help="trace the peak memory")
+    parser.add_argument("--verbose", action="store_true", help="show the log of the extension")
+    parser.add_argument(
+        "--merge-surfaces", action="store_true", help="import every model as a single mesh"
+    )
+    parser.add_argument(
+        "--skip-validation", action="store_true", help="skip validating the checked meshes"
+    )
+    parser.add_argument(
+        "--model-cache", help="cache the models in this folder, later runs read them from it"
+    )
+    parser.add_argument(
+        "--chunk-size", type=float, help="split the map geometry into chunks of this size"
+    )
+    parser.add_argument(
+        "--weld", type=float, help="weld the duplicate vertices closer than this distance"
+    )
+    parser.add_argument(
+        "--bulk-assembly", action="store_true", help="link the objects into a collection at once"
+    )
+    for field in dataclasses.fields(SyntheticAssets):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", type=int, default=field.default)
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    args = parse_args()
+
+    assets = SyntheticAssets(
+        **{field.name: getattr(args, field.name) for field in dataclasses.fields(SyntheticAssets)}
+    )
+    asset_path = args.assets or tempfile.mkdtemp(prefix="cod_asset_importer_benchmark_")
+    assets.write(asset_path)
+
+    results = {}
+    failed = False
+    try:
+        for scenario in args.scenario or SCENARIOS:
+            runs = [run_scenario(scenario, asset_path, assets, args) for _ in range(args.repeat)]
+            best = min(runs, key=lambda r: r["total"])
+            print_result(scenario, best, [r["total"] for r in runs])
+            best["runs"] = [r["total"] for r in runs]
+            results[scenario] = best
+            failed = failed or any(r["errors"] for r in runs)
+    finally:
+        if args.assets == None:
+            shutil.rmtree(asset_path, ignore_errors=True)
+
+    if args.json != None:
+        with open(args.json, "w") as file:
+            json.dump({"assets": dataclasses.asdict(assets), "results": results}, file, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Smoke test of the ``bpy`` stand-in used by the benchmark.
+
+Checks that every ``bpy`` and ``mathutils`` attribute the importer references
+exists on the stand-in, then runs every benchmark scenario on a small set of
+synthetic assets and fails on any error the importer raises or the extension
+logs, so the stand-in can not silently drift from the calls ``importer.py``
+makes.
+
+The compiled extension is required for the import, build it in place first:
+
+    python setup.py build_rust --inplace --release
+    python benchmarks/smoke.py
+"""
+
+import ast
+import dataclasses
+import os
+import shutil
+import sys
+import tempfile
+
+import fake_bpy
+import run
+from synthetic_assets import SyntheticAssets
+
+IMPORTER_FILE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "python",
+    "cod_asset_importer",
+    "importer.py",
+)
+STUB_MODULES = ("bpy", "mathutils")
+# small assets that import in a few seconds, rigged so the skeleton path is taken as well.
+# the scenarios run the map, single and batch imports, the options cover chunking,
+# welding and bulk assembly
+SMOKE_ARGS = [
+    "--materials=2",
+    "--texture-size=16",
+    "--models=2",
+    "--model-surfaces=2",
+    "--model-vertices=16",
+    "--model-bones=2",
+    "--entities=4",
+    "--map-surfaces=2",
+    "--map-vertices=16",
+    "--chunk-size=8",
+    "--weld=0",
+    "--bulk-assembly",
+]
+
+
+def referenced_attributes(file_path: str) -> set[tuple[str, ...]]:
+    """The longest attribute chains of the stub modules referenced in a source file."""
+    with open(file_path) as file:
+        tree = ast.parse(file.read(), filename=file_path)
+
+    chains = set()
+    inner = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Attribute):
+            continue
+
+        chain = []
+        value = node
+        while isinstance(value, ast.Attribute):
+            chain.append(value.attr)
+            inner.add(id(value.value))
+            value = value.value
+
+        if isinstance(value, ast.Name) and value.id in STUB_MODULES:
+            chains.add((id(node), (value.id, *reversed(chain))))
+
+    return {chain for node_id, chain in chains if node_id not in inner}
+
+
+def missing_attributes(chains: set[tuple[str, ...]]) -> list[str]:
+    fake_bpy.reset()
+    missing = []
+    for chain in sorted(chains):
+        value = sys.modules[chain[0]]
+        for i, name in enumerate(chain[1:], start=1):
+            if not hasattr(value, name):
+                missing.append(".".join(chain[: i + 1]))
+                break
+            value = getattr(value, name)
+
+    return missing
+
+
+def import_assets() -> list[str]:
+    args = run.parse_args(SMOKE_ARGS)
+    assets = SyntheticAssets(
+        **{field.name: getattr(args, field.name) for field in dataclasses.fields(SyntheticAssets)}
+    )
+
+    errors = []
+    asset_path = tempfile.mkdtemp(prefix="cod_asset_importer_smoke_")
+    try:
+        assets.write(asset_path)
+        for scenario in run.SCENARIOS:
+            result = run.run_scenario(scenario, asset_path, assets, args)
+            errors.extend(f"{scenario}: {error}" for error in result["errors"])
+    finally:
+        shutil.rmtree(asset_path, ignore_errors=True)
+
+    return errors
+
+
+def main() -> int:
+    missing = missing_attributes(referenced_attributes(IMPORTER_FILE_PATH))
+    for attribute in missing:
+        print(f"missing in the stand-in: {attribute}")
+
+    errors = import_assets()
+    for error in errors:
+        print(error)
+
+    if missing or errors:
+        return 1
+
+    print("ok")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
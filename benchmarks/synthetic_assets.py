@@ -0,0 +1,321 @@
+"""
+Writes a synthetic CoD2 asset folder following the layouts in ``templates/``.
+
+The generated folder contains textures, materials, xmodels and a map that
+places the xmodels as entities, so every loader path of a real CoD2 import
+is exercised: ibsp_template_v4, iwi_template, material_template_v20,
+xmodel_template_v20, xmodelpart_template_v20 and xmodelsurf_template_v20.
+"""
+
+import math
+import os
+import random
+import struct
+from dataclasses import dataclass
+
+XMODEL_VERSION_V20 = 0x14
+IBSP_VERSION_V4 = 4
+IBSP_LUMP_COUNT = 39
+IBSP_LUMP_MATERIALS = 0
+IBSP_LUMP_TRIANGLESOUPS = 7
+IBSP_LUMP_VERTICES = 8
+IBSP_LUMP_TRIANGLES = 9
+IBSP_LUMP_ENTITIES = 37
+IWI_VERSION_V5 = 5
+IWI_FORMAT_DXT1 = 0x0B
+IWI_FORMAT_DXT5 = 0x0D
+RIGGED = 65535
+# triangle counts are stored as u16 index counts in the map, which caps a grid at 105x105
+GRID_MAX_SIDE = 105
+TEXTURE_TYPES = ("colorMap", "normalMap", "specularMap")
+
+
+@dataclass
+class SyntheticAssets:
+    """Sizes of the generated asset folder, every count is per asset."""
+
+    materials: int = 8
+    texture_size: int = 256
+    models: int = 16
+    model_surfaces: int = 2
+    model_vertices: int = 1024
+    model_bones: int = 1
+    entities: int = 128
+    map_surfaces: int = 64
+    map_vertices: int = 1024
+    seed: int = 0
+
+    def write(self, asset_path: str) -> str:
+        """Writes the assets into ``asset_path`` and returns the path of the map."""
+        rng = random.Random(self.seed)
+
+        for i in range(self.materials):
+            texture_names = []
+            for texture_type in TEXTURE_TYPES:
+                texture_name = f"bench_{texture_type}_{i}"
+                texture_format = IWI_FORMAT_DXT5 if texture_type == "normalMap" else IWI_FORMAT_DXT1
+                write_iwi(
+                    _asset_file(asset_path, "images", f"{texture_name}.iwi"),
+                    texture_format,
+                    self.texture_size,
+                    rng,
+                )
+                texture_names.append((texture_type, texture_name))
+
+            write_material(
+                _asset_file(asset_path, "materials", material_name(i)),
+                material_name(i),
+                texture_names,
+            )
+
+        for i in range(self.models):
+            lod_name = f"bench_model_{i}_lod0"
+            materials = [
+                material_name((i + s) % self.materials) for s in range(self.model_surfaces)
+            ]
+            write_xmodel(_asset_file(asset_path, "xmodel", model_name(i)), lod_name, materials)
+            write_xmodelpart(_asset_file(asset_path, "xmodelparts", lod_name), self.model_bones)
+            write_xmodelsurf(
+                _asset_file(asset_path, "xmodelsurfs", lod_name),
+                self.model_surfaces,
+                self.model_vertices,
+                self.model_bones,
+                rng,
+            )
+
+        map_file_path = _asset_file(asset_path, "maps", "mp", "bench_map.d3dbsp")
+        write_ibsp(
+            map_file_path,
+            [material_name(i) for i in range(self.materials)],
+            self.map_surfaces,
+            self.map_vertices,
+            [model_name(i % self.models) for i in range(self.entities)] if self.models else [],
+            rng,
+        )
+
+        return map_file_path
+
+    def model_file_paths(self, asset_path: str) -> list[str]:
+        return [os.path.join(asset_path, "xmodel", model_name(i)) for i in range(self.models)]
+
+
+def material_name(index: int) -> str:
+    return f"bench_material_{index}"
+
+
+def model_name(index: int) -> str:
+    return f"bench_model_{index}"
+
+
+def write_iwi(file_path: str, texture_format: int, size: int, rng: random.Random) -> None:
+    block_size = 16 if texture_format == IWI_FORMAT_DXT5 else 8
+    blocks = max(1, size // 4) ** 2
+    header_size = 28
+
+    with open(file_path, "wb") as file:
+        file.write(b"IWi")
+        file.write(struct.pack("<BBBHHH", IWI_VERSION_V5, texture_format, 0, size, size, 1))
+        # only the largest mipmap is stored, it starts right after the offsets
+        file.write(struct.pack("<4I", header_size, header_size, header_size, header_size))
+        file.write(rng.randbytes(blocks * block_size))
+
+
+def write_material(file_path: str, name: str, textures: list[tuple[str, str]]) -> None:
+    header_size = 64
+    textures_offset = header_size
+    strings = bytearray()
+    strings_offset = textures_offset + len(textures) * 12
+
+    def add_string(value: str) -> int:
+        offset = strings_offset + len(strings)
+        strings.extend(_cstring(value))
+        return offset
+
+    name_offset = add_string(name)
+    techset_offset = add_string("bench_techset")
+    entries = bytearray()
+    for texture_type, texture_name in textures:
+        type_offset = add_string(texture_type)
+        texture_name_offset = add_string(texture_name)
+        entries.extend(struct.pack("<3I", type_offset, 0, texture_name_offset))
+
+    with open(file_path, "wb") as file:
+        file.write(struct.pack("<I", name_offset))
+        file.write(bytes(48))
+        file.write(struct.pack("<H", len(textures)))
+        file.write(bytes(2))
+        file.write(struct.pack("<2I", techset_offset, textures_offset))
+        file.write(entries)
+        file.write(strings)
+
+
+def write_xmodel(file_path: str, lod_name: str, materials: list[str]) -> None:
+    with open(file_path, "wb") as file:
+        file.write(struct.pack("<H", XMODEL_VERSION_V20))
+        file.write(bytes(25))
+        for lod in range(4):
+            file.write(struct.pack("<f", 1000.0 if lod == 0 else 0.0))
+            file.write(_cstring(lod_name if lod == 0 else ""))
+        file.write(bytes(4))
+        file.write(struct.pack("<I", 0))
+        file.write(struct.pack("<H", len(materials)))
+        for material in materials:
+            file.write(_cstring(material))
+
+
+def write_xmodelpart(file_path: str, bones: int) -> None:
+    # the first bone is the root bone, the others form a chain along the z axis
+    with open(file_path, "wb") as file:
+        file.write(struct.pack("<3H", XMODEL_VERSION_V20, bones - 1, 1))
+        for i in range(1, bones):
+            file.write(struct.pack("<b3f3h", i - 1, 0.0, 0.0, 4.0, 0, 0, 0))
+        for i in range(bones):
+            file.write(_cstring(f"bench_bone_{i}"))
+
+
+def write_xmodelsurf(
+    file_path: str, surfaces: int, vertices: int, bones: int, rng: random.Random
+) -> None:
+    positions, uvs, triangles = _grid(vertices)
+    rigged = bones > 1
+
+    with open(file_path, "wb") as file:
+        file.write(struct.pack("<2H", XMODEL_VERSION_V20, surfaces))
+        for _ in range(surfaces):
+            file.write(bytes(1))
+            file.write(struct.pack("<3H", len(positions), len(triangles), RIGGED if rigged else 0))
+            if rigged:
+                file.write(bytes(2))
+
+            for i, (position, uv) in enumerate(zip(positions, uvs)):
+                file.write(struct.pack("<3f", 0.0, 0.0, 1.0))
+                file.write(rng.randbytes(4))
+                file.write(struct.pack("<2f", *uv))
+                file.write(bytes(24))
+                if rigged:
+                    # every vertex is shared between two neighbouring bones
+                    file.write(struct.pack("<BH", 1, i % bones))
+                file.write(struct.pack("<3f", *position))
+                if rigged:
+                    file.write(bytes(1))
+                    file.write(struct.pack("<H", (i + 1) % bones))
+                    file.write(bytes(12))
+                    file.write(struct.pack("<H", RIGGED // 2))
+
+            for triangle in triangles:
+                file.write(struct.pack("<3H", *triangle))
+
+
+def write_ibsp(
+    file_path: str,
+    materials: list[str],
+    surfaces: int,
+    vertices: int,
+    entities: list[str],
+    rng: random.Random,
+) -> None:
+    positions, uvs, grid_triangles = _grid(vertices)
+    side = math.isqrt(len(positions))
+
+    materials_lump = bytearray()
+    for material in materials:
+        materials_lump.extend(material.encode().ljust(64, b"\0"))
+        materials_lump.extend(struct.pack("<Q", 0))
+
+    trianglesoups_lump = bytearray()
+    vertices_lump = bytearray()
+    triangles_lump = bytearray()
+    for s in range(surfaces):
+        vertices_offset = s * len(positions)
+        triangles_offset = s * len(grid_triangles) * 3
+        trianglesoups_lump.extend(
+            struct.pack(
+                "<HHIHHI",
+                s % len(materials),
+                0,
+                vertices_offset,
+                len(positions),
+                len(grid_triangles) * 3,
+                triangles_offset,
+            )
+        )
+
+        # surfaces are laid out next to each other so the map has some extent
+        offset_x = (s % 16) * side
+        offset_y = (s // 16) * side
+        for (x, y, z), uv in zip(positions, uvs):
+            vertices_lump.extend(struct.pack("<3f", x + offset_x, y + offset_y, z))
+            vertices_lump.extend(struct.pack("<3f", 0.0, 0.0, 1.0))
+            vertices_lump.extend(rng.randbytes(4))
+            vertices_lump.extend(struct.pack("<2f", *uv))
+            vertices_lump.extend(bytes(32))
+
+        for triangle in grid_triangles:
+            triangles_lump.extend(struct.pack("<3H", *triangle))
+
+    entity_strings = ['{\n"classname" "worldspawn"\n}']
+    for name in entities:
+        origin = " ".join(f"{rng.uniform(-4096.0, 4096.0):.3f}" for _ in range(3))
+        angles = f"0 {rng.uniform(0.0, 360.0):.3f} 0"
+        entity_strings.append(
+            "{\n"
+            f'"classname" "misc_model"\n'
+            f'"model" "xmodel/{name}"\n'
+            f'"origin" "{origin}"\n'
+            f'"angles" "{angles}"\n'
+            "}"
+        )
+    entities_lump = ("\n".join(entity_strings) + "\n").encode() + b"\0"
+
+    lumps = {
+        IBSP_LUMP_MATERIALS: bytes(materials_lump),
+        IBSP_LUMP_TRIANGLESOUPS: bytes(trianglesoups_lump),
+        IBSP_LUMP_VERTICES: bytes(vertices_lump),
+        IBSP_LUMP_TRIANGLES: bytes(triangles_lump),
+        IBSP_LUMP_ENTITIES: entities_lump,
+    }
+
+    header_size = 8 + IBSP_LUMP_COUNT * 8
+    lump_headers = bytearray()
+    lump_data = bytearray()
+    for i in range(IBSP_LUMP_COUNT):
+        data = lumps.get(i, b"")
+        lump_headers.extend(struct.pack("<2I", len(data), header_size + len(lump_data)))
+        lump_data.extend(data)
+
+    with open(file_path, "wb") as file:
+        file.write(b"IBSP")
+        file.write(struct.pack("<i", IBSP_VERSION_V4))
+        file.write(lump_headers)
+        file.write(lump_data)
+
+
+def _grid(
+    vertices: int,
+) -> tuple[list[tuple[float, float, float]], list[tuple[float, float]], list[tuple[int, int, int]]]:
+    side = min(GRID_MAX_SIDE, max(2, math.isqrt(vertices)))
+    positions = []
+    uvs = []
+    for y in range(side):
+        for x in range(side):
+            positions.append((float(x), float(y), math.sin(x * 0.5) * math.cos(y * 0.5)))
+            uvs.append((x / (side - 1), y / (side - 1)))
+
+    triangles = []
+    for y in range(side - 1):
+        for x in range(side - 1):
+            i = y * side + x
+            triangles.append((i, i + 1, i + side))
+            triangles.append((i + 1, i + side + 1, i + side))
+
+    return positions, uvs, triangles
+
+
+def _cstring(value: str) -> bytes:
+    return value.encode() + b"\0"
+
+
+def _asset_file(asset_path: str, *parts: str) -> str:
+    file_path = os.path.join(asset_path, *parts)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    return file_path
@@ -13,6 +13,9 @@ class CodAssetImporterMenu(bpy.types.Menu):
         self.layout.operator(
             operator=operators.ModelImporter.bl_idname, text="Import model"
         )
+        self.layout.operator(
+            operator=operators.AnimationImporter.bl_idname, text="Import animation"
+        )
 
 
 def menu_func(self: bpy.types.Menu, context: bpy.types.Context):
@@ -25,39 +25,39 @@ class BLENDER_SHADERNODES(metaclass=base_enum.BaseEnum):
     OUTPUT_TEXIMAGE_COLOR = "Color"
     OUTPUT_TEXIMAGE_ALPHA = "Alpha"
     TEXIMAGE_COLORSPACE_SRGB = "sRGB"
+    TEXIMAGE_COLORSPACE_NONCOLOR = "Non-Color"
     # ------------------------------------------------
     SHADERNODE_NORMALMAP = "ShaderNodeNormalMap"
     INPUT_NORMALMAP_STRENGTH = "Strength"
     INPUT_NORMALMAP_COLOR = "Color"
     OUTPUT_NORMALMAP_NORMAL = "Normal"
-    NORMALMAP_SPACE_OBJECT = "OBJECT"
-    # ------------------------------------------------
-    SHADERNODE_COMBINECOLOR = "ShaderNodeCombineColor"
-    INPUT_COMBINECOLOR_R = "Red"
-    INPUT_COMBINECOLOR_G = "Green"
-    INPUT_COMBINECOLOR_B = "Blue"
-    OUTPUT_COMBINECOLOR_COLOR = "Color"
-    # ------------------------------------------------
-    SHADERNODE_MATH = "ShaderNodeMath"
-    OUTPUT_MATH_VALUE = "Value"
-    OPERATION_MATH_SQRT = "SQRT"
-    INPUT_MATH_SQRT_VALUE = "Value"
-    # ------------------------------------------------
-    OPERATION_MATH_SUBTRACT = "SUBTRACT"
-    INPUT_MATH_SUBTRACT_VALUE1 = 0 # Value
-    INPUT_MATH_SUBTRACT_VALUE2 = 1 # Value
-    # ------------------------------------------------
-    OPERATION_MATH_POWER = "POWER"
-    INPUT_MATH_POWER_BASE = 0 # Value
-    INPUT_MATH_POWER_EXPONENT = 1 # Value
-    # ------------------------------------------------
-    SHADERNODE_SEPARATECOLOR = "ShaderNodeSeparateColor"
-    INPUT_SEPARATECOLOR_COLOR = "Color"
-    OUTPUT_SEPARATECOLOR_R = "Red"
-    OUTPUT_SEPARATECOLOR_G = "Green"
-    OUTPUT_SEPARATECOLOR_B = "Blue"
+    NORMALMAP_SPACE_TANGENT = "TANGENT"
     # ------------------------------------------------
     SHADERNODE_INVERT = "ShaderNodeInvert"
     INPUT_INVERT_FAC = "Fac"
     INPUT_INVERT_COLOR = "Color"
     OUTPUT_INVERT_COLOR = "Color"
+    # ------------------------------------------------
+    SHADERNODETREE = "ShaderNodeTree"
+    SHADERNODE_GROUP = "ShaderNodeGroup"
+    NODEGROUPINPUT = "NodeGroupInput"
+    NODEGROUPOUTPUT = "NodeGroupOutput"
+    SOCKET_IN = "INPUT"
+    SOCKET_OUT = "OUTPUT"
+    SOCKETTYPE_COLOR = "NodeSocketColor"
+    SOCKETTYPE_FLOAT = "NodeSocketFloat"
+    SOCKETTYPE_SHADER = "NodeSocketShader"
+
+
+class MATERIAL_NODEGROUPS(metaclass=base_enum.BaseEnum):
+    SURFACE = "CoD Surface"
+    SURFACE_NORMAL = "CoD Surface Normal Map"
+    SURFACE_V14 = "CoD Surface V14"
+    # ------------------------------------------------
+    INPUT_COLOR = "Color"
+    INPUT_ALPHA = "Alpha"
+    INPUT_SPECULAR = "Specular"
+    INPUT_ROUGHNESS = "Roughness"
+    INPUT_NORMAL = "Normal"
+    INPUT_INVERT = "Invert"
+    OUTPUT_SHADER = "Shader"
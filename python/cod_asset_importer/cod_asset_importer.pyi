@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import importer
 
 class XMODEL_VERSION:
@@ -23,8 +23,21 @@ class TEXTURE_TYPE:
     Detail: int
 
 class Loader:
-    def __init__(self, importer: importer.Importer) -> None: ...
-    def import_bsp(self, asset_path: str, file_path: str) -> None: ...
+    def __init__(self, importer: Optional[importer.Importer]) -> None: ...
+    def import_bsp(
+        self,
+        asset_path: str,
+        file_path: str,
+        lod: int = 0,
+        lod_reference: Optional[List[float]] = None,
+        dds_path: Optional[str] = None,
+        fingerprints: Optional[Dict[str, str]] = None,
+        merge_surfaces: bool = False,
+        model_cache_path: Optional[str] = None,
+        model_cache_size: int = 1024,
+        chunk_size: Optional[float] = None,
+        weld_tolerance: Optional[float] = None,
+    ) -> None: ...
     def import_xmodel(
         self,
         asset_path: str,
@@ -33,11 +46,53 @@ class Loader:
         angles: List[float],
         origin: List[float],
         scale: List[float],
+        lod: int = 0,
+        dds_path: Optional[str] = None,
+        fingerprints: Optional[Dict[str, str]] = None,
+        merge_surfaces: bool = False,
+        model_cache_path: Optional[str] = None,
+        model_cache_size: int = 1024,
+        weld_tolerance: Optional[float] = None,
+    ) -> None: ...
+    def import_xmodels(
+        self,
+        asset_path: str,
+        file_paths: List[str],
+        selected_version: GAME_VERSION,
+        lod: int = 0,
+        dds_path: Optional[str] = None,
+        fingerprints: Optional[Dict[str, str]] = None,
+        merge_surfaces: bool = False,
+        model_cache_path: Optional[str] = None,
+        model_cache_size: int = 1024,
+        weld_tolerance: Optional[float] = None,
     ) -> None: ...
+    def import_xanim(
+        self,
+        file_path: str,
+        rest_poses: Dict[str, Tuple[List[float], List[float]]],
+    ) -> None: ...
+    def plan_bsp(
+        self,
+        asset_path: str,
+        file_path: str,
+        lod: int = 0,
+        lod_reference: Optional[Tuple[float, float, float]] = None,
+    ) -> ImportPlan: ...
+    def plan_xmodel(
+        self,
+        asset_path: str,
+        file_path: str,
+        selected_version: GAME_VERSION,
+        lod: int = 0,
+    ) -> ImportPlan: ...
 
 class LoadedIbsp:
     def name(self) -> str: ...
     def surfaces(self) -> List[LoadedSurface]: ...
+    def source(self) -> str: ...
+    def fingerprint(self) -> str: ...
+    def reused(self) -> bool: ...
 
 class LoadedModel:
     def name(self) -> str: ...
@@ -45,14 +100,20 @@ class LoadedModel:
     def angles(self) -> List[float]: ...
     def origin(self) -> List[float]: ...
     def scale(self) -> List[float]: ...
+    def matrix(self) -> List[List[float]]: ...
     def materials(self) -> Dict[str, LoadedMaterial]: ...
     def surfaces(self) -> List[LoadedSurface]: ...
     def bones(self) -> List[LoadedBone]: ...
+    def source(self) -> str: ...
+    def fingerprint(self) -> str: ...
+    def reused(self) -> bool: ...
 
 class LoadedMaterial:
     def name(self) -> str: ...
     def version(self) -> XMODEL_VERSION: ...
     def textures(self) -> List[LoadedTexture]: ...
+    def source(self) -> str: ...
+    def fingerprint(self) -> str: ...
 
 class LoadedTexture:
     def name(self) -> str: ...
@@ -60,9 +121,17 @@ class LoadedTexture:
     def width(self) -> int: ...
     def height(self) -> int: ...
     def data(self) -> List[float]: ...
+    def file_path(self) -> Optional[str]: ...
+    def content_hash(self) -> str: ...
+    def source(self) -> str: ...
+    def fingerprint(self) -> str: ...
+    def reused(self) -> bool: ...
 
 class LoadedSurface:
     def material(self) -> str: ...
+    def materials(self) -> List[str]: ...
+    def polygon_material_indices(self) -> List[int]: ...
+    def validated(self) -> bool: ...
     def vertices(self) -> List[float]: ...
     def normals(self) -> List[List[float]]: ...
     def colors(self) -> List[float]: ...
@@ -74,8 +143,46 @@ class LoadedSurface:
     def polygon_vertices(self) -> List[int]: ...
     def weight_groups(self) -> Dict[int, Dict[int, float]]: ...
 
+class LoadedAnimation:
+    def name(self) -> str: ...
+    def framerate(self) -> int: ...
+    def frame_count(self) -> int: ...
+    def looping(self) -> bool: ...
+    def bones(self) -> List[LoadedAnimationBone]: ...
+
+class LoadedAnimationBone:
+    def name(self) -> str: ...
+    def rotations(self) -> List[List[float]]: ...
+    def positions(self) -> List[List[float]]: ...
+
 class LoadedBone:
     def name(self) -> str: ...
     def parent(self) -> int: ...
     def position(self) -> List[float]: ...
     def rotation(self) -> List[float]: ...
+
+class ImportPlan:
+    def name(self) -> str: ...
+    def models(self) -> List[PlannedModel]: ...
+    def materials(self) -> List[str]: ...
+    def textures(self) -> List[PlannedTexture]: ...
+    def missing_files(self) -> List[str]: ...
+    def instances(self) -> int: ...
+    def surfaces(self) -> int: ...
+    def vertices(self) -> int: ...
+    def triangles(self) -> int: ...
+    def texture_bytes(self) -> int: ...
+
+class PlannedModel:
+    def name(self) -> str: ...
+    def lod(self) -> int: ...
+    def instances(self) -> int: ...
+    def surfaces(self) -> int: ...
+    def vertices(self) -> int: ...
+    def triangles(self) -> int: ...
+
+class PlannedTexture:
+    def name(self) -> str: ...
+    def width(self) -> int: ...
+    def height(self) -> int: ...
+    def decoded_bytes(self) -> int: ...
@@ -2,34 +2,72 @@ import glob
 import bpy
 import mathutils
 import os
-import math
 import traceback
+from contextlib import contextmanager
 from .cod_asset_importer import (
     XMODEL_VERSION,
     GAME_VERSION,
     TEXTURE_TYPE,
     LoadedModel,
     LoadedIbsp,
+    LoadedAnimation,
     LoadedMaterial,
     Loader,
     LoadedTexture,
+    ImportPlan,
 )
 from .blender_shadernodes import (
     BLENDER_SHADERNODES,
+    MATERIAL_NODEGROUPS,
 )
 
+# custom properties of the imported datablocks, used to only rebuild
+# the assets whose source files changed on a re-import
+SOURCE_PROPERTY = "cod_asset_importer_source"
+FINGERPRINT_PROPERTY = "cod_asset_importer_fingerprint"
+SURFACE_PROPERTY = "cod_asset_importer_surface"
+# collections of bulk imports, a re-import fills the collection of the previous one
+COLLECTION_PROPERTY = "cod_asset_importer_collection"
+# images by the content of their texture, identical textures share one image
+CONTENT_HASH_PROPERTY = "cod_asset_importer_content_hash"
+
 
 class Importer:
-    def __init__(self, asset_path: str) -> None:
+    def __init__(
+        self,
+        asset_path: str,
+        skeleton: bpy.types.Object | None = None,
+        validate_meshes: bool = True,
+        collection: bpy.types.Collection | None = None,
+    ) -> None:
         self.asset_path = asset_path
+        self.validate_meshes = validate_meshes
+        self.collection = collection
+        if self.collection == None:
+            self.collection = bpy.context.scene.collection
         self.ibsp_entities_null = None
+        self.skeleton = skeleton
+        self.tracked = tracked_datablocks()
+        self.content_images = content_images()
+
+    def fingerprints(self) -> dict[str, str]:
+        fingerprints = {}
+        for source, datablocks in self.tracked.items():
+            datablock_fingerprints = set(d[FINGERPRINT_PROPERTY] for d in datablocks)
+            # sources that are imported with different fingerprints are rebuilt
+            if len(datablock_fingerprints) == 1:
+                fingerprints[source] = datablock_fingerprints.pop()
+
+        return fingerprints
 
     def xmodel(self, loaded_model: LoadedModel) -> None:
         model_name = loaded_model.name()
         model_version = loaded_model.version()
+        model_source = loaded_model.source()
+        model_fingerprint = loaded_model.fingerprint()
 
         xmodel_null = bpy.data.objects.new(model_name, None)
-        bpy.context.scene.collection.objects.link(xmodel_null)
+        self.collection.objects.link(xmodel_null)
 
         mesh_objects = []
 
@@ -42,8 +80,15 @@ class Importer:
             self.material(loaded_material=material, append_asset_path=append_asset_path)
 
         loaded_bones = loaded_model.bones()
+        if loaded_model.reused():
+            for mesh in self._tracked_meshes(model_source):
+                obj = bpy.data.objects.new(model_name, mesh)
+                self.collection.objects.link(obj)
+                mesh_objects.append(obj)
+
         for i, surface in enumerate(loaded_model.surfaces()):
             mesh = bpy.data.meshes.new(model_name)
+            self._track(mesh, model_source, model_fingerprint, surface=i)
             vertices = surface.vertices()
             mesh.vertices.add(len(vertices) // 3)
             mesh.loops.add(surface.loops_len())
@@ -55,7 +100,9 @@ class Importer:
             mesh.polygons.foreach_set("vertices", surface.polygon_vertices())
             mesh.polygons.foreach_set("use_smooth", [True] * polygons_len)
             mesh.update(calc_edges=True)
-            mesh.validate()
+            # surfaces whose triangles were checked by the loader can skip the validation
+            if self.validate_meshes or not surface.validated():
+                mesh.validate()
 
             mesh.normals_split_custom_set_from_vertices(surface.normals())
 
@@ -67,13 +114,20 @@ class Importer:
             )
             vertex_color_layer.data.foreach_set("color", surface.colors())
 
+            # merged surfaces have a material slot for each of their materials
+            surface_materials = surface.materials()
+            for material_name in surface_materials:
+                if model_version == XMODEL_VERSION.V14:
+                    material_name = os.path.splitext(material_name)[0]
+                mesh.materials.append(bpy.data.materials.get(material_name))
+            if len(surface_materials) > 1:
+                mesh.polygons.foreach_set(
+                    "material_index", surface.polygon_material_indices()
+                )
+
             obj = bpy.data.objects.new(model_name, mesh)
-            active_material_name = surface.material()
-            if model_version == XMODEL_VERSION.V14:
-                active_material_name = os.path.splitext(active_material_name)[0]
-            obj.active_material = bpy.data.materials.get(active_material_name)
 
-            bpy.context.scene.collection.objects.link(obj)
+            self.collection.objects.link(obj)
 
             if len(loaded_bones) > 1:
                 for bone_index, weights in surface.weight_groups().items():
@@ -92,9 +146,20 @@ class Importer:
             skeleton = bpy.data.objects.new(f"{model_name}_skeleton", armature)
             skeleton.parent = xmodel_null
             skeleton.show_in_front = True
-            bpy.context.scene.collection.objects.link(skeleton)
+            self.collection.objects.link(skeleton)
+
+            # the armature operators only work on objects of the view layer, the skeleton
+            # of a bulk import is linked to the scene while they run, its collection stays
+            # out of the scene until the import is done
+            scene_objects = bpy.context.scene.collection.objects
+            linked_to_scene = bpy.context.view_layer.objects.get(skeleton.name) == None
+            if linked_to_scene:
+                scene_objects.link(skeleton)
+
+            # the operators run without an undo push of their own, the import operator
+            # records the whole import as one undo step
             bpy.context.view_layer.objects.active = skeleton
-            bpy.ops.object.mode_set(mode="EDIT")
+            bpy.ops.object.mode_set("EXEC_DEFAULT", False, mode="EDIT")
 
             bone_matrices = {}
 
@@ -119,13 +184,13 @@ class Importer:
                     new_bone.parent = armature.edit_bones[bone_parent]
 
             bpy.context.view_layer.objects.active = skeleton
-            bpy.ops.object.mode_set(mode="POSE")
+            bpy.ops.object.mode_set("EXEC_DEFAULT", False, mode="POSE")
 
             for bone in skeleton.pose.bones:
                 bone.matrix_basis.identity()
                 bone.matrix = bone_matrices[bone.name]
 
-            bpy.ops.pose.armature_apply()
+            bpy.ops.pose.armature_apply("EXEC_DEFAULT", False)
             bpy.context.view_layer.objects.active = skeleton
 
             maxs = [0, 0, 0]
@@ -141,12 +206,14 @@ class Importer:
                 dimensions.append(maxs[i] - mins[i])
 
             length = max(0.001, (dimensions[0] + dimensions[1] + dimensions[2]) / 600)
-            bpy.ops.object.mode_set(mode="EDIT")
+            bpy.ops.object.mode_set("EXEC_DEFAULT", False, mode="EDIT")
             for bone in [armature.edit_bones[lb.name()] for lb in loaded_bones]:
                 bone.tail = bone.head + (bone.tail - bone.head).normalized() * length
 
-            bpy.ops.object.mode_set(mode="OBJECT")
-            bpy.ops.object.select_all(action="DESELECT")
+            bpy.ops.object.mode_set("EXEC_DEFAULT", False, mode="OBJECT")
+            bpy.ops.object.select_all("EXEC_DEFAULT", False, action="DESELECT")
+            if linked_to_scene:
+                scene_objects.unlink(skeleton)
 
         for mesh_object in mesh_objects:
             if skeleton == None:
@@ -154,7 +221,8 @@ class Importer:
                 continue
 
             for loaded_bone in loaded_bones:
-                mesh_object.vertex_groups.new(name=loaded_bone.name())
+                if mesh_object.vertex_groups.get(loaded_bone.name()) == None:
+                    mesh_object.vertex_groups.new(name=loaded_bone.name())
 
             mesh_object.parent = skeleton
             modifier = mesh_object.modifiers.new("armature_rig", "ARMATURE")
@@ -164,36 +232,85 @@ class Importer:
 
         if self.ibsp_entities_null != None:
             xmodel_null.parent = self.ibsp_entities_null
-            xmodel_null.location = loaded_model.origin()
-            xmodel_null.scale = loaded_model.scale()
-            angles = loaded_model.angles()
-            xmodel_null.rotation_euler = (
-                math.radians(angles[2]),
-                math.radians(angles[0]),
-                math.radians(angles[1]),
-            )
+            xmodel_null.matrix_basis = mathutils.Matrix(loaded_model.matrix())
+
+    def xanim(self, loaded_animation: LoadedAnimation) -> None:
+        animation_name = loaded_animation.name()
+        skeleton = self.skeleton
+
+        if skeleton.animation_data == None:
+            skeleton.animation_data_create()
+
+        action = bpy.data.actions.new(animation_name)
+        action.use_cyclic = loaded_animation.looping()
+        skeleton.animation_data.action = action
+
+        for loaded_bone in loaded_animation.bones():
+            bone_name = loaded_bone.name()
+            pose_bone = skeleton.pose.bones.get(bone_name)
+            if pose_bone == None:
+                continue
+
+            pose_bone.rotation_mode = "QUATERNION"
+            bone_path = f'pose.bones["{bpy.utils.escape_identifier(bone_name)}"]'
+
+            for data_path, channels in (
+                ("rotation_quaternion", loaded_bone.rotations()),
+                ("location", loaded_bone.positions()),
+            ):
+                for index, keyframes in enumerate(channels):
+                    if len(keyframes) == 0:
+                        continue
+
+                    fcurve = action.fcurves.new(
+                        data_path=f"{bone_path}.{data_path}",
+                        index=index,
+                        action_group=bone_name,
+                    )
+                    fcurve.keyframe_points.add(len(keyframes) // 2)
+                    fcurve.keyframe_points.foreach_set("co", keyframes)
+                    fcurve.update()
+
+        scene = bpy.context.scene
+        scene.render.fps = loaded_animation.framerate()
+        scene.frame_start = 0
+        scene.frame_end = max(0, loaded_animation.frame_count() - 1)
 
     def ibsp(self, loaded_ibsp: LoadedIbsp) -> None:
         ibsp_name = loaded_ibsp.name()
+        ibsp_source = loaded_ibsp.source()
+        ibsp_fingerprint = loaded_ibsp.fingerprint()
+
+        # a re-import replaces the objects of the previous import, the meshes
+        # and materials are kept and reused as long as they are up to date
+        self._remove_tracked_objects(ibsp_source)
 
         ibsp_null = bpy.data.objects.new(ibsp_name, None)
-        bpy.context.scene.collection.objects.link(ibsp_null)
+        self.collection.objects.link(ibsp_null)
+        self._track(ibsp_null, ibsp_source, ibsp_fingerprint)
 
         ibsp_geometry_null = bpy.data.objects.new(f"{ibsp_name}_geometry", None)
-        bpy.context.scene.collection.objects.link(ibsp_geometry_null)
+        self.collection.objects.link(ibsp_geometry_null)
         ibsp_geometry_null.parent = ibsp_null
 
         ibsp_entities_null = bpy.data.objects.new(f"{ibsp_name}_entities", None)
-        bpy.context.scene.collection.objects.link(ibsp_entities_null)
+        self.collection.objects.link(ibsp_entities_null)
         ibsp_entities_null.parent = ibsp_null
 
         self.ibsp_entities_null = ibsp_entities_null
 
+        if loaded_ibsp.reused():
+            for mesh in self._tracked_meshes(ibsp_source):
+                obj = bpy.data.objects.new(f"{ibsp_name}_geometry", mesh)
+                obj.parent = ibsp_geometry_null
+                self.collection.objects.link(obj)
+
         surfaces = loaded_ibsp.surfaces()
-        for surface in surfaces:
+        for i, surface in enumerate(surfaces):
             name = f"{ibsp_name}_geometry"
 
             mesh = bpy.data.meshes.new(name)
+            self._track(mesh, ibsp_source, ibsp_fingerprint, surface=i)
             vertices = surface.vertices()
             mesh.vertices.add(len(vertices) // 3)
             mesh.loops.add(surface.loops_len())
@@ -205,7 +322,9 @@ class Importer:
             mesh.polygons.foreach_set("vertices", surface.polygon_vertices())
             mesh.polygons.foreach_set("use_smooth", [True] * polygons_len)
             mesh.update(calc_edges=True)
-            mesh.validate()
+            # surfaces whose triangles were checked by the loader can skip the validation
+            if self.validate_meshes or not surface.validated():
+                mesh.validate()
 
             mesh.normals_split_custom_set_from_vertices(surface.normals())
 
@@ -217,13 +336,19 @@ class Importer:
             )
             vertex_color_layer.data.foreach_set("color", surface.colors())
 
+            # chunks have a material slot for each of their materials
+            surface_materials = surface.materials()
+            for material_name in surface_materials:
+                mesh.materials.append(bpy.data.materials.get(material_name))
+            if len(surface_materials) > 1:
+                mesh.polygons.foreach_set(
+                    "material_index", surface.polygon_material_indices()
+                )
+
             obj = bpy.data.objects.new(name, mesh)
             obj.parent = ibsp_geometry_null
 
-            active_material_name = surface.material()
-            obj.active_material = bpy.data.materials.get(active_material_name)
-
-            bpy.context.scene.collection.objects.link(obj)
+            self.collection.objects.link(obj)
 
     def material(
         self,
@@ -238,10 +363,8 @@ class Importer:
                 has_ext=has_ext,
                 append_asset_path=append_asset_path,
             )
-        elif version == XMODEL_VERSION.V62:
-            self._import_material_v62(loaded_material=loaded_material)
         else:
-            self._import_material_v20_v25(loaded_material=loaded_material)
+            self._import_material_v20_v25_v62(loaded_material=loaded_material)
 
     def _import_material_v14(
         self, loaded_material: LoadedMaterial, has_ext: bool, append_asset_path: str
@@ -258,331 +381,136 @@ class Importer:
 
         material_name = os.path.splitext(material_name)[0]
 
-        if bpy.data.materials.get(material_name):
+        material = bpy.data.materials.get(material_name)
+        if self._is_current(material, loaded_material.fingerprint()):
             return
 
         try:
             texture_image = bpy.data.images.load(texture_file, check_existing=True)
-            material = bpy.data.materials.new(material_name)
-            material.use_nodes = True
-            material.blend_method = "HASHED"
-
-            nodes = material.node_tree.nodes
-            links = material.node_tree.links
-
-            output_node = None
-            for node in nodes:
-                if node.type != "OUTPUT_MATERIAL":
-                    nodes.remove(node)
-                    continue
-
-                if node.type == "OUTPUT_MATERIAL" and output_node == None:
-                    output_node = node
+            if material != None:
+                texture_image.reload()
 
-            if output_node == None:
-                output_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_OUTPUTMATERIAL)
-
-            output_node.location = (300, 0)
-
-            mix_shader_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_MIXSHADER)
-            mix_shader_node.location = (100, 0)
-            links.new(
-                mix_shader_node.outputs[BLENDER_SHADERNODES.OUTPUT_MIXSHADER_SHADER],
-                output_node.inputs[BLENDER_SHADERNODES.INPUT_OUTPUTMATERIAL_SURFACE],
+            material = self._new_material(
+                material_name=material_name,
+                node_group=self._surface_v14_node_group(),
             )
 
-            transparent_bsdf_node = nodes.new(
-                BLENDER_SHADERNODES.SHADERNODE_BSDFTRANSPARENT
-            )
-            transparent_bsdf_node.location = (-200, 100)
-            links.new(
-                transparent_bsdf_node.outputs[
-                    BLENDER_SHADERNODES.OUTPUT_BSDFTRANSPARENT_BSDF
-                ],
-                mix_shader_node.inputs[BLENDER_SHADERNODES.INPUT_MIXSHADER_SHADER1],
-            )
-
-            principled_bsdf_node = nodes.new(
-                BLENDER_SHADERNODES.SHADERNODE_BSDFPRINCIPLED
-            )
-            principled_bsdf_node.location = (-200, 0)
-            principled_bsdf_node.width = 200
-            links.new(
-                principled_bsdf_node.outputs[
-                    BLENDER_SHADERNODES.OUTPUT_BSDFTRANSPARENT_BSDF
-                ],
-                mix_shader_node.inputs[BLENDER_SHADERNODES.INPUT_MIXSHADER_SHADER2],
-            )
+            nodes = material.node_tree.nodes
+            links = material.node_tree.links
+            group_node = nodes[MATERIAL_NODEGROUPS.SURFACE_V14]
 
             texture_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_TEXIMAGE)
             texture_node.label = str(TEXTURE_TYPE.Color)
-            texture_node.location = (-700, 0)
+            texture_node.location = (-400, 0)
             texture_node.image = texture_image
             links.new(
                 texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_COLOR],
-                principled_bsdf_node.inputs[
-                    BLENDER_SHADERNODES.INPUT_BSDFPRINCIPLED_BASECOLOR
-                ],
+                group_node.inputs[MATERIAL_NODEGROUPS.INPUT_COLOR],
+            )
+            links.new(
+                texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_ALPHA],
+                group_node.inputs[MATERIAL_NODEGROUPS.INPUT_ALPHA],
             )
 
-            invert_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_INVERT)
-            invert_node.location = (-400, 0)
-
-            invert_fac_default_value = 0.0
+            invert_default_value = 0.0
             transparent_textures = ["foliage_masked", "foliage_detail"]
             for tt in transparent_textures:
                 if tt in material_name.lower():
-                    invert_fac_default_value = 1.0
+                    invert_default_value = 1.0
                     break
 
-            invert_node.inputs[BLENDER_SHADERNODES.INPUT_INVERT_FAC].default_value = (
-                invert_fac_default_value
+            group_node.inputs[MATERIAL_NODEGROUPS.INPUT_INVERT].default_value = (
+                invert_default_value
             )
 
-            links.new(
-                invert_node.outputs[BLENDER_SHADERNODES.OUTPUT_INVERT_COLOR],
-                mix_shader_node.inputs[BLENDER_SHADERNODES.INPUT_MIXSHADER_FAC],
-            )
-            links.new(
-                texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_ALPHA],
-                invert_node.inputs[BLENDER_SHADERNODES.INPUT_INVERT_COLOR],
+            self._track(
+                material, loaded_material.source(), loaded_material.fingerprint()
             )
         except:
             return
 
-    def _import_material_v20_v25(self, loaded_material: LoadedMaterial) -> None:
+    def _import_material_v20_v25_v62(self, loaded_material: LoadedMaterial) -> None:
         material_name = loaded_material.name()
 
-        if bpy.data.materials.get(material_name):
+        material = bpy.data.materials.get(material_name)
+        if self._is_current(material, loaded_material.fingerprint()):
             return
 
-        material = bpy.data.materials.new(material_name)
-        material.use_nodes = True
-        material.blend_method = "HASHED"
-
-        nodes = material.node_tree.nodes
-        links = material.node_tree.links
-
-        output_node = None
-
-        for node in nodes:
-            if node.type != "OUTPUT_MATERIAL":
-                nodes.remove(node)
+        textures = []
+        for loaded_texture in loaded_material.textures():
+            texture_image = self._import_texture(loaded_texture=loaded_texture)
+            if texture_image == None:
                 continue
 
-            if node.type == "OUTPUT_MATERIAL" and output_node == None:
-                output_node = node
-
-        if output_node == None:
-            output_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_OUTPUTMATERIAL)
-
-        output_node.location = (300, 0)
-
-        mix_shader_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_MIXSHADER)
-        mix_shader_node.location = (100, 0)
-        links.new(
-            mix_shader_node.outputs[BLENDER_SHADERNODES.OUTPUT_MIXSHADER_SHADER],
-            output_node.inputs[BLENDER_SHADERNODES.INPUT_OUTPUTMATERIAL_SURFACE],
-        )
+            textures.append((loaded_texture.texture_type(), texture_image))
 
-        transparent_bsdf_node = nodes.new(
-            BLENDER_SHADERNODES.SHADERNODE_BSDFTRANSPARENT
-        )
-        transparent_bsdf_node.location = (-200, 100)
-        links.new(
-            transparent_bsdf_node.outputs[
-                BLENDER_SHADERNODES.OUTPUT_BSDFTRANSPARENT_BSDF
-            ],
-            mix_shader_node.inputs[BLENDER_SHADERNODES.INPUT_MIXSHADER_SHADER1],
+        has_normal = any(
+            texture_type == TEXTURE_TYPE.Normal for texture_type, _ in textures
         )
+        node_group = self._surface_node_group(normal=has_normal)
 
-        principled_bsdf_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_BSDFPRINCIPLED)
-        principled_bsdf_node.location = (-200, 0)
-        principled_bsdf_node.width = 200
-        links.new(
-            principled_bsdf_node.outputs[
-                BLENDER_SHADERNODES.OUTPUT_BSDFTRANSPARENT_BSDF
-            ],
-            mix_shader_node.inputs[BLENDER_SHADERNODES.INPUT_MIXSHADER_SHADER2],
+        material = self._new_material(
+            material_name=material_name, node_group=node_group
         )
+        self._track(material, loaded_material.source(), loaded_material.fingerprint())
 
-        loaded_textures = loaded_material.textures()
-        for i, loaded_texture in enumerate(loaded_textures):
-            texture_image = self._import_texture(loaded_texture=loaded_texture)
-            if texture_image == None:
-                continue
-
-            loaded_texture_type = loaded_texture.texture_type()
+        nodes = material.node_tree.nodes
+        links = material.node_tree.links
+        group_node = nodes[node_group.name]
 
+        for i, (texture_type, texture_image) in enumerate(textures):
             texture_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_TEXIMAGE)
-            texture_node.label = str(loaded_texture_type)
-            texture_node.location = (-900, 600 - (255 * i))
+            texture_node.label = str(texture_type)
+            texture_node.location = (-400, 300 - (280 * i))
             texture_node.image = texture_image
 
-            if loaded_texture_type == TEXTURE_TYPE.Color:
+            color_output = texture_node.outputs[
+                BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_COLOR
+            ]
+            alpha_output = texture_node.outputs[
+                BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_ALPHA
+            ]
+
+            if texture_type == TEXTURE_TYPE.Color:
                 links.new(
-                    texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_COLOR],
-                    principled_bsdf_node.inputs[
-                        BLENDER_SHADERNODES.INPUT_BSDFPRINCIPLED_BASECOLOR
-                    ],
+                    color_output, group_node.inputs[MATERIAL_NODEGROUPS.INPUT_COLOR]
                 )
                 links.new(
-                    texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_ALPHA],
-                    mix_shader_node.inputs[BLENDER_SHADERNODES.INPUT_MIXSHADER_FAC],
+                    alpha_output, group_node.inputs[MATERIAL_NODEGROUPS.INPUT_ALPHA]
                 )
-            elif loaded_texture_type == TEXTURE_TYPE.Specular:
+            elif texture_type == TEXTURE_TYPE.Specular:
                 links.new(
-                    texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_COLOR],
-                    principled_bsdf_node.inputs[
-                        BLENDER_SHADERNODES.INPUT_BSDFPRINCIPLED_SPECULAR
-                    ],
+                    color_output,
+                    group_node.inputs[MATERIAL_NODEGROUPS.INPUT_SPECULAR],
                 )
-                texture_node.image.colorspace_settings.name = (
+                texture_image.colorspace_settings.name = (
                     BLENDER_SHADERNODES.TEXIMAGE_COLORSPACE_SRGB
                 )
-            elif loaded_texture_type == TEXTURE_TYPE.Roughness:
+            elif texture_type == TEXTURE_TYPE.Roughness:
                 links.new(
-                    texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_COLOR],
-                    principled_bsdf_node.inputs[
-                        BLENDER_SHADERNODES.INPUT_BSDFPRINCIPLED_ROUGHNESS
-                    ],
-                )
-                texture_node.image.colorspace_settings.name = (
-                    BLENDER_SHADERNODES.TEXIMAGE_COLORSPACE_SRGB
+                    color_output,
+                    group_node.inputs[MATERIAL_NODEGROUPS.INPUT_ROUGHNESS],
                 )
-            elif loaded_texture_type == TEXTURE_TYPE.Normal:
-                texture_node.image.colorspace_settings.name = (
+                texture_image.colorspace_settings.name = (
                     BLENDER_SHADERNODES.TEXIMAGE_COLORSPACE_SRGB
                 )
-                texture_node.location = (-1900, -655)
-
-                normal_map_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_NORMALMAP)
-                normal_map_node.location = (-450, -650)
-                normal_map_node.space = BLENDER_SHADERNODES.NORMALMAP_SPACE_OBJECT
-                normal_map_node.inputs[
-                    BLENDER_SHADERNODES.INPUT_NORMALMAP_STRENGTH
-                ].default_value = 0.3
-                links.new(
-                    normal_map_node.outputs[
-                        BLENDER_SHADERNODES.OUTPUT_NORMALMAP_NORMAL
-                    ],
-                    principled_bsdf_node.inputs[
-                        BLENDER_SHADERNODES.INPUT_BSDFPRINCIPLED_NORMAL
-                    ],
-                )
-
-                combine_rgb_node = nodes.new(
-                    BLENDER_SHADERNODES.SHADERNODE_COMBINECOLOR
-                )
-                combine_rgb_node.location = (-650, -750)
-                links.new(
-                    combine_rgb_node.outputs[
-                        BLENDER_SHADERNODES.OUTPUT_COMBINECOLOR_COLOR
-                    ],
-                    normal_map_node.inputs[BLENDER_SHADERNODES.INPUT_NORMALMAP_COLOR],
-                )
-
-                math_sqrt_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_MATH)
-                math_sqrt_node.location = (-850, -850)
-                math_sqrt_node.operation = BLENDER_SHADERNODES.OPERATION_MATH_SQRT
-                links.new(
-                    math_sqrt_node.outputs[BLENDER_SHADERNODES.OUTPUT_MATH_VALUE],
-                    combine_rgb_node.inputs[BLENDER_SHADERNODES.INPUT_COMBINECOLOR_B],
-                )
-
-                math_subtract_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_MATH)
-                math_subtract_node.location = (-1050, -850)
-                math_subtract_node.operation = (
-                    BLENDER_SHADERNODES.OPERATION_MATH_SUBTRACT
-                )
-                links.new(
-                    math_subtract_node.outputs[BLENDER_SHADERNODES.OUTPUT_MATH_VALUE],
-                    math_sqrt_node.inputs[BLENDER_SHADERNODES.INPUT_MATH_SQRT_VALUE],
-                )
-
-                math_subtract_node2 = nodes.new(BLENDER_SHADERNODES.SHADERNODE_MATH)
-                math_subtract_node2.location = (-1250, -950)
-                math_subtract_node2.operation = (
-                    BLENDER_SHADERNODES.OPERATION_MATH_SUBTRACT
-                )
-                math_subtract_node2.inputs[
-                    BLENDER_SHADERNODES.INPUT_MATH_SUBTRACT_VALUE1
-                ].default_value = 1.0
-                links.new(
-                    math_subtract_node2.outputs[BLENDER_SHADERNODES.OUTPUT_MATH_VALUE],
-                    math_subtract_node.inputs[
-                        BLENDER_SHADERNODES.INPUT_MATH_SUBTRACT_VALUE1
-                    ],
-                )
-
-                math_power_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_MATH)
-                math_power_node.location = (-1250, -750)
-                math_power_node.operation = BLENDER_SHADERNODES.OPERATION_MATH_POWER
-                math_power_node.inputs[
-                    BLENDER_SHADERNODES.INPUT_MATH_POWER_EXPONENT
-                ].default_value = 2.0
-                links.new(
-                    math_power_node.outputs[BLENDER_SHADERNODES.OUTPUT_MATH_VALUE],
-                    math_subtract_node.inputs[
-                        BLENDER_SHADERNODES.INPUT_MATH_SUBTRACT_VALUE2
-                    ],
-                )
-
-                math_power_node2 = nodes.new(BLENDER_SHADERNODES.SHADERNODE_MATH)
-                math_power_node2.location = (-1500, -950)
-                math_power_node2.operation = BLENDER_SHADERNODES.OPERATION_MATH_POWER
-                math_power_node2.inputs[
-                    BLENDER_SHADERNODES.INPUT_MATH_POWER_EXPONENT
-                ].default_value = 2.0
-                links.new(
-                    math_power_node2.outputs[BLENDER_SHADERNODES.OUTPUT_MATH_VALUE],
-                    math_subtract_node2.inputs[
-                        BLENDER_SHADERNODES.INPUT_MATH_SUBTRACT_VALUE2
-                    ],
-                )
-                links.new(
-                    texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_ALPHA],
-                    math_power_node2.inputs[BLENDER_SHADERNODES.INPUT_MATH_POWER_BASE],
-                )
-
-                separate_rgb_node = nodes.new(
-                    BLENDER_SHADERNODES.SHADERNODE_SEPARATECOLOR
-                )
-                separate_rgb_node.location = (-1500, -450)
+            elif texture_type == TEXTURE_TYPE.Normal:
                 links.new(
-                    separate_rgb_node.outputs[
-                        BLENDER_SHADERNODES.OUTPUT_SEPARATECOLOR_G
-                    ],
-                    combine_rgb_node.inputs[BLENDER_SHADERNODES.INPUT_COMBINECOLOR_G],
+                    color_output,
+                    group_node.inputs[MATERIAL_NODEGROUPS.INPUT_NORMAL],
                 )
-                links.new(
-                    separate_rgb_node.outputs[
-                        BLENDER_SHADERNODES.OUTPUT_SEPARATECOLOR_G
-                    ],
-                    math_power_node.inputs[BLENDER_SHADERNODES.INPUT_MATH_POWER_BASE],
+                texture_image.colorspace_settings.name = (
+                    BLENDER_SHADERNODES.TEXIMAGE_COLORSPACE_NONCOLOR
                 )
-                links.new(
-                    texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_COLOR],
-                    separate_rgb_node.inputs[
-                        BLENDER_SHADERNODES.INPUT_SEPARATECOLOR_COLOR
-                    ],
-                )
-                links.new(
-                    texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_ALPHA],
-                    math_power_node2.inputs[BLENDER_SHADERNODES.INPUT_MATH_POWER_BASE],
-                )
-                links.new(
-                    texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_ALPHA],
-                    combine_rgb_node.inputs[BLENDER_SHADERNODES.INPUT_COMBINECOLOR_R],
-                )
-
-    def _import_material_v62(self, loaded_material: LoadedMaterial) -> None:
-        material_name = loaded_material.name()
 
-        if bpy.data.materials.get(material_name):
-            return
+    def _new_material(
+        self, material_name: str, node_group: bpy.types.ShaderNodeTree
+    ) -> bpy.types.Material:
+        # outdated materials are rebuilt in place, so their users stay assigned
+        material = bpy.data.materials.get(material_name)
+        if material == None:
+            material = bpy.data.materials.new(material_name)
 
-        material = bpy.data.materials.new(material_name)
         material.use_nodes = True
         material.blend_method = "HASHED"
 
@@ -604,11 +532,62 @@ class Importer:
 
         output_node.location = (300, 0)
 
+        group_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_GROUP)
+        group_node.name = node_group.name
+        group_node.node_tree = node_group
+        group_node.location = (0, 0)
+        group_node.width = 200
+        links.new(
+            group_node.outputs[MATERIAL_NODEGROUPS.OUTPUT_SHADER],
+            output_node.inputs[BLENDER_SHADERNODES.INPUT_OUTPUTMATERIAL_SURFACE],
+        )
+
+        return material
+
+    def _new_surface_node_group(
+        self, name: str
+    ) -> tuple[
+        bpy.types.ShaderNodeTree,
+        bpy.types.Node,
+        bpy.types.Node,
+        bpy.types.Node,
+    ]:
+        node_group = bpy.data.node_groups.new(
+            name, BLENDER_SHADERNODES.SHADERNODETREE
+        )
+
+        node_group.interface.new_socket(
+            name=MATERIAL_NODEGROUPS.OUTPUT_SHADER,
+            in_out=BLENDER_SHADERNODES.SOCKET_OUT,
+            socket_type=BLENDER_SHADERNODES.SOCKETTYPE_SHADER,
+        )
+        color_socket = node_group.interface.new_socket(
+            name=MATERIAL_NODEGROUPS.INPUT_COLOR,
+            in_out=BLENDER_SHADERNODES.SOCKET_IN,
+            socket_type=BLENDER_SHADERNODES.SOCKETTYPE_COLOR,
+        )
+        color_socket.default_value = (0.8, 0.8, 0.8, 1.0)
+        alpha_socket = node_group.interface.new_socket(
+            name=MATERIAL_NODEGROUPS.INPUT_ALPHA,
+            in_out=BLENDER_SHADERNODES.SOCKET_IN,
+            socket_type=BLENDER_SHADERNODES.SOCKETTYPE_FLOAT,
+        )
+        alpha_socket.default_value = 0.5
+
+        nodes = node_group.nodes
+        links = node_group.links
+
+        group_input_node = nodes.new(BLENDER_SHADERNODES.NODEGROUPINPUT)
+        group_input_node.location = (-700, 0)
+
+        group_output_node = nodes.new(BLENDER_SHADERNODES.NODEGROUPOUTPUT)
+        group_output_node.location = (300, 0)
+
         mix_shader_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_MIXSHADER)
         mix_shader_node.location = (100, 0)
         links.new(
             mix_shader_node.outputs[BLENDER_SHADERNODES.OUTPUT_MIXSHADER_SHADER],
-            output_node.inputs[BLENDER_SHADERNODES.INPUT_OUTPUTMATERIAL_SURFACE],
+            group_output_node.inputs[MATERIAL_NODEGROUPS.OUTPUT_SHADER],
         )
 
         transparent_bsdf_node = nodes.new(
@@ -627,215 +606,372 @@ class Importer:
         principled_bsdf_node.width = 200
         links.new(
             principled_bsdf_node.outputs[
-                BLENDER_SHADERNODES.OUTPUT_BSDFTRANSPARENT_BSDF
+                BLENDER_SHADERNODES.OUTPUT_BSDFPRINCIPLED_BSDF
             ],
             mix_shader_node.inputs[BLENDER_SHADERNODES.INPUT_MIXSHADER_SHADER2],
         )
+        links.new(
+            group_input_node.outputs[MATERIAL_NODEGROUPS.INPUT_COLOR],
+            principled_bsdf_node.inputs[
+                BLENDER_SHADERNODES.INPUT_BSDFPRINCIPLED_BASECOLOR
+            ],
+        )
 
-        loaded_textures = loaded_material.textures()
-        for i, loaded_texture in enumerate(loaded_textures):
-            texture_image = self._import_texture(loaded_texture=loaded_texture)
-            if texture_image == None:
-                continue
+        return node_group, group_input_node, principled_bsdf_node, mix_shader_node
 
-            loaded_texture_type = loaded_texture.texture_type()
+    def _surface_v14_node_group(self) -> bpy.types.ShaderNodeTree:
+        node_group = bpy.data.node_groups.get(MATERIAL_NODEGROUPS.SURFACE_V14)
+        if node_group != None:
+            return node_group
 
-            texture_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_TEXIMAGE)
-            texture_node.label = str(loaded_texture_type)
-            texture_node.location = (-900, 600 - (255 * i))
-            texture_node.image = texture_image
+        node_group, group_input_node, _, mix_shader_node = (
+            self._new_surface_node_group(MATERIAL_NODEGROUPS.SURFACE_V14)
+        )
+        node_group.interface.new_socket(
+            name=MATERIAL_NODEGROUPS.INPUT_INVERT,
+            in_out=BLENDER_SHADERNODES.SOCKET_IN,
+            socket_type=BLENDER_SHADERNODES.SOCKETTYPE_FLOAT,
+        )
 
-            if loaded_texture_type == TEXTURE_TYPE.Color:
-                links.new(
-                    texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_COLOR],
-                    principled_bsdf_node.inputs[
-                        BLENDER_SHADERNODES.INPUT_BSDFPRINCIPLED_BASECOLOR
-                    ],
-                )
-                links.new(
-                    texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_ALPHA],
-                    mix_shader_node.inputs[BLENDER_SHADERNODES.INPUT_MIXSHADER_FAC],
-                )
-            elif loaded_texture_type == TEXTURE_TYPE.Specular:
-                links.new(
-                    texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_COLOR],
-                    principled_bsdf_node.inputs[
-                        BLENDER_SHADERNODES.INPUT_BSDFPRINCIPLED_SPECULAR
-                    ],
-                )
-                texture_node.image.colorspace_settings.name = (
-                    BLENDER_SHADERNODES.TEXIMAGE_COLORSPACE_SRGB
-                )
-            elif loaded_texture_type == TEXTURE_TYPE.Roughness:
-                links.new(
-                    texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_COLOR],
-                    principled_bsdf_node.inputs[
-                        BLENDER_SHADERNODES.INPUT_BSDFPRINCIPLED_ROUGHNESS
-                    ],
-                )
-                texture_node.image.colorspace_settings.name = (
-                    BLENDER_SHADERNODES.TEXIMAGE_COLORSPACE_SRGB
-                )
-            elif loaded_texture_type == TEXTURE_TYPE.Normal:
-                texture_node.image.colorspace_settings.name = (
-                    BLENDER_SHADERNODES.TEXIMAGE_COLORSPACE_SRGB
-                )
-                texture_node.location = (-1900, -655)
-
-                normal_map_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_NORMALMAP)
-                normal_map_node.location = (-450, -650)
-                normal_map_node.space = BLENDER_SHADERNODES.NORMALMAP_SPACE_OBJECT
-                normal_map_node.inputs[
-                    BLENDER_SHADERNODES.INPUT_NORMALMAP_STRENGTH
-                ].default_value = 0.3
-                links.new(
-                    normal_map_node.outputs[
-                        BLENDER_SHADERNODES.OUTPUT_NORMALMAP_NORMAL
-                    ],
-                    principled_bsdf_node.inputs[
-                        BLENDER_SHADERNODES.INPUT_BSDFPRINCIPLED_NORMAL
-                    ],
-                )
+        nodes = node_group.nodes
+        links = node_group.links
 
-                combine_rgb_node = nodes.new(
-                    BLENDER_SHADERNODES.SHADERNODE_COMBINECOLOR
-                )
-                combine_rgb_node.location = (-650, -750)
-                links.new(
-                    combine_rgb_node.outputs[
-                        BLENDER_SHADERNODES.OUTPUT_COMBINECOLOR_COLOR
-                    ],
-                    normal_map_node.inputs[BLENDER_SHADERNODES.INPUT_NORMALMAP_COLOR],
-                )
+        invert_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_INVERT)
+        invert_node.location = (-400, 200)
+        links.new(
+            group_input_node.outputs[MATERIAL_NODEGROUPS.INPUT_INVERT],
+            invert_node.inputs[BLENDER_SHADERNODES.INPUT_INVERT_FAC],
+        )
+        links.new(
+            group_input_node.outputs[MATERIAL_NODEGROUPS.INPUT_ALPHA],
+            invert_node.inputs[BLENDER_SHADERNODES.INPUT_INVERT_COLOR],
+        )
+        links.new(
+            invert_node.outputs[BLENDER_SHADERNODES.OUTPUT_INVERT_COLOR],
+            mix_shader_node.inputs[BLENDER_SHADERNODES.INPUT_MIXSHADER_FAC],
+        )
 
-                math_sqrt_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_MATH)
-                math_sqrt_node.location = (-850, -850)
-                math_sqrt_node.operation = BLENDER_SHADERNODES.OPERATION_MATH_SQRT
-                links.new(
-                    math_sqrt_node.outputs[BLENDER_SHADERNODES.OUTPUT_MATH_VALUE],
-                    combine_rgb_node.inputs[BLENDER_SHADERNODES.INPUT_COMBINECOLOR_B],
-                )
+        return node_group
 
-                math_subtract_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_MATH)
-                math_subtract_node.location = (-1050, -850)
-                math_subtract_node.operation = (
-                    BLENDER_SHADERNODES.OPERATION_MATH_SUBTRACT
-                )
-                links.new(
-                    math_subtract_node.outputs[BLENDER_SHADERNODES.OUTPUT_MATH_VALUE],
-                    math_sqrt_node.inputs[BLENDER_SHADERNODES.INPUT_MATH_SQRT_VALUE],
-                )
+    def _surface_node_group(self, normal: bool) -> bpy.types.ShaderNodeTree:
+        node_group_name = (
+            MATERIAL_NODEGROUPS.SURFACE_NORMAL if normal else MATERIAL_NODEGROUPS.SURFACE
+        )
+        node_group = bpy.data.node_groups.get(node_group_name)
+        if node_group != None:
+            return node_group
 
-                math_subtract_node2 = nodes.new(BLENDER_SHADERNODES.SHADERNODE_MATH)
-                math_subtract_node2.location = (-1250, -950)
-                math_subtract_node2.operation = (
-                    BLENDER_SHADERNODES.OPERATION_MATH_SUBTRACT
-                )
-                math_subtract_node2.inputs[
-                    BLENDER_SHADERNODES.INPUT_MATH_SUBTRACT_VALUE1
-                ].default_value = 1.0
-                links.new(
-                    math_subtract_node2.outputs[BLENDER_SHADERNODES.OUTPUT_MATH_VALUE],
-                    math_subtract_node.inputs[
-                        BLENDER_SHADERNODES.INPUT_MATH_SUBTRACT_VALUE1
-                    ],
-                )
+        node_group, group_input_node, principled_bsdf_node, mix_shader_node = (
+            self._new_surface_node_group(node_group_name)
+        )
+        for socket_name in [
+            MATERIAL_NODEGROUPS.INPUT_SPECULAR,
+            MATERIAL_NODEGROUPS.INPUT_ROUGHNESS,
+        ]:
+            socket = node_group.interface.new_socket(
+                name=socket_name,
+                in_out=BLENDER_SHADERNODES.SOCKET_IN,
+                socket_type=BLENDER_SHADERNODES.SOCKETTYPE_FLOAT,
+            )
+            socket.default_value = 0.5
 
-                math_power_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_MATH)
-                math_power_node.location = (-1250, -750)
-                math_power_node.operation = BLENDER_SHADERNODES.OPERATION_MATH_POWER
-                math_power_node.inputs[
-                    BLENDER_SHADERNODES.INPUT_MATH_POWER_EXPONENT
-                ].default_value = 2.0
-                links.new(
-                    math_power_node.outputs[BLENDER_SHADERNODES.OUTPUT_MATH_VALUE],
-                    math_subtract_node.inputs[
-                        BLENDER_SHADERNODES.INPUT_MATH_SUBTRACT_VALUE2
-                    ],
-                )
+        nodes = node_group.nodes
+        links = node_group.links
 
-                math_power_node2 = nodes.new(BLENDER_SHADERNODES.SHADERNODE_MATH)
-                math_power_node2.location = (-1500, -950)
-                math_power_node2.operation = BLENDER_SHADERNODES.OPERATION_MATH_POWER
-                math_power_node2.inputs[
-                    BLENDER_SHADERNODES.INPUT_MATH_POWER_EXPONENT
-                ].default_value = 2.0
-                links.new(
-                    math_power_node2.outputs[BLENDER_SHADERNODES.OUTPUT_MATH_VALUE],
-                    math_subtract_node2.inputs[
-                        BLENDER_SHADERNODES.INPUT_MATH_SUBTRACT_VALUE2
-                    ],
-                )
-                links.new(
-                    texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_ALPHA],
-                    math_power_node2.inputs[BLENDER_SHADERNODES.INPUT_MATH_POWER_BASE],
-                )
+        links.new(
+            group_input_node.outputs[MATERIAL_NODEGROUPS.INPUT_ALPHA],
+            mix_shader_node.inputs[BLENDER_SHADERNODES.INPUT_MIXSHADER_FAC],
+        )
+        links.new(
+            group_input_node.outputs[MATERIAL_NODEGROUPS.INPUT_SPECULAR],
+            principled_bsdf_node.inputs[
+                BLENDER_SHADERNODES.INPUT_BSDFPRINCIPLED_SPECULAR
+            ],
+        )
+        links.new(
+            group_input_node.outputs[MATERIAL_NODEGROUPS.INPUT_ROUGHNESS],
+            principled_bsdf_node.inputs[
+                BLENDER_SHADERNODES.INPUT_BSDFPRINCIPLED_ROUGHNESS
+            ],
+        )
 
-                separate_rgb_node = nodes.new(
-                    BLENDER_SHADERNODES.SHADERNODE_SEPARATECOLOR
-                )
-                separate_rgb_node.location = (-1500, -450)
-                links.new(
-                    separate_rgb_node.outputs[
-                        BLENDER_SHADERNODES.OUTPUT_SEPARATECOLOR_G
-                    ],
-                    combine_rgb_node.inputs[BLENDER_SHADERNODES.INPUT_COMBINECOLOR_G],
-                )
-                links.new(
-                    separate_rgb_node.outputs[
-                        BLENDER_SHADERNODES.OUTPUT_SEPARATECOLOR_G
-                    ],
-                    math_power_node.inputs[BLENDER_SHADERNODES.INPUT_MATH_POWER_BASE],
-                )
-                links.new(
-                    texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_COLOR],
-                    separate_rgb_node.inputs[
-                        BLENDER_SHADERNODES.INPUT_SEPARATECOLOR_COLOR
-                    ],
-                )
-                links.new(
-                    texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_ALPHA],
-                    math_power_node2.inputs[BLENDER_SHADERNODES.INPUT_MATH_POWER_BASE],
-                )
-                links.new(
-                    texture_node.outputs[BLENDER_SHADERNODES.OUTPUT_TEXIMAGE_ALPHA],
-                    combine_rgb_node.inputs[BLENDER_SHADERNODES.INPUT_COMBINECOLOR_R],
-                )
+        if not normal:
+            return node_group
+
+        normal_socket = node_group.interface.new_socket(
+            name=MATERIAL_NODEGROUPS.INPUT_NORMAL,
+            in_out=BLENDER_SHADERNODES.SOCKET_IN,
+            socket_type=BLENDER_SHADERNODES.SOCKETTYPE_COLOR,
+        )
+        normal_socket.default_value = (0.5, 0.5, 1.0, 1.0)
+
+        # the normal maps are baked into tangent space by the loader
+        normal_map_node = nodes.new(BLENDER_SHADERNODES.SHADERNODE_NORMALMAP)
+        normal_map_node.location = (-450, -650)
+        normal_map_node.space = BLENDER_SHADERNODES.NORMALMAP_SPACE_TANGENT
+        links.new(
+            group_input_node.outputs[MATERIAL_NODEGROUPS.INPUT_NORMAL],
+            normal_map_node.inputs[BLENDER_SHADERNODES.INPUT_NORMALMAP_COLOR],
+        )
+        links.new(
+            normal_map_node.outputs[BLENDER_SHADERNODES.OUTPUT_NORMALMAP_NORMAL],
+            principled_bsdf_node.inputs[
+                BLENDER_SHADERNODES.INPUT_BSDFPRINCIPLED_NORMAL
+            ],
+        )
+
+        return node_group
 
     def _import_texture(
         self, loaded_texture: LoadedTexture
     ) -> bpy.types.Texture | None:
+        texture_source = loaded_texture.source()
+        texture_fingerprint = loaded_texture.fingerprint()
+
+        if loaded_texture.reused():
+            for datablock in self.tracked.get(texture_source, []):
+                if isinstance(datablock, bpy.types.Image):
+                    return datablock
+
+            return None
+
         texture_name = loaded_texture.name()
         texture_image = bpy.data.images.get(texture_name)
-        if texture_image != None:
+        if self._is_current(texture_image, texture_fingerprint):
             return texture_image
 
-        texture_image = bpy.data.images.new(
-            name=texture_name,
-            width=loaded_texture.width(),
-            height=loaded_texture.height(),
-            alpha=True,
-        )
+        # textures with the same content as an imported one use its image
+        content_hash = loaded_texture.content_hash()
+        shared_image = self.content_images.get(content_hash)
+        if shared_image != None:
+            if shared_image == texture_image:
+                self._track(texture_image, texture_source, texture_fingerprint)
+            return shared_image
+
+        # outdated images are updated in place, so the materials using them stay intact
+        texture_file_path = loaded_texture.file_path()
+        if texture_file_path != None:
+            if texture_image == None:
+                texture_image = bpy.data.images.load(
+                    texture_file_path, check_existing=True
+                )
+                texture_image.name = texture_name
+            else:
+                texture_image.source = "FILE"
+                texture_image.filepath = texture_file_path
+                texture_image.reload()
+
+            texture_image.alpha_mode = "CHANNEL_PACKED"
+            self._track(texture_image, texture_source, texture_fingerprint)
+            self._share_image(texture_image, content_hash)
+
+            return texture_image
+
+        width = loaded_texture.width()
+        height = loaded_texture.height()
+        if texture_image == None:
+            texture_image = bpy.data.images.new(
+                name=texture_name,
+                width=width,
+                height=height,
+                alpha=True,
+            )
+        elif tuple(texture_image.size) != (width, height):
+            texture_image.scale(width, height)
+
         texture_image.pixels = loaded_texture.data()
         texture_image.file_format = "TARGA"
         texture_image.alpha_mode = "CHANNEL_PACKED"
+        self._track(texture_image, texture_source, texture_fingerprint)
+        self._share_image(texture_image, content_hash)
 
         return texture_image
 
+    def _share_image(self, image: bpy.types.Image, content_hash: str) -> None:
+        # an image updated in place no longer holds its previous content
+        previous_hash = image.get(CONTENT_HASH_PROPERTY)
+        if self.content_images.get(previous_hash) == image:
+            del self.content_images[previous_hash]
+
+        if content_hash == "":
+            return
+
+        image[CONTENT_HASH_PROPERTY] = content_hash
+        self.content_images[content_hash] = image
+
+    def _track(
+        self,
+        datablock: bpy.types.ID,
+        source: str,
+        fingerprint: str,
+        surface: int | None = None,
+    ) -> None:
+        if source == "":
+            return
 
-def import_ibsp(asset_path: str, file_path: str) -> None:
-    importer = Importer(asset_path=asset_path)
+        datablock[SOURCE_PROPERTY] = source
+        datablock[FINGERPRINT_PROPERTY] = fingerprint
+        if surface != None:
+            datablock[SURFACE_PROPERTY] = surface
+
+    def _is_current(self, datablock: bpy.types.ID | None, fingerprint: str) -> bool:
+        if datablock == None:
+            return False
+
+        # assets without a source file are reused by name
+        if fingerprint == "":
+            return True
+
+        return datablock.get(FINGERPRINT_PROPERTY) == fingerprint
+
+    def _tracked_meshes(self, source: str) -> list[bpy.types.Mesh]:
+        meshes = {}
+        for datablock in self.tracked.get(source, []):
+            if isinstance(datablock, bpy.types.Mesh):
+                meshes.setdefault(datablock[SURFACE_PROPERTY], datablock)
+
+        return [meshes[surface] for surface in sorted(meshes)]
+
+    def _remove_tracked_objects(self, source: str) -> None:
+        datablocks = self.tracked.get(source, [])
+        objects = [d for d in datablocks if isinstance(d, bpy.types.Object)]
+        self.tracked[source] = [d for d in datablocks if d not in objects]
+
+        for obj in objects:
+            for child in obj.children_recursive:
+                bpy.data.objects.remove(child, do_unlink=True)
+            bpy.data.objects.remove(obj, do_unlink=True)
+
+
+@contextmanager
+def scene_assembly(name: str, bulk: bool):
+    # a bulk import links its objects into a collection outside of the scene, so the
+    # view layer is not synced for every object, and the collection is linked once
+    # at the end
+    scene_collection = bpy.context.scene.collection
+    if not bulk:
+        yield scene_collection
+        return
+
+    collection = bpy.data.collections.get(name)
+    if collection == None or collection.get(COLLECTION_PROPERTY) == None:
+        collection = bpy.data.collections.new(name)
+        collection[COLLECTION_PROPERTY] = True
+    if scene_collection.children.get(collection.name) != None:
+        scene_collection.children.unlink(collection)
+
+    try:
+        yield collection
+    finally:
+        if scene_collection.children.get(collection.name) == None:
+            scene_collection.children.link(collection)
+
+
+def tracked_datablocks() -> dict[str, list[bpy.types.ID]]:
+    tracked = {}
+    for datablocks in [
+        bpy.data.images,
+        bpy.data.materials,
+        bpy.data.meshes,
+        bpy.data.objects,
+    ]:
+        for datablock in datablocks:
+            source = datablock.get(SOURCE_PROPERTY)
+            if source != None:
+                tracked.setdefault(source, []).append(datablock)
+
+    return tracked
+
+
+def content_images() -> dict[str, bpy.types.Image]:
+    images = {}
+    for image in bpy.data.images:
+        content_hash = image.get(CONTENT_HASH_PROPERTY)
+        if content_hash != None:
+            images.setdefault(content_hash, image)
+
+    return images
+
+
+def remove_unused_meshes() -> None:
+    # meshes of the previous import that were neither reused nor are still in use
+    for mesh in [m for m in bpy.data.meshes if m.get(SOURCE_PROPERTY) != None]:
+        if mesh.users == 0:
+            bpy.data.meshes.remove(mesh)
+
+
+def import_ibsp(
+    asset_path: str,
+    file_path: str,
+    lod: int = 0,
+    lod_reference: tuple[float, float, float] | None = None,
+    dds_path: str | None = None,
+    merge_surfaces: bool = False,
+    validate_meshes: bool = True,
+    model_cache_path: str | None = None,
+    model_cache_size: int = 1024,
+    chunk_size: float | None = None,
+    weld_tolerance: float | None = None,
+    bulk_assembly: bool = False,
+) -> None:
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    with scene_assembly(name=name, bulk=bulk_assembly) as collection:
+        importer = Importer(
+            asset_path=asset_path, validate_meshes=validate_meshes, collection=collection
+        )
+        loader = Loader(importer=importer)
+        try:
+            loader.import_bsp(
+                asset_path=asset_path,
+                file_path=file_path,
+                lod=lod,
+                lod_reference=lod_reference,
+                dds_path=dds_path,
+                fingerprints=importer.fingerprints(),
+                merge_surfaces=merge_surfaces,
+                model_cache_path=model_cache_path,
+                model_cache_size=model_cache_size,
+                chunk_size=chunk_size,
+                weld_tolerance=weld_tolerance,
+            )
+        except:
+            traceback.print_exc()
+
+    remove_unused_meshes()
+
+
+def import_xanim(asset_path: str, file_path: str, skeleton: bpy.types.Object) -> None:
+    importer = Importer(asset_path=asset_path, skeleton=skeleton)
     loader = Loader(importer=importer)
+
+    rest_poses = {}
+    for bone in skeleton.data.bones:
+        matrix = bone.matrix_local
+        if bone.parent != None:
+            matrix = bone.parent.matrix_local.inverted() @ matrix
+
+        position, rotation, _ = matrix.decompose()
+        rest_poses[bone.name] = (tuple(position), tuple(rotation))
+
     try:
-        loader.import_bsp(asset_path=asset_path, file_path=file_path)
+        loader.import_xanim(file_path=file_path, rest_poses=rest_poses)
     except:
         traceback.print_exc()
 
 
 def import_xmodel(
-    asset_path: str, file_path: str, selected_version: GAME_VERSION
+    asset_path: str,
+    file_path: str,
+    selected_version: GAME_VERSION,
+    lod: int = 0,
+    dds_path: str | None = None,
+    merge_surfaces: bool = False,
+    validate_meshes: bool = True,
+    model_cache_path: str | None = None,
+    model_cache_size: int = 1024,
+    weld_tolerance: float | None = None,
 ) -> bpy.types.Object | bool:
-    importer = Importer(asset_path=asset_path)
+    importer = Importer(asset_path=asset_path, validate_meshes=validate_meshes)
     loader = Loader(importer=importer)
     try:
         loader.import_xmodel(
@@ -845,6 +981,126 @@ def import_xmodel(
             angles=(0.0, 0.0, 0.0),
             origin=(0.0, 0.0, 0.0),
             scale=(1.0, 1.0, 1.0),
+            lod=lod,
+            dds_path=dds_path,
+            fingerprints=importer.fingerprints(),
+            merge_surfaces=merge_surfaces,
+            model_cache_path=model_cache_path,
+            model_cache_size=model_cache_size,
+            weld_tolerance=weld_tolerance,
         )
     except:
         traceback.print_exc()
+
+
+def import_xmodels(
+    asset_path: str,
+    file_paths: list[str],
+    selected_version: GAME_VERSION,
+    lod: int = 0,
+    dds_path: str | None = None,
+    merge_surfaces: bool = False,
+    validate_meshes: bool = True,
+    model_cache_path: str | None = None,
+    model_cache_size: int = 1024,
+    weld_tolerance: float | None = None,
+    bulk_assembly: bool = False,
+) -> None:
+    with scene_assembly(name="xmodels", bulk=bulk_assembly) as collection:
+        importer = Importer(
+            asset_path=asset_path, validate_meshes=validate_meshes, collection=collection
+        )
+        loader = Loader(importer=importer)
+        try:
+            loader.import_xmodels(
+                asset_path=asset_path,
+                file_paths=file_paths,
+                selected_version=selected_version,
+                lod=lod,
+                dds_path=dds_path,
+                fingerprints=importer.fingerprints(),
+                merge_surfaces=merge_surfaces,
+                model_cache_path=model_cache_path,
+                model_cache_size=model_cache_size,
+                weld_tolerance=weld_tolerance,
+            )
+        except:
+            traceback.print_exc()
+
+
+def plan_ibsp(
+    asset_path: str,
+    file_path: str,
+    lod: int = 0,
+    lod_reference: tuple[float, float, float] | None = None,
+) -> ImportPlan | None:
+    loader = Loader(importer=None)
+    try:
+        return loader.plan_bsp(
+            asset_path=asset_path,
+            file_path=file_path,
+            lod=lod,
+            lod_reference=lod_reference,
+        )
+    except:
+        traceback.print_exc()
+        return None
+
+
+def plan_xmodels(
+    asset_path: str,
+    file_paths: list[str],
+    selected_version: GAME_VERSION,
+    lod: int = 0,
+) -> list[ImportPlan]:
+    loader = Loader(importer=None)
+    plans = []
+    for file_path in file_paths:
+        try:
+            plans.append(
+                loader.plan_xmodel(
+                    asset_path=asset_path,
+                    file_path=file_path,
+                    selected_version=selected_version,
+                    lod=lod,
+                )
+            )
+        except:
+            traceback.print_exc()
+
+    return plans
+
+
+def print_plan(plan: ImportPlan) -> None:
+    print(f"[PLAN] {plan.name()}")
+    for model in plan.models():
+        print(
+            f"  model {model.name()} lod {model.lod()}: {model.instances()} instances,"
+            f" {model.surfaces()} surfaces, {model.vertices()} vertices, {model.triangles()} triangles"
+        )
+    for texture in plan.textures():
+        print(
+            f"  texture {texture.name()}: {texture.width()}x{texture.height()},"
+            f" {texture.decoded_bytes() / 1024 / 1024:.1f} MiB decoded"
+        )
+    for missing_file in plan.missing_files():
+        print(f"  missing {missing_file}")
+
+
+def plan_summary(plans: list[ImportPlan]) -> str:
+    models = sum(len(p.models()) for p in plans)
+    instances = sum(p.instances() for p in plans)
+    vertices = sum(p.vertices() for p in plans)
+    triangles = sum(p.triangles() for p in plans)
+    materials = len({m for p in plans for m in p.materials()})
+    textures = len({t.name() for p in plans for t in p.textures()})
+    texture_bytes = sum(
+        {t.name(): t.decoded_bytes() for p in plans for t in p.textures()}.values()
+    )
+    missing_files = len({f for p in plans for f in p.missing_files()})
+
+    return (
+        f"{models} models ({instances} instances), {vertices} vertices, {triangles} triangles,"
+        f" {materials} materials, {textures} textures ({texture_bytes / 1024 / 1024:.1f} MiB decoded),"
+        f" {missing_files} missing files"
+    )
@@ -1,5 +1,6 @@
 from typing import Set
 import bpy
+import fnmatch
 import os
 from . import importer
 from .cod_asset_importer import (
@@ -7,15 +8,109 @@ from .cod_asset_importer import (
 )
 
 
+# model files are stored without an extension
+MODEL_FILTER_GLOB = "*"
+
+
 class MapImporter(bpy.types.Operator):
     bl_idname = "cod_asset_importer.map_importer"
     bl_label = "Import"
-    bl_options = {"UNDO"}
     bl_description = "Import a map file"
 
     filepath: bpy.props.StringProperty(subtype="FILE_PATH")
     filename_ext = ".d3dbsp"
     filter_glob: bpy.props.StringProperty(default="*.d3dbsp;*.bsp", options={"HIDDEN"})
+    lod_mode: bpy.props.EnumProperty(
+        name="LOD",
+        description="Level of detail used for the map entities",
+        items=[
+            ("fixed", "Fixed", "Use the same LOD for every entity"),
+            ("distance", "Distance", "Pick the LOD by distance to the reference point"),
+        ],
+    )
+    lod: bpy.props.IntProperty(
+        name="LOD index",
+        description="LOD index used for every entity, clamped to the available LODs",
+        default=0,
+        min=0,
+        max=3,
+    )
+    lod_reference: bpy.props.FloatVectorProperty(
+        name="Reference point",
+        description="Entities are compared against this point with their LOD distances",
+        size=3,
+        default=(0.0, 0.0, 0.0),
+    )
+    use_dds: bpy.props.BoolProperty(
+        name="Compressed textures",
+        description="Load DXT textures as DDS files instead of decoding them",
+        default=False,
+    )
+    dds_path: bpy.props.StringProperty(
+        name="DDS folder",
+        description="Folder of the DDS files, the add-on data folder is used when empty",
+        subtype="DIR_PATH",
+        default="",
+    )
+    merge_surfaces: bpy.props.BoolProperty(
+        name="Merge surfaces",
+        description="Import every model as a single mesh with a material slot for each surface",
+        default=False,
+    )
+    validate_meshes: bpy.props.BoolProperty(
+        name="Validate meshes",
+        description="Validate every mesh, when disabled only meshes that failed the checks of the loader are validated",
+        default=True,
+    )
+    use_model_cache: bpy.props.BoolProperty(
+        name="Cache models",
+        description="Keep the converted geometry of models on disk, so later imports do not parse unchanged models again",
+        default=False,
+    )
+    model_cache_path: bpy.props.StringProperty(
+        name="Cache folder",
+        description="Folder of the model cache, the add-on data folder is used when empty",
+        subtype="DIR_PATH",
+        default="",
+    )
+    model_cache_size: bpy.props.IntProperty(
+        name="Cache size (MiB)",
+        description="Least recently used models are removed from the cache above this size",
+        default=1024,
+        min=1,
+    )
+    use_chunks: bpy.props.BoolProperty(
+        name="Chunk geometry",
+        description="Split the map geometry into a grid of chunks with one object each, instead of an object for each surface",
+        default=False,
+    )
+    chunk_size: bpy.props.FloatProperty(
+        name="Chunk size",
+        description="Edge length of the grid cells, in map units",
+        default=1024.0,
+        min=1.0,
+    )
+    weld_vertices: bpy.props.BoolProperty(
+        name="Weld vertices",
+        description="Merge the duplicate vertices of every mesh that share their position, normal, color and weights",
+        default=False,
+    )
+    weld_tolerance: bpy.props.FloatProperty(
+        name="Weld distance",
+        description="Positions are snapped to a grid of this size and vertices in the same grid cell are welded, only exactly matching positions are welded at zero",
+        default=0.0,
+        min=0.0,
+    )
+    bulk_assembly: bpy.props.BoolProperty(
+        name="Bulk assembly",
+        description="Collect the imported objects in a new collection that is added to the scene at the end, without an undo step for the import",
+        default=False,
+    )
+    dry_run: bpy.props.BoolProperty(
+        name="Dry run",
+        description="Only report what the import would load, read from the file headers, without importing anything",
+        default=False,
+    )
 
     def execute(self, context: bpy.types.Context) -> Set[int] | Set[str]:
         assetpath = os.path.abspath(
@@ -26,7 +121,37 @@ class MapImporter(bpy.types.Operator):
                 os.path.join(os.path.dirname(self.filepath), os.pardir, os.pardir)
             )
 
-        importer.import_ibsp(asset_path=assetpath, file_path=self.filepath)
+        lod_reference = None
+        if self.lod_mode == "distance":
+            lod_reference = tuple(self.lod_reference)
+
+        if self.dry_run:
+            plan = importer.plan_ibsp(
+                asset_path=assetpath,
+                file_path=self.filepath,
+                lod=self.lod,
+                lod_reference=lod_reference,
+            )
+            report_plans(self, [plan] if plan != None else [])
+            return {"FINISHED"}
+
+        importer.import_ibsp(
+            asset_path=assetpath,
+            file_path=self.filepath,
+            lod=self.lod,
+            lod_reference=lod_reference,
+            dds_path=dds_path(use_dds=self.use_dds, path=self.dds_path),
+            merge_surfaces=self.merge_surfaces,
+            validate_meshes=self.validate_meshes,
+            model_cache_path=model_cache_path(
+                use_model_cache=self.use_model_cache, path=self.model_cache_path
+            ),
+            model_cache_size=self.model_cache_size,
+            chunk_size=self.chunk_size if self.use_chunks else None,
+            weld_tolerance=self.weld_tolerance if self.weld_vertices else None,
+            bulk_assembly=self.bulk_assembly,
+        )
+        push_undo(bulk_assembly=self.bulk_assembly)
         return {"FINISHED"}
 
     def invoke(self, context, event):
@@ -37,10 +162,13 @@ class MapImporter(bpy.types.Operator):
 class ModelImporter(bpy.types.Operator):
     bl_idname = "cod_asset_importer.model_importer"
     bl_label = "Import"
-    bl_options = {"UNDO"}
-    bl_description = "Import a model file"
+    bl_description = "Import model files, or every model of a folder"
 
-    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+    directory: bpy.props.StringProperty(subtype="DIR_PATH")
+    files: bpy.props.CollectionProperty(
+        type=bpy.types.OperatorFileListElement, options={"HIDDEN", "SKIP_SAVE"}
+    )
+    filter_glob: bpy.props.StringProperty(default=MODEL_FILTER_GLOB, options={"HIDDEN"})
     version: bpy.props.EnumProperty(
         name="Version",
         description="Version of the model",
@@ -53,6 +181,73 @@ class ModelImporter(bpy.types.Operator):
         ],
     )
 
+    lod: bpy.props.IntProperty(
+        name="LOD index",
+        description="LOD index of the model, clamped to the available LODs",
+        default=0,
+        min=0,
+        max=3,
+    )
+    use_dds: bpy.props.BoolProperty(
+        name="Compressed textures",
+        description="Load DXT textures as DDS files instead of decoding them",
+        default=False,
+    )
+    dds_path: bpy.props.StringProperty(
+        name="DDS folder",
+        description="Folder of the DDS files, the add-on data folder is used when empty",
+        subtype="DIR_PATH",
+        default="",
+    )
+    merge_surfaces: bpy.props.BoolProperty(
+        name="Merge surfaces",
+        description="Import every model as a single mesh with a material slot for each surface",
+        default=False,
+    )
+    validate_meshes: bpy.props.BoolProperty(
+        name="Validate meshes",
+        description="Validate every mesh, when disabled only meshes that failed the checks of the loader are validated",
+        default=True,
+    )
+    use_model_cache: bpy.props.BoolProperty(
+        name="Cache models",
+        description="Keep the converted geometry of models on disk, so later imports do not parse unchanged models again",
+        default=False,
+    )
+    model_cache_path: bpy.props.StringProperty(
+        name="Cache folder",
+        description="Folder of the model cache, the add-on data folder is used when empty",
+        subtype="DIR_PATH",
+        default="",
+    )
+    model_cache_size: bpy.props.IntProperty(
+        name="Cache size (MiB)",
+        description="Least recently used models are removed from the cache above this size",
+        default=1024,
+        min=1,
+    )
+    weld_vertices: bpy.props.BoolProperty(
+        name="Weld vertices",
+        description="Merge the duplicate vertices of every mesh that share their position, normal, color and weights",
+        default=False,
+    )
+    weld_tolerance: bpy.props.FloatProperty(
+        name="Weld distance",
+        description="Positions are snapped to a grid of this size and vertices in the same grid cell are welded, only exactly matching positions are welded at zero",
+        default=0.0,
+        min=0.0,
+    )
+    bulk_assembly: bpy.props.BoolProperty(
+        name="Bulk assembly",
+        description="Collect the imported objects in a new collection that is added to the scene at the end, without an undo step for the import",
+        default=False,
+    )
+    dry_run: bpy.props.BoolProperty(
+        name="Dry run",
+        description="Only report what the import would load, read from the file headers, without importing anything",
+        default=False,
+    )
+
     version_options = {
         "cod": GAME_VERSION.CoD,
         "cod2": GAME_VERSION.CoD2,
@@ -61,15 +256,69 @@ class ModelImporter(bpy.types.Operator):
         "codbo1": GAME_VERSION.CoDBO1,
     }
 
+    def execute(self, context: bpy.types.Context) -> Set[int] | Set[str]:
+        directory = os.path.abspath(self.directory)
+        assetpath = os.path.abspath(os.path.join(directory, os.pardir))
+
+        # no selected files means the whole folder is imported
+        file_paths = [os.path.join(directory, f.name) for f in self.files if f.name]
+        if len(file_paths) == 0:
+            file_paths = model_file_paths(directory=directory, filter_glob=self.filter_glob)
+
+        if self.dry_run:
+            plans = importer.plan_xmodels(
+                asset_path=assetpath,
+                file_paths=file_paths,
+                selected_version=self.version_options[self.version],
+                lod=self.lod,
+            )
+            report_plans(self, plans)
+            return {"FINISHED"}
+
+        importer.import_xmodels(
+            asset_path=assetpath,
+            file_paths=file_paths,
+            selected_version=self.version_options[self.version],
+            lod=self.lod,
+            dds_path=dds_path(use_dds=self.use_dds, path=self.dds_path),
+            merge_surfaces=self.merge_surfaces,
+            validate_meshes=self.validate_meshes,
+            model_cache_path=model_cache_path(
+                use_model_cache=self.use_model_cache, path=self.model_cache_path
+            ),
+            model_cache_size=self.model_cache_size,
+            weld_tolerance=self.weld_tolerance if self.weld_vertices else None,
+            bulk_assembly=self.bulk_assembly,
+        )
+        push_undo(bulk_assembly=self.bulk_assembly)
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        bpy.context.window_manager.fileselect_add(self)
+        return {"RUNNING_MODAL"}
+
+
+class AnimationImporter(bpy.types.Operator):
+    bl_idname = "cod_asset_importer.animation_importer"
+    bl_label = "Import"
+    bl_options = {"UNDO"}
+    bl_description = "Import an animation file onto the active skeleton"
+
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+
+    @classmethod
+    def poll(cls, context: bpy.types.Context) -> bool:
+        return context.active_object != None and context.active_object.type == "ARMATURE"
+
     def execute(self, context: bpy.types.Context) -> Set[int] | Set[str]:
         assetpath = os.path.abspath(
             os.path.join(os.path.dirname(self.filepath), os.pardir)
         )
 
-        importer.import_xmodel(
+        importer.import_xanim(
             asset_path=assetpath,
             file_path=self.filepath,
-            selected_version=self.version_options[self.version],
+            skeleton=context.active_object,
         )
         return {"FINISHED"}
 
@@ -78,7 +327,68 @@ class ModelImporter(bpy.types.Operator):
         return {"RUNNING_MODAL"}
 
 
-OPERATORS = [MapImporter, ModelImporter]
+def report_plans(operator: bpy.types.Operator, plans: list) -> None:
+    # the full manifest goes to the console, the totals to the status bar
+    for plan in plans:
+        importer.print_plan(plan)
+
+    level = "INFO"
+    if any(len(p.missing_files()) > 0 for p in plans):
+        level = "WARNING"
+    operator.report({level}, importer.plan_summary(plans))
+
+
+def model_file_paths(directory: str, filter_glob: str) -> list[str]:
+    patterns = [p for p in filter_glob.split(";") if p != ""]
+
+    file_paths = []
+    for file_name in sorted(os.listdir(directory)):
+        # hidden files, folders and files with an extension are never models
+        file_path = os.path.join(directory, file_name)
+        if file_name.startswith(".") or os.path.splitext(file_name)[1] != "":
+            continue
+        if not os.path.isfile(file_path):
+            continue
+
+        if any(fnmatch.fnmatch(file_name, p) for p in patterns):
+            file_paths.append(file_path)
+
+    return file_paths
+
+
+def push_undo(bulk_assembly: bool) -> None:
+    # the importers are registered without undo, so a bulk import skips the snapshot
+    # of the whole blend file that undo takes after an operator. other imports push
+    # their undo step here
+    if not bulk_assembly:
+        bpy.ops.ed.undo_push(message="Import")
+
+
+def dds_path(use_dds: bool, path: str) -> str | None:
+    if not use_dds:
+        return None
+
+    if path != "":
+        return bpy.path.abspath(path)
+
+    return bpy.utils.user_resource(
+        "DATAFILES", path=os.path.join("cod_asset_importer", "dds"), create=True
+    )
+
+
+def model_cache_path(use_model_cache: bool, path: str) -> str | None:
+    if not use_model_cache:
+        return None
+
+    if path != "":
+        return bpy.path.abspath(path)
+
+    return bpy.utils.user_resource(
+        "DATAFILES", path=os.path.join("cod_asset_importer", "models"), create=True
+    )
+
+
+OPERATORS = [MapImporter, ModelImporter, AnimationImporter]
 
 
 def register():
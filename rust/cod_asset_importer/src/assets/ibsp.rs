@@ -1,13 +1,14 @@
 use crate::utils::{
-    binary,
+    binary::{self, BinBytes},
     error::Error,
     math::{color_from_vec, uv_from_vec, vec3_from_vec, Color, Vec3, UV},
     path::file_name_without_ext,
     Result,
 };
+use rayon::prelude::*;
 use std::{
-    collections::{hash_map::Entry::Vacant, HashMap},
-    fs::File,
+    collections::{hash_map::Entry::Vacant, BTreeMap, HashMap},
+    fs::{self, File},
     io::{Seek, SeekFrom},
     mem::size_of,
     path::PathBuf,
@@ -15,6 +16,9 @@ use std::{
 };
 use valid_enum::ValidEnum;
 
+const HEADER_SIZE: usize = 8;
+const LUMP_COUNT: usize = 39;
+
 #[derive(Debug)]
 pub struct Ibsp {
     pub name: String,
@@ -24,6 +28,18 @@ pub struct Ibsp {
     pub surfaces: Vec<IbspSurface>,
 }
 
+// counts of a map read from its lump headers, without the vertex and triangle lumps
+#[derive(Debug)]
+pub struct IbspSummary {
+    pub name: String,
+    pub version: i32,
+    pub materials: Vec<IbspMaterial>,
+    pub entities: Vec<IbspEntity>,
+    pub surface_count: usize,
+    pub vertex_count: usize,
+    pub triangle_count: usize,
+}
+
 #[derive(Debug)]
 pub struct IbspHeader {
     magic: [u8; 4],
@@ -102,28 +118,119 @@ enum IbspLumpIndexV4 {
 
 impl Ibsp {
     pub fn load(file_path: PathBuf) -> Result<Ibsp> {
-        let mut file = File::open(&file_path)?;
+        // the file is read at once, the lumps are independent byte ranges of it
+        // and are decoded concurrently
+        let data = fs::read(&file_path)?;
         let name = file_name_without_ext(file_path);
-        let header = Self::read_header(&mut file)?;
-        let lumps = Self::read_lumps(&mut file)?;
-        let materials = Self::read_materials(&mut file, header.version, &lumps)?;
-        let triangle_soups = Self::read_trianglesoups(&mut file, header.version, &lumps)?;
-        let vertices = Self::read_vertices(&mut file, header.version, &lumps)?;
-        let triangles = Self::read_triangles(&mut file, header.version, &lumps)?;
-        let entities = Self::read_entities(&mut file, header.version, &lumps)?;
-        let surfaces = Self::load_surfaces(triangle_soups, &materials, vertices, triangles);
+        let header = Self::read_header(&data)?;
+        let lumps = Self::read_lumps(&data)?;
+        let version = header.version;
+
+        let lump = |v59: IbspLumpIndexV59, v4: IbspLumpIndexV4| {
+            Self::lump_data(&data, lumps[Self::lump_index(version, v59, v4)])
+        };
+
+        let ((materials, triangle_soups), ((vertices, triangles), entities)) = rayon::join(
+            || {
+                rayon::join(
+                    || {
+                        Self::read_materials(lump(
+                            IbspLumpIndexV59::Materials,
+                            IbspLumpIndexV4::Materials,
+                        )?)
+                    },
+                    || {
+                        Self::read_trianglesoups(lump(
+                            IbspLumpIndexV59::TriangleSoups,
+                            IbspLumpIndexV4::TriangleSoups,
+                        )?)
+                    },
+                )
+            },
+            || {
+                rayon::join(
+                    || {
+                        rayon::join(
+                            || Self::read_vertices(&data, version, &lumps),
+                            || {
+                                Self::read_triangles(lump(
+                                    IbspLumpIndexV59::Triangles,
+                                    IbspLumpIndexV4::Triangles,
+                                )?)
+                            },
+                        )
+                    },
+                    || {
+                        Self::read_entities(lump(
+                            IbspLumpIndexV59::Entities,
+                            IbspLumpIndexV4::Entities,
+                        )?)
+                    },
+                )
+            },
+        );
+
+        let materials = materials?;
+        let surfaces = Self::load_surfaces(triangle_soups?, &materials, &vertices?, &triangles?);
 
         Ok(Ibsp {
             name,
-            version: header.version,
+            version,
             materials,
-            entities,
+            entities: entities?,
             surfaces,
         })
     }
 
-    fn read_header(file: &mut File) -> Result<IbspHeader> {
-        let magic = binary::read_vec::<u8>(file, 4)?;
+    // reads the header, the materials, the triangle soups and the entities only.
+    // the vertex count is the sum of the triangle soup ranges, shared vertices
+    // are counted for every soup they are used by
+    pub fn load_summary(file_path: PathBuf) -> Result<IbspSummary> {
+        let mut file = File::open(&file_path)?;
+        let name = file_name_without_ext(file_path);
+        let header_data = binary::read_vec::<u8>(&mut file, HEADER_SIZE + LUMP_COUNT * 8)?;
+        let header = Self::read_header(&header_data)?;
+        let lumps = Self::read_lumps(&header_data)?;
+        let version = header.version;
+
+        let mut lump = |v59: IbspLumpIndexV59, v4: IbspLumpIndexV4| -> Result<Vec<u8>> {
+            let lump = lumps[Self::lump_index(version, v59, v4)];
+            file.seek(SeekFrom::Start(lump.offset as u64))?;
+            binary::read_vec::<u8>(&mut file, lump.length as usize)
+        };
+
+        let materials = Self::read_materials(&lump(
+            IbspLumpIndexV59::Materials,
+            IbspLumpIndexV4::Materials,
+        )?)?;
+        let triangle_soups = Self::read_trianglesoups(&lump(
+            IbspLumpIndexV59::TriangleSoups,
+            IbspLumpIndexV4::TriangleSoups,
+        )?)?;
+        let entities = Self::read_entities(&lump(
+            IbspLumpIndexV59::Entities,
+            IbspLumpIndexV4::Entities,
+        )?)?;
+
+        Ok(IbspSummary {
+            name,
+            version,
+            materials,
+            entities,
+            surface_count: triangle_soups.len(),
+            vertex_count: triangle_soups
+                .iter()
+                .map(|ts| ts.vertices_length as usize)
+                .sum(),
+            triangle_count: triangle_soups
+                .iter()
+                .map(|ts| ts.triangles_length as usize / 3)
+                .sum(),
+        })
+    }
+
+    fn read_header(data: &[u8]) -> Result<IbspHeader> {
+        let magic = binary::read_vec_at::<u8>(data, 0, 4)?;
         if magic != [b'I', b'B', b'S', b'P'] {
             return Err(Error::new(format!(
                 "invalid magic: {}",
@@ -131,7 +238,7 @@ impl Ibsp {
             )));
         }
 
-        let version = binary::read::<i32>(file)?;
+        let version = binary::read_at::<i32>(data, 4)?;
         match IbspVersion::valid(version) {
             Some(_) => (),
             None => return Err(Error::new(format!("invalid IBSP version {}", version))),
@@ -143,174 +250,128 @@ impl Ibsp {
         })
     }
 
-    fn read_lumps(file: &mut File) -> Result<Vec<IbspLump>> {
-        let mut lumps: Vec<IbspLump> = Vec::new();
-        for _ in 0..39 {
-            let lump_data = binary::read_vec::<u32>(file, 2)?;
-            lumps.push(IbspLump {
+    fn read_lumps(data: &[u8]) -> Result<Vec<IbspLump>> {
+        let lumps = binary::read_vec_at::<u32>(data, HEADER_SIZE, LUMP_COUNT * 2)?
+            .chunks_exact(2)
+            .map(|lump_data| IbspLump {
                 length: lump_data[0],
                 offset: lump_data[1],
-            });
-        }
+            })
+            .collect();
 
         Ok(lumps)
     }
 
-    fn read_materials(
-        file: &mut File,
-        version: i32,
-        lumps: &[IbspLump],
-    ) -> Result<Vec<IbspMaterial>> {
-        let mut materials: Vec<IbspMaterial> = Vec::new();
+    fn lump_data(data: &[u8], lump: IbspLump) -> Result<&[u8]> {
+        binary::slice(data, lump.offset as usize, lump.length as usize)
+    }
 
-        let mut materials_lump_idx = IbspLumpIndexV59::Materials as usize;
+    fn lump_index(version: i32, v59: IbspLumpIndexV59, v4: IbspLumpIndexV4) -> usize {
         if version == IbspVersion::V4 as i32 {
-            materials_lump_idx = IbspLumpIndexV4::Materials as usize;
+            return v4 as usize;
         }
 
-        let materials_lump = lumps[materials_lump_idx];
+        v59 as usize
+    }
+
+    fn read_materials(materials_lump: &[u8]) -> Result<Vec<IbspMaterial>> {
         let material_size = size_of::<IbspMaterial>();
 
-        file.seek(SeekFrom::Start(materials_lump.offset as u64))?;
-        for _ in (0..materials_lump.length).step_by(material_size) {
-            let name = binary::read_vec::<u8>(file, 64)?;
-            let flag = binary::read::<u64>(file)?;
-            materials.push(IbspMaterial {
-                name: name.try_into().unwrap(),
-                flag,
+        materials_lump
+            .chunks_exact(material_size)
+            .map(|material| {
+                Ok(IbspMaterial {
+                    name: material[0..64].try_into().unwrap(),
+                    flag: binary::read_at::<u64>(material, 64)?,
+                })
             })
-        }
-
-        Ok(materials)
+            .collect()
     }
 
-    fn read_trianglesoups(
-        file: &mut File,
-        version: i32,
-        lumps: &[IbspLump],
-    ) -> Result<Vec<IbspTriangleSoup>> {
-        let mut trianglesoups: Vec<IbspTriangleSoup> = Vec::new();
-
-        let mut trianglesoups_lump_idx = IbspLumpIndexV59::TriangleSoups as usize;
-        if version == IbspVersion::V4 as i32 {
-            trianglesoups_lump_idx = IbspLumpIndexV4::TriangleSoups as usize;
-        }
-
-        let trianglesoups_lump = lumps[trianglesoups_lump_idx];
+    fn read_trianglesoups(trianglesoups_lump: &[u8]) -> Result<Vec<IbspTriangleSoup>> {
         let triannglesoup_size = size_of::<IbspTriangleSoup>();
 
-        file.seek(SeekFrom::Start(trianglesoups_lump.offset as u64))?;
-        for _ in (0..trianglesoups_lump.length).step_by(triannglesoup_size) {
-            let material_idx = binary::read::<u16>(file)?;
-            let draw_order = binary::read::<u16>(file)?;
-            let vertices_offset = binary::read::<u32>(file)?;
-            let vertices_length = binary::read::<u16>(file)?;
-            let triangles_length = binary::read::<u16>(file)?;
-            let triangles_offset = binary::read::<u32>(file)?;
-
-            trianglesoups.push(IbspTriangleSoup {
-                material_idx,
-                draw_order,
-                vertices_offset,
-                vertices_length,
-                triangles_length,
-                triangles_offset,
+        trianglesoups_lump
+            .chunks_exact(triannglesoup_size)
+            .map(|trianglesoup| {
+                Ok(IbspTriangleSoup {
+                    material_idx: binary::read_at::<u16>(trianglesoup, 0)?,
+                    draw_order: binary::read_at::<u16>(trianglesoup, 2)?,
+                    vertices_offset: binary::read_at::<u32>(trianglesoup, 4)?,
+                    vertices_length: binary::read_at::<u16>(trianglesoup, 8)?,
+                    triangles_length: binary::read_at::<u16>(trianglesoup, 10)?,
+                    triangles_offset: binary::read_at::<u32>(trianglesoup, 12)?,
+                })
             })
-        }
-
-        Ok(trianglesoups)
+            .collect()
     }
 
-    fn read_vertices(file: &mut File, version: i32, lumps: &[IbspLump]) -> Result<Vec<IbspVertex>> {
+    fn read_vertices(data: &[u8], version: i32, lumps: &[IbspLump]) -> Result<Vec<IbspVertex>> {
         if version == IbspVersion::V59 as i32 {
             let vertices_lump_idx = IbspLumpIndexV59::Vertices as usize;
-            let vertices_lump = lumps[vertices_lump_idx];
-            let vertices = Self::read_vertices_v59(file, vertices_lump)?;
-            return Ok(vertices);
+            let vertices_lump = Self::lump_data(data, lumps[vertices_lump_idx])?;
+            return Self::read_vertices_v59(vertices_lump);
         }
 
         let vertices_lump_idx = IbspLumpIndexV4::Vertices as usize;
-        let vertices_lump = lumps[vertices_lump_idx];
-        let vertices = Self::read_vertices_v4(file, vertices_lump)?;
-        Ok(vertices)
+        let vertices_lump = Self::lump_data(data, lumps[vertices_lump_idx])?;
+        Self::read_vertices_v4(vertices_lump)
     }
 
-    fn read_vertices_v59(file: &mut File, vertices_lump: IbspLump) -> Result<Vec<IbspVertex>> {
-        let mut vertices: Vec<IbspVertex> = Vec::new();
+    fn read_vertices_v59(vertices_lump: &[u8]) -> Result<Vec<IbspVertex>> {
         let vertex_size: usize = 44;
 
-        file.seek(SeekFrom::Start(vertices_lump.offset as u64))?;
-        for _ in (0..vertices_lump.length).step_by(vertex_size) {
-            let p = binary::read_vec::<f32>(file, 3)?;
-            let uv = binary::read_vec::<f32>(file, 2)?;
-
-            binary::skip(file, 8)?;
-
-            let n = binary::read_vec::<f32>(file, 3)?;
-            let color = binary::read_vec::<u8>(file, 4)?;
-
-            vertices.push(IbspVertex {
-                position: vec3_from_vec(p).unwrap(),
-                normal: vec3_from_vec(n).unwrap(),
-                color: color_from_vec(color).unwrap(),
-                uv: uv_from_vec(uv, true).unwrap(),
+        vertices_lump
+            .par_chunks_exact(vertex_size)
+            .map(|vertex| {
+                let p = binary::read_vec_at::<f32>(vertex, 0, 3)?;
+                let uv = binary::read_vec_at::<f32>(vertex, 12, 2)?;
+                let n = binary::read_vec_at::<f32>(vertex, 28, 3)?;
+                let color = binary::read_vec_at::<u8>(vertex, 40, 4)?;
+
+                Ok(IbspVertex {
+                    position: vec3_from_vec(p).unwrap(),
+                    normal: vec3_from_vec(n).unwrap(),
+                    color: color_from_vec(color).unwrap(),
+                    uv: uv_from_vec(uv, true).unwrap(),
+                })
             })
-        }
-
-        Ok(vertices)
+            .collect()
     }
 
-    fn read_vertices_v4(file: &mut File, vertices_lump: IbspLump) -> Result<Vec<IbspVertex>> {
-        let mut vertices: Vec<IbspVertex> = Vec::new();
+    fn read_vertices_v4(vertices_lump: &[u8]) -> Result<Vec<IbspVertex>> {
         let vertex_size: usize = 68;
 
-        file.seek(SeekFrom::Start(vertices_lump.offset as u64))?;
-        for _ in (0..vertices_lump.length).step_by(vertex_size) {
-            let p = binary::read_vec::<f32>(file, 3)?;
-            let n = binary::read_vec::<f32>(file, 3)?;
-            let color = binary::read_vec::<u8>(file, 4)?;
-            let uv = binary::read_vec::<f32>(file, 2)?;
-
-            binary::skip(file, 32)?;
-
-            vertices.push(IbspVertex {
-                position: vec3_from_vec(p).unwrap(),
-                normal: vec3_from_vec(n).unwrap(),
-                color: color_from_vec(color).unwrap(),
-                uv: uv_from_vec(uv, false).unwrap(),
+        vertices_lump
+            .par_chunks_exact(vertex_size)
+            .map(|vertex| {
+                let p = binary::read_vec_at::<f32>(vertex, 0, 3)?;
+                let n = binary::read_vec_at::<f32>(vertex, 12, 3)?;
+                let color = binary::read_vec_at::<u8>(vertex, 24, 4)?;
+                let uv = binary::read_vec_at::<f32>(vertex, 28, 2)?;
+
+                Ok(IbspVertex {
+                    position: vec3_from_vec(p).unwrap(),
+                    normal: vec3_from_vec(n).unwrap(),
+                    color: color_from_vec(color).unwrap(),
+                    uv: uv_from_vec(uv, false).unwrap(),
+                })
             })
-        }
-
-        Ok(vertices)
+            .collect()
     }
 
-    fn read_triangles(file: &mut File, version: i32, lumps: &[IbspLump]) -> Result<Vec<u16>> {
-        let mut triangles_lump_idx = IbspLumpIndexV59::Triangles as usize;
-        if version == IbspVersion::V4 as i32 {
-            triangles_lump_idx = IbspLumpIndexV4::Triangles as usize;
-        }
-
-        let triangles_lump = lumps[triangles_lump_idx];
-
-        file.seek(SeekFrom::Start(triangles_lump.offset as u64))?;
-        let triangles_amount = triangles_lump.length as usize / size_of::<u16>();
-        let triangles = binary::read_vec::<u16>(file, triangles_amount)?;
+    fn read_triangles(triangles_lump: &[u8]) -> Result<Vec<u16>> {
+        let triangles = triangles_lump
+            .par_chunks_exact(size_of::<u16>())
+            .map(u16::from_bytes)
+            .collect();
 
         Ok(triangles)
     }
 
-    fn read_entities(file: &mut File, version: i32, lumps: &[IbspLump]) -> Result<Vec<IbspEntity>> {
+    fn read_entities(entities_lump: &[u8]) -> Result<Vec<IbspEntity>> {
         let mut entities: Vec<IbspEntity> = Vec::new();
-
-        let mut entities_lump_idx = IbspLumpIndexV59::Entities as usize;
-        if version == IbspVersion::V4 as i32 {
-            entities_lump_idx = IbspLumpIndexV4::Entities as usize;
-        }
-
-        let entities_lump = lumps[entities_lump_idx];
-
-        file.seek(SeekFrom::Start(entities_lump.offset as u64))?;
-        let entities_data = binary::read_vec::<u8>(file, entities_lump.length as usize)?;
+        let entities_data = entities_lump.to_vec();
 
         let mut entities_string = String::from_utf8(entities_data)?;
         entities_string = entities_string.trim_matches(char::from(0)).to_string();
@@ -411,47 +472,102 @@ impl Ibsp {
         None
     }
 
+    // every triangle soup only references its own range of the vertices,
+    // so the surfaces are gathered independently
     fn load_surfaces(
         triangle_soups: Vec<IbspTriangleSoup>,
         materials: &[IbspMaterial],
-        vertices: Vec<IbspVertex>,
-        triangles: Vec<u16>,
+        vertices: &[IbspVertex],
+        triangles: &[u16],
     ) -> Vec<IbspSurface> {
-        let mut surfaces: Vec<IbspSurface> = Vec::new();
-
-        for ts in triangle_soups.iter() {
-            let surface_material = materials[ts.material_idx as usize].get_name();
-            let mut surface_vertices: Vec<IbspVertex> = Vec::new();
-            let mut surface_triangles: Vec<u32> = Vec::new();
-            let mut index_mapping: HashMap<u32, u32> = HashMap::new();
-
-            let start = ts.triangles_offset as usize;
-            let end = ts.triangles_offset as usize + ts.triangles_length as usize;
-            for i in (start..end).step_by(3) {
-                let mut t = [0u32; 3];
-                for j in 0..3 {
-                    let v_idx = triangles[i + j] as u32 + ts.vertices_offset;
-                    let vertex = vertices[v_idx as usize];
-                    let t_idx = surface_vertices.len() as u32;
-
-                    if let Vacant(entry) = index_mapping.entry(v_idx) {
-                        entry.insert(t_idx);
-                        surface_vertices.push(vertex);
+        triangle_soups
+            .par_iter()
+            .map(|ts| {
+                let surface_material = materials[ts.material_idx as usize].get_name();
+                let mut surface_vertices: Vec<IbspVertex> =
+                    Vec::with_capacity(ts.vertices_length as usize);
+                let mut surface_triangles: Vec<u32> =
+                    Vec::with_capacity(ts.triangles_length as usize);
+                let mut index_mapping: HashMap<u32, u32> = HashMap::new();
+
+                let start = ts.triangles_offset as usize;
+                let end = ts.triangles_offset as usize + ts.triangles_length as usize;
+                for i in (start..end).step_by(3) {
+                    let mut t = [0u32; 3];
+                    for j in 0..3 {
+                        let v_idx = triangles[i + j] as u32 + ts.vertices_offset;
+                        let vertex = vertices[v_idx as usize];
+                        let t_idx = surface_vertices.len() as u32;
+
+                        if let Vacant(entry) = index_mapping.entry(v_idx) {
+                            entry.insert(t_idx);
+                            surface_vertices.push(vertex);
+                        }
+
+                        t[j] = *index_mapping.get(&v_idx).unwrap();
                     }
-
-                    t[j] = *index_mapping.get(&v_idx).unwrap();
+                    surface_triangles.extend_from_slice(&[t[0], t[2], t[1]]);
                 }
-                surface_triangles.extend_from_slice(&[t[0], t[2], t[1]]);
-            }
 
-            surfaces.push(IbspSurface {
-                material: surface_material,
-                vertices: surface_vertices,
-                triangles: surface_triangles,
+                IbspSurface {
+                    material: surface_material,
+                    vertices: surface_vertices,
+                    triangles: surface_triangles,
+                }
             })
+            .collect()
+    }
+}
+
+impl IbspSurface {
+    // buckets the triangles of the surfaces into a uniform grid of chunks by their
+    // centers, with a surface per material in each chunk. the chunks are returned
+    // in grid order with their surfaces in the order the materials are first used
+    pub fn chunk(surfaces: Vec<IbspSurface>, chunk_size: f32) -> Vec<Vec<IbspSurface>> {
+        let mut chunks: BTreeMap<[i32; 3], Vec<IbspSurface>> = BTreeMap::new();
+
+        for surface in surfaces {
+            // vertices of the surface that are already added to a chunk surface
+            let mut index_mapping: HashMap<([i32; 3], u32), u32> = HashMap::new();
+
+            for triangle in surface.triangles.chunks_exact(3) {
+                let mut center = [0f32; 3];
+                for &v_idx in triangle {
+                    let position = surface.vertices[v_idx as usize].position;
+                    for axis in 0..3 {
+                        center[axis] += position[axis] / 3.0;
+                    }
+                }
+                let cell = center.map(|c| (c / chunk_size).floor() as i32);
+
+                let chunk = chunks.entry(cell).or_default();
+                let chunk_surface_idx =
+                    match chunk.iter().position(|s| s.material == surface.material) {
+                        Some(chunk_surface_idx) => chunk_surface_idx,
+                        None => {
+                            chunk.push(IbspSurface {
+                                material: surface.material.clone(),
+                                vertices: Vec::new(),
+                                triangles: Vec::new(),
+                            });
+                            chunk.len() - 1
+                        }
+                    };
+                let chunk_surface = &mut chunk[chunk_surface_idx];
+
+                for &v_idx in triangle {
+                    let t_idx = *index_mapping.entry((cell, v_idx)).or_insert_with(|| {
+                        chunk_surface
+                            .vertices
+                            .push(surface.vertices[v_idx as usize]);
+                        chunk_surface.vertices.len() as u32 - 1
+                    });
+                    chunk_surface.triangles.push(t_idx);
+                }
+            }
         }
 
-        surfaces
+        chunks.into_values().collect()
     }
 }
 
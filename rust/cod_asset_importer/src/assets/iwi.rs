@@ -1,9 +1,17 @@
 use crate::utils::{
-    binary, decode::decode_dxt1, decode::decode_dxt3, decode::decode_dxt5, error::Error, Result,
+    binary,
+    dds::{self, DxtFormat},
+    decode::bake_normal_map,
+    decode::decode_dxt1,
+    decode::decode_dxt3,
+    decode::decode_dxt5,
+    error::Error,
+    hash::StableHasher,
+    Result,
 };
 use std::{
     fs::File,
-    io::{Seek, SeekFrom},
+    io::{Cursor, Read, Seek, SeekFrom},
     path::PathBuf,
     str,
 };
@@ -17,6 +25,17 @@ pub struct IWi {
     pub data: Vec<f32>,
 }
 
+pub struct IWiRaw {
+    info: IWiInfo,
+    data: Vec<u8>,
+}
+
+pub struct IWiDds {
+    pub width: u16,
+    pub height: u16,
+    pub data: Vec<u8>,
+}
+
 struct IWiHeader {
     magic: [u8; 3],
     version: IWiVersion,
@@ -59,8 +78,67 @@ pub enum IWiFormat {
     DXT5 = 0x0D,
 }
 
+impl IWiRaw {
+    // covers everything the decoded texture is made of, so textures stored under
+    // different names with the same content hash the same. the hash is stored on the
+    // images of a blend file, so it is built with the stable hasher
+    pub fn content_hash(&self) -> u64 {
+        let mut hasher = StableHasher::new();
+        hasher.write(&[self.info.format]);
+        hasher.write(&self.info.width.to_le_bytes());
+        hasher.write(&self.info.height.to_le_bytes());
+        hasher.write(&self.data);
+        hasher.finish()
+    }
+
+    pub fn decode(self) -> Result<IWi> {
+        let data = IWi::decode_data(self.data, self.info)?;
+
+        Ok(IWi {
+            width: self.info.width,
+            height: self.info.height,
+            data,
+        })
+    }
+
+    pub fn decode_normal_map(self) -> Result<IWi> {
+        let mut iwi = self.decode()?;
+        iwi.data = bake_normal_map(iwi.data);
+
+        Ok(iwi)
+    }
+
+    pub fn encode_dds(self) -> Result<IWiDds> {
+        let format = match IWiFormat::valid(self.info.format) {
+            Some(IWiFormat::DXT1) => DxtFormat::DXT1,
+            Some(IWiFormat::DXT3) => DxtFormat::DXT3,
+            Some(IWiFormat::DXT5) => DxtFormat::DXT5,
+            _ => {
+                return Err(Error::new(format!(
+                    "unsupported dds format {}",
+                    self.info.format
+                )))
+            }
+        };
+
+        Ok(IWiDds {
+            width: self.info.width,
+            height: self.info.height,
+            data: dds::encode(format, self.info.width, self.info.height, &self.data),
+        })
+    }
+}
+
 impl IWi {
-    pub fn load(file_path: PathBuf) -> Result<IWi> {
+    // the highest mipmap as stored in the file, decoded later. the file is already
+    // read into memory
+    pub fn load_raw(data: Vec<u8>) -> Result<IWiRaw> {
+        let (info, data) = Self::read_highest_mipmap(data)?;
+        Ok(IWiRaw { info, data })
+    }
+
+    // width and height from the header, the texture data is not read
+    pub fn load_size(file_path: PathBuf) -> Result<(u16, u16)> {
         let mut file = File::open(file_path)?;
         let header = Self::read_header(&mut file)?;
 
@@ -68,6 +146,18 @@ impl IWi {
             file.seek(SeekFrom::Start(0x08))?;
         }
 
+        let info = Self::read_info(&mut file)?;
+        Ok((info.width, info.height))
+    }
+
+    fn read_highest_mipmap(data: Vec<u8>) -> Result<(IWiInfo, Vec<u8>)> {
+        let mut file = Cursor::new(data);
+        let header = Self::read_header(&mut file)?;
+
+        if header.version == IWiVersion::V8 {
+            file.seek(SeekFrom::Start(0x08))?;
+        }
+
         let info = Self::read_info(&mut file)?;
 
         let mut offset_amount = 4;
@@ -93,16 +183,10 @@ impl IWi {
             return Err(Error::new(String::from("texture data length is 0")));
         }
 
-        let data = Self::decode_data(raw_texture_data, info)?;
-
-        Ok(IWi {
-            width: info.width,
-            height: info.height,
-            data,
-        })
+        Ok((info, raw_texture_data))
     }
 
-    fn read_header(file: &mut File) -> Result<IWiHeader> {
+    fn read_header(file: &mut impl Read) -> Result<IWiHeader> {
         let magic = binary::read_vec::<u8>(file, 3)?;
         if magic != [b'I', b'W', b'i'] {
             return Err(Error::new(format!(
@@ -123,7 +207,7 @@ impl IWi {
         })
     }
 
-    fn read_info(file: &mut File) -> Result<IWiInfo> {
+    fn read_info(file: &mut impl Read) -> Result<IWiInfo> {
         let format = binary::read::<u8>(file)?;
         let usage = binary::read::<u8>(file)?;
         let width = binary::read::<u16>(file)?;
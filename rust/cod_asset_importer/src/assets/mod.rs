@@ -4,6 +4,7 @@ use valid_enum::ValidEnum;
 pub mod ibsp;
 pub mod iwi;
 pub mod material;
+pub mod xanim;
 pub mod xmodel;
 pub mod xmodelpart;
 pub mod xmodelsurf;
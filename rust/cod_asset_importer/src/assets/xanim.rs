@@ -0,0 +1,163 @@
+use crate::utils::{
+    binary,
+    error::Error,
+    math::{Quat, Vec3},
+    path::file_name_without_ext,
+    Result,
+};
+use std::{fs::File, path::PathBuf};
+use valid_enum::ValidEnum;
+
+pub const ASSETPATH: &str = "xanim";
+const ROTATION_DIVISOR: f32 = 32768.0;
+const FLAG_LOOPING: u8 = 0x01;
+const FLAG_DELTA: u8 = 0x02;
+
+pub struct XAnim {
+    pub name: String,
+    pub version: u16,
+    pub frame_count: u16,
+    pub framerate: u16,
+    pub looping: bool,
+    pub bones: Vec<XAnimBone>,
+}
+
+pub struct XAnimBone {
+    pub name: String,
+    pub rotation_frames: Vec<u16>,
+    pub rotations: Vec<Quat>,
+    pub position_frames: Vec<u16>,
+    pub positions: Vec<Vec3>,
+}
+
+#[derive(ValidEnum)]
+#[valid_enum(u16)]
+pub enum XAnimVersion {
+    V14 = 0x0E, // CoD1 & CoDUO
+    V20 = 0x14, // CoD2
+}
+
+impl XAnim {
+    pub fn load(file_path: PathBuf) -> Result<XAnim> {
+        let mut file = File::open(&file_path)?;
+        let name = file_name_without_ext(file_path);
+        let version = binary::read::<u16>(&mut file)?;
+
+        if XAnimVersion::valid(version).is_none() {
+            return Err(Error::new(format!("invalid xanim version {}", version)));
+        }
+
+        let frame_count = binary::read::<u16>(&mut file)?;
+        let bone_count = binary::read::<u16>(&mut file)?;
+        let flags = binary::read::<u8>(&mut file)?;
+        let framerate = binary::read::<u16>(&mut file)?;
+
+        if flags & FLAG_DELTA != 0 {
+            return Err(Error::new(String::from("delta xanims are not supported")));
+        }
+
+        let mut xanim = XAnim {
+            name,
+            version,
+            frame_count,
+            framerate,
+            looping: flags & FLAG_LOOPING != 0,
+            bones: Vec::with_capacity(bone_count as usize),
+        };
+
+        if bone_count == 0 {
+            return Ok(xanim);
+        }
+
+        let bit_array_size = ((bone_count - 1) / 8 + 1) as usize;
+        let flip_quats = binary::read_vec::<u8>(&mut file, bit_array_size)?;
+        let simple_quats = binary::read_vec::<u8>(&mut file, bit_array_size)?;
+
+        let mut bone_names: Vec<String> = Vec::with_capacity(bone_count as usize);
+        for _ in 0..bone_count {
+            bone_names.push(binary::read_string(&mut file)?);
+        }
+
+        for (i, bone_name) in bone_names.into_iter().enumerate() {
+            let flip_quat = flip_quats[i / 8] & (1 << (i % 8)) != 0;
+            let simple_quat = simple_quats[i / 8] & (1 << (i % 8)) != 0;
+
+            let rotation_count = binary::read::<u16>(&mut file)?;
+            let rotation_frames = xanim.read_frames(&mut file, rotation_count)?;
+            let rotations =
+                Self::read_rotations(&mut file, rotation_count, flip_quat, simple_quat)?;
+
+            let position_count = binary::read::<u16>(&mut file)?;
+            let position_frames = xanim.read_frames(&mut file, position_count)?;
+            let positions = binary::read_vec::<f32>(&mut file, position_count as usize * 3)?
+                .chunks_exact(3)
+                .map(|p| [p[0], p[1], p[2]])
+                .collect();
+
+            xanim.bones.push(XAnimBone {
+                name: bone_name,
+                rotation_frames,
+                rotations,
+                position_frames,
+                positions,
+            });
+        }
+
+        Ok(xanim)
+    }
+
+    // keys on every frame and single keys have no frame indices stored,
+    // the indices are bytes when all frames fit into a byte
+    fn read_frames(&self, file: &mut File, key_count: u16) -> Result<Vec<u16>> {
+        if key_count == 1 {
+            return Ok(vec![0]);
+        }
+
+        if key_count == self.frame_count {
+            return Ok((0..key_count).collect());
+        }
+
+        if self.frame_count > 0xFF {
+            return binary::read_vec::<u16>(file, key_count as usize);
+        }
+
+        let frames = binary::read_vec::<u8>(file, key_count as usize)?;
+        Ok(frames.into_iter().map(|f| f as u16).collect())
+    }
+
+    // rotations only store the vector part of the quaternion, simple quaternions
+    // are rotations around the z axis and only store the z component
+    fn read_rotations(
+        file: &mut File,
+        key_count: u16,
+        flip_quat: bool,
+        simple_quat: bool,
+    ) -> Result<Vec<Quat>> {
+        let components = if simple_quat { 1 } else { 3 };
+        let values = binary::read_vec::<i16>(file, key_count as usize * components)?;
+
+        let rotations = values
+            .chunks_exact(components)
+            .map(|r| {
+                let (qx, qy, qz) = if simple_quat {
+                    (0.0, 0.0, r[0] as f32 / ROTATION_DIVISOR)
+                } else {
+                    (
+                        r[0] as f32 / ROTATION_DIVISOR,
+                        r[1] as f32 / ROTATION_DIVISOR,
+                        r[2] as f32 / ROTATION_DIVISOR,
+                    )
+                };
+
+                let mut qw = f32::sqrt((1.0 - (qx * qx) - (qy * qy) - (qz * qz)).max(0.0));
+                if flip_quat {
+                    qw = -qw;
+                }
+
+                [qw, qx, qy, qz]
+            })
+            .collect();
+
+        Ok(rotations)
+    }
+}
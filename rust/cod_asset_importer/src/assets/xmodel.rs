@@ -80,9 +80,28 @@ impl XModel {
         }
 
         (load_function)(&mut xmodel, &mut file)?;
+
+        if xmodel.lods.is_empty() {
+            return Err(Error::new(format!("xmodel {} has no lods", xmodel.name)));
+        }
+
         Ok(xmodel)
     }
 
+    // clamps the requested lod index to the lods that are present in the file
+    pub fn lod_index(&self, lod: usize) -> usize {
+        lod.min(self.lods.len() - 1)
+    }
+
+    // lod distances are the maximum distance a given lod is used at,
+    // anything beyond the last lod distance falls back to the last lod
+    pub fn lod_index_for_distance(&self, distance: f32) -> usize {
+        self.lods
+            .iter()
+            .position(|lod| distance <= lod.distance)
+            .unwrap_or(self.lods.len() - 1)
+    }
+
     fn load_v14(&mut self, file: &mut File) -> Result<()> {
         binary::skip(file, 24)?;
 
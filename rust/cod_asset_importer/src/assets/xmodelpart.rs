@@ -6,7 +6,7 @@ use crate::utils::{
     path::file_name_without_ext,
     Result,
 };
-use std::{fs::File, path::PathBuf};
+use std::{io::Cursor, path::PathBuf};
 
 pub const ASSETPATH: &str = "xmodelparts";
 const ROTATION_DIVISOR: f32 = 32768.0;
@@ -157,8 +157,9 @@ impl XModelPart {
         }
     }
 
-    pub fn load(file_path: PathBuf) -> Result<XModelPart> {
-        let mut file = File::open(&file_path)?;
+    // parses a file that is already read into memory, the name is taken from its path
+    pub fn load(file_path: PathBuf, data: Vec<u8>) -> Result<XModelPart> {
+        let mut file = Cursor::new(data);
         let name = file_name_without_ext(file_path);
         let version = binary::read::<u16>(&mut file)?;
         let model_type = match name.chars().last() {
@@ -196,7 +197,7 @@ impl XModelPart {
         }
     }
 
-    fn load_v14(&mut self, file: &mut File) -> Result<()> {
+    fn load_v14(&mut self, file: &mut Cursor<Vec<u8>>) -> Result<()> {
         let bone_header = binary::read_vec::<u16>(file, 2)?;
         let bone_count = bone_header[0];
         let root_bone_count = bone_header[1];
@@ -263,7 +264,7 @@ impl XModelPart {
 
         Ok(())
     }
-    fn load_v20(&mut self, file: &mut File) -> Result<()> {
+    fn load_v20(&mut self, file: &mut Cursor<Vec<u8>>) -> Result<()> {
         let bone_header = binary::read_vec::<u16>(file, 2)?;
         let bone_count = bone_header[0];
         let root_bone_count = bone_header[1];
@@ -328,7 +329,7 @@ impl XModelPart {
 
         Ok(())
     }
-    fn load_v25(&mut self, file: &mut File) -> Result<()> {
+    fn load_v25(&mut self, file: &mut Cursor<Vec<u8>>) -> Result<()> {
         let bone_header = binary::read_vec::<u16>(file, 2)?;
         let bone_count = bone_header[0];
         let root_bone_count = bone_header[1];
@@ -386,7 +387,7 @@ impl XModelPart {
 
         Ok(())
     }
-    fn load_v62(&mut self, file: &mut File) -> Result<()> {
+    fn load_v62(&mut self, file: &mut Cursor<Vec<u8>>) -> Result<()> {
         let bone_header = binary::read_vec::<u16>(file, 2)?;
         let bone_count = bone_header[0];
         let root_bone_count = bone_header[1];
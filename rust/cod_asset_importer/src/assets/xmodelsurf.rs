@@ -7,7 +7,7 @@ use crate::utils::{
     path::file_name_without_ext,
     Result,
 };
-use std::{fs::File, path::PathBuf};
+use std::{fs, io::Cursor, path::PathBuf};
 
 pub const ASSETPATH: &str = "xmodelsurfs";
 const RIGGED: i32 = 65535;
@@ -38,8 +38,9 @@ pub struct XModelSurfSurface {
 }
 
 impl XModelSurf {
-    pub fn load(file_path: PathBuf, xmodel_part: Option<XModelPart>) -> Result<XModelSurf> {
-        let mut file = File::open(&file_path)?;
+    // parses a file that is already read into memory, the name is taken from its path
+    pub fn load(file_path: PathBuf, data: Vec<u8>) -> Result<XModelSurf> {
+        let mut file = Cursor::new(data);
         let name = file_name_without_ext(file_path);
         let version = binary::read::<u16>(&mut file)?;
         let mut xmodel_surf = XModelSurf {
@@ -50,11 +51,11 @@ impl XModelSurf {
 
         match XModelVersion::valid(version) {
             Some(XModelVersion::V14) => {
-                xmodel_surf.load_v14(&mut file, xmodel_part)?;
+                xmodel_surf.load_v14(&mut file)?;
                 Ok(xmodel_surf)
             }
             Some(XModelVersion::V20) => {
-                xmodel_surf.load_v20(&mut file, xmodel_part)?;
+                xmodel_surf.load_v20(&mut file)?;
                 Ok(xmodel_surf)
             }
             Some(XModelVersion::V25) => {
@@ -72,7 +73,182 @@ impl XModelSurf {
         }
     }
 
-    fn load_v14(&mut self, file: &mut File, xmodel_part: Option<XModelPart>) -> Result<()> {
+    // vertex and triangle counts of the surfaces. the vertices are skipped over
+    // without decoding them, only their weight counts are read to find the next surface
+    pub fn load_counts(file_path: PathBuf) -> Result<Vec<(usize, usize)>> {
+        let data = fs::read(file_path)?;
+        let mut offset = 0;
+        let version = binary::read_next::<u16>(&data, &mut offset)?;
+        let surface_count = binary::read_next::<u16>(&data, &mut offset)?;
+
+        let mut counts: Vec<(usize, usize)> = Vec::new();
+        for _ in 0..surface_count {
+            let surface_counts = match XModelVersion::valid(version) {
+                Some(XModelVersion::V14) => Self::skip_surface_v14(&data, &mut offset)?,
+                Some(XModelVersion::V20) => Self::skip_surface_v20(&data, &mut offset)?,
+                Some(XModelVersion::V25) => Self::skip_surface_v25_v62(&data, &mut offset, 24)?,
+                Some(XModelVersion::V62) => Self::skip_surface_v25_v62(&data, &mut offset, 28)?,
+                None => {
+                    return Err(Error::new(format!(
+                        "invalid xmodelsurf version {}",
+                        version
+                    )))
+                }
+            };
+            counts.push(surface_counts);
+        }
+
+        Ok(counts)
+    }
+
+    // v14 and v20 vertices are stored relative to their bone, they are moved
+    // into model space once the bones of the xmodelpart are known
+    pub fn apply_bone_transforms(&mut self, xmodel_part: &XModelPart) {
+        match XModelVersion::valid(self.version) {
+            Some(XModelVersion::V14) | Some(XModelVersion::V20) => (),
+            _ => return,
+        }
+
+        for surface in self.surfaces.iter_mut() {
+            for vertex in surface.vertices.iter_mut() {
+                let transform = &xmodel_part.bones[vertex.bone as usize].world_transform;
+
+                vertex.position = vec3_rotate(vertex.position, transform.rotation);
+                vertex.position = vec3_add(vertex.position, transform.position);
+                vertex.normal = vec3_rotate(vertex.normal, transform.rotation);
+            }
+        }
+    }
+
+    fn skip_surface_v14(data: &[u8], offset: &mut usize) -> Result<(usize, usize)> {
+        *offset += 1;
+        let vertex_count = binary::read_next::<u16>(data, offset)?;
+        let triangle_count = binary::read_next::<u16>(data, offset)?;
+        *offset += 2;
+        let rigged = binary::read_next::<u16>(data, offset)? as i32 == RIGGED;
+        if rigged {
+            *offset += 4;
+        }
+
+        // the triangles are strips, degenerate triangles are dropped the same way as on load
+        let mut triangles = 0;
+        loop {
+            let idx_count = binary::read_next::<u8>(data, offset)?;
+            let indices = binary::read_vec_at::<u16>(data, *offset, idx_count.max(3) as usize)?;
+            *offset += indices.len() * 2;
+
+            let (idx1, mut idx2, mut idx3) = (indices[0], indices[1], indices[2]);
+            if idx1 != idx2 && idx1 != idx3 && idx2 != idx3 {
+                triangles += 1;
+            }
+
+            let mut i = 3;
+            while i < idx_count as usize {
+                let idx4 = idx3;
+                let idx5 = indices[i];
+                if idx4 != idx2 && idx4 != idx5 && idx2 != idx5 {
+                    triangles += 1;
+                }
+
+                if i + 1 >= idx_count as usize {
+                    break;
+                }
+
+                idx2 = idx5;
+                idx3 = indices[i + 1];
+                if idx4 != idx2 && idx4 != idx3 && idx2 != idx3 {
+                    triangles += 1;
+                }
+
+                i += 2;
+            }
+
+            if triangles >= triangle_count as usize {
+                break;
+            }
+        }
+
+        let mut weight_count = 0;
+        for _ in 0..vertex_count {
+            *offset += 20;
+            let mut vertex_weight_count = 0;
+            if rigged {
+                vertex_weight_count = binary::read_next::<u16>(data, offset)? as usize;
+                *offset += 2;
+            }
+            *offset += 12;
+            if vertex_weight_count != 0 {
+                *offset += 4;
+            }
+            weight_count += vertex_weight_count;
+        }
+        *offset += weight_count * 18;
+
+        Ok((vertex_count as usize, triangles))
+    }
+
+    fn skip_surface_v20(data: &[u8], offset: &mut usize) -> Result<(usize, usize)> {
+        *offset += 1;
+        let vertex_count = binary::read_next::<u16>(data, offset)?;
+        let triangle_count = binary::read_next::<u16>(data, offset)?;
+        let rigged = binary::read_next::<u16>(data, offset)? as i32 == RIGGED;
+        if rigged {
+            *offset += 2;
+        }
+
+        for _ in 0..vertex_count {
+            *offset += 48;
+            let mut weight_count = 0;
+            if rigged {
+                weight_count = binary::read_next::<u8>(data, offset)? as usize;
+                *offset += 2;
+            }
+            *offset += 12;
+            if weight_count > 0 {
+                *offset += 1 + weight_count * 16;
+            }
+        }
+        *offset += triangle_count as usize * 6;
+
+        Ok((vertex_count as usize, triangle_count as usize))
+    }
+
+    fn skip_surface_v25_v62(
+        data: &[u8],
+        offset: &mut usize,
+        vertex_padding: usize,
+    ) -> Result<(usize, usize)> {
+        *offset += 3;
+        let vertex_count = binary::read_next::<u16>(data, offset)?;
+        let triangle_count = binary::read_next::<u16>(data, offset)?;
+        let vertex_count2 = binary::read_next::<u16>(data, offset)?;
+        let rigged = vertex_count != vertex_count2;
+
+        if rigged {
+            *offset += 2;
+            if vertex_count2 != 0 {
+                while binary::read_next::<u16>(data, offset)? != 0 {}
+                *offset += 2;
+            }
+        } else {
+            *offset += 4;
+        }
+
+        for _ in 0..vertex_count {
+            *offset += 24 + vertex_padding;
+            let mut weight_count = 0;
+            if rigged {
+                weight_count = binary::read_next::<u8>(data, offset)? as usize;
+                *offset += 2;
+            }
+            *offset += 12 + weight_count * 4;
+        }
+        *offset += triangle_count as usize * 6;
+
+        Ok((vertex_count as usize, triangle_count as usize))
+    }
+
+    fn load_v14(&mut self, file: &mut Cursor<Vec<u8>>) -> Result<()> {
         let surface_count = binary::read::<u16>(file)?;
 
         for _ in 0..surface_count {
@@ -136,7 +312,7 @@ impl XModelSurf {
             let mut vertices: Vec<XModelSurfVertex> = Vec::new();
             for i in 0..vertex_count {
                 let normal = binary::read_vec::<f32>(file, 3)?;
-                let mut normal = vec3_from_vec(normal).unwrap();
+                let normal = vec3_from_vec(normal).unwrap();
 
                 let uv = binary::read_vec::<f32>(file, 2)?;
                 let mut weight_count = 0;
@@ -148,7 +324,7 @@ impl XModelSurf {
                 }
 
                 let position = binary::read_vec::<f32>(file, 3)?;
-                let mut position = vec3_from_vec(position).unwrap();
+                let position = vec3_from_vec(position).unwrap();
 
                 if weight_count != 0 {
                     binary::skip(file, 4)?;
@@ -156,14 +332,6 @@ impl XModelSurf {
 
                 bone_weight_counts[i as usize] = weight_count;
 
-                if let Some(xmodel_part) = xmodel_part.to_owned() {
-                    let xmodel_part_bone = xmodel_part.bones[vertex_bone_idx as usize].to_owned();
-
-                    position = vec3_rotate(position, xmodel_part_bone.world_transform.rotation);
-                    position = vec3_add(position, xmodel_part_bone.world_transform.position);
-                    normal = vec3_rotate(normal, xmodel_part_bone.world_transform.rotation);
-                }
-
                 vertices.push(XModelSurfVertex {
                     normal,
                     color: [1.0, 1.0, 1.0, 1.0],
@@ -203,7 +371,7 @@ impl XModelSurf {
         Ok(())
     }
 
-    fn load_v20(&mut self, file: &mut File, xmodel_part: Option<XModelPart>) -> Result<()> {
+    fn load_v20(&mut self, file: &mut Cursor<Vec<u8>>) -> Result<()> {
         let surface_count = binary::read::<u16>(file)?;
 
         for _ in 0..surface_count {
@@ -222,7 +390,7 @@ impl XModelSurf {
             let mut vertices: Vec<XModelSurfVertex> = Vec::new();
             for _ in 0..vertex_count {
                 let normal = binary::read_vec::<f32>(file, 3)?;
-                let mut normal = vec3_from_vec(normal).unwrap();
+                let normal = vec3_from_vec(normal).unwrap();
 
                 let color = binary::read_vec::<u8>(file, 4)?;
                 let uv = binary::read_vec::<f32>(file, 2)?;
@@ -238,7 +406,7 @@ impl XModelSurf {
                 }
 
                 let position = binary::read_vec::<f32>(file, 3)?;
-                let mut position = vec3_from_vec(position).unwrap();
+                let position = vec3_from_vec(position).unwrap();
 
                 let mut vertex_weights: Vec<XModelSurfWeight> = vec![XModelSurfWeight {
                     bone: vertex_bone_idx,
@@ -262,14 +430,6 @@ impl XModelSurf {
                     }
                 }
 
-                if let Some(xmodel_part) = xmodel_part.to_owned() {
-                    let xmodel_part_bone = xmodel_part.bones[vertex_bone_idx as usize].to_owned();
-
-                    position = vec3_rotate(position, xmodel_part_bone.world_transform.rotation);
-                    position = vec3_add(position, xmodel_part_bone.world_transform.position);
-                    normal = vec3_rotate(normal, xmodel_part_bone.world_transform.rotation);
-                }
-
                 vertices.push(XModelSurfVertex {
                     normal,
                     color: color_from_vec(color).unwrap(),
@@ -295,7 +455,7 @@ impl XModelSurf {
         Ok(())
     }
 
-    fn load_v25(&mut self, file: &mut File) -> Result<()> {
+    fn load_v25(&mut self, file: &mut Cursor<Vec<u8>>) -> Result<()> {
         let surface_count = binary::read::<u16>(file)?;
 
         for _ in 0..surface_count {
@@ -379,7 +539,7 @@ impl XModelSurf {
         Ok(())
     }
 
-    fn load_v62(&mut self, file: &mut File) -> Result<()> {
+    fn load_v62(&mut self, file: &mut Cursor<Vec<u8>>) -> Result<()> {
         let surface_count = binary::read::<u16>(file)?;
 
         for _ in 0..surface_count {
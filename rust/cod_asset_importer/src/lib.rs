@@ -1,12 +1,13 @@
 mod assets;
 mod loaded_assets;
 mod loader;
+mod model_cache;
 mod utils;
 
 use assets::{xmodel::XModelVersion, GameVersion, material::TextureType};
 use loaded_assets::{
-    LoadedBone, LoadedIbsp, LoadedIbspEntity, LoadedMaterial, LoadedModel, LoadedSurface,
-    LoadedTexture,
+    ImportPlan, LoadedAnimation, LoadedAnimationBone, LoadedBone, LoadedIbsp, LoadedIbspEntity,
+    LoadedMaterial, LoadedModel, LoadedSurface, LoadedTexture, PlannedModel, PlannedTexture,
 };
 use loader::Loader;
 use pyo3::prelude::*;
@@ -21,6 +22,11 @@ fn cod_asset_importer(_py: Python, m: &PyModule) -> PyResult<()> {
     m.add_class::<LoadedTexture>()?;
     m.add_class::<LoadedSurface>()?;
     m.add_class::<LoadedBone>()?;
+    m.add_class::<LoadedAnimation>()?;
+    m.add_class::<LoadedAnimationBone>()?;
+    m.add_class::<ImportPlan>()?;
+    m.add_class::<PlannedModel>()?;
+    m.add_class::<PlannedTexture>()?;
     m.add_class::<XModelVersion>()?;
     m.add_class::<GameVersion>()?;
     m.add_class::<TextureType>()?;
@@ -1,16 +1,25 @@
 use crate::{
     assets::{
         ibsp::{Ibsp, IbspEntity, IbspSurface},
-        iwi::IWi,
+        iwi::{IWi, IWiDds},
         material::TextureType,
+        xanim::XAnim,
         xmodel::XModelVersion,
         xmodelpart::XModelPartBone,
         xmodelsurf::XModelSurfSurface,
     },
-    utils::math::Vec3,
+    model_cache::{CacheReader, CacheWriter},
+    utils::{
+        math::{
+            matrix4_from_transform, quat_conjugate, quat_dot, quat_multiply, vec3_rotate, vec3_sub,
+            Matrix4, Quat, Vec3,
+        },
+        Result,
+    },
 };
 use pyo3::prelude::*;
-use std::{collections::HashMap, iter, mem};
+use rayon::prelude::*;
+use std::{collections::HashMap, iter, mem, sync::Arc};
 
 #[pyclass(module = "cod_asset_importer")]
 pub struct LoadedIbsp {
@@ -19,6 +28,9 @@ pub struct LoadedIbsp {
     pub materials: Vec<String>,
     pub entities: Vec<LoadedIbspEntity>,
     pub surfaces: Vec<LoadedSurface>,
+    pub source: String,
+    pub fingerprint: String,
+    pub reused: bool,
 }
 
 #[pyclass(module = "cod_asset_importer")]
@@ -30,6 +42,8 @@ pub struct LoadedIbspEntity {
     pub scale: [f32; 3],
 }
 
+// the geometry, skeleton and materials are shared between every instance
+// of a model, only the transform is per instance
 #[pyclass(module = "cod_asset_importer")]
 #[derive(Clone)]
 pub struct LoadedModel {
@@ -38,9 +52,12 @@ pub struct LoadedModel {
     angles: Vec3,
     origin: Vec3,
     scale: Vec3,
-    materials: HashMap<String, LoadedMaterial>,
-    surfaces: Vec<LoadedSurface>,
-    bones: Vec<LoadedBone>,
+    materials: Arc<HashMap<String, LoadedMaterial>>,
+    surfaces: Arc<Vec<LoadedSurface>>,
+    bones: Arc<Vec<LoadedBone>>,
+    source: String,
+    fingerprint: String,
+    reused: bool,
 }
 
 #[pyclass(module = "cod_asset_importer")]
@@ -49,6 +66,8 @@ pub struct LoadedMaterial {
     name: String,
     version: XModelVersion,
     textures: Vec<LoadedTexture>,
+    source: String,
+    fingerprint: String,
 }
 
 #[pyclass(module = "cod_asset_importer")]
@@ -58,23 +77,30 @@ pub struct LoadedTexture {
     texture_type: TextureType,
     width: u16,
     height: u16,
-    data: Vec<f32>,
+    data: Arc<Vec<f32>>,
+    file_path: Option<String>,
+    content_hash: String,
+    source: String,
+    fingerprint: String,
+    reused: bool,
 }
 
 #[pyclass(module = "cod_asset_importer")]
 #[derive(Clone)]
 pub struct LoadedSurface {
-    material: String,
-    vertices: Vec<f32>,
-    normals: Vec<[f32; 3]>,
-    colors: Vec<f32>,
-    uvs: Vec<f32>,
+    materials: Vec<String>,
+    polygon_material_indices: Arc<Vec<usize>>,
+    validated: bool,
+    vertices: Arc<Vec<f32>>,
+    normals: Arc<Vec<[f32; 3]>>,
+    colors: Arc<Vec<f32>>,
+    uvs: Arc<Vec<f32>>,
     loops_len: usize,
     polygons_len: usize,
-    polygon_loop_starts: Vec<usize>,
-    polygon_loop_totals: Vec<usize>,
-    polygon_vertices: Vec<u32>,
-    weight_groups: HashMap<u16, HashMap<usize, f32>>,
+    polygon_loop_starts: Arc<Vec<usize>>,
+    polygon_loop_totals: Arc<Vec<usize>>,
+    polygon_vertices: Arc<Vec<u32>>,
+    weight_groups: Arc<HashMap<u16, HashMap<usize, f32>>>,
 }
 
 #[pyclass(module = "cod_asset_importer")]
@@ -86,6 +112,59 @@ pub struct LoadedBone {
     rotation: [f32; 4],
 }
 
+#[pyclass(module = "cod_asset_importer")]
+pub struct LoadedAnimation {
+    pub name: String,
+    framerate: u16,
+    frame_count: u16,
+    looping: bool,
+    bones: Vec<LoadedAnimationBone>,
+}
+
+// keyframes are stored per channel as interleaved frame, value pairs relative
+// to the rest pose of the bone, ready to be set on fcurve keyframe points
+#[pyclass(module = "cod_asset_importer")]
+#[derive(Clone)]
+pub struct LoadedAnimationBone {
+    name: String,
+    rotations: Vec<Vec<f32>>,
+    positions: Vec<Vec<f32>>,
+}
+
+// what an import is going to load, read from the file headers without decoding
+// any geometry or texture data. the geometry of the map is in its own fields,
+// the getters return the totals with every model instance
+#[pyclass(module = "cod_asset_importer")]
+pub struct ImportPlan {
+    pub name: String,
+    pub surfaces: usize,
+    pub vertices: usize,
+    pub triangles: usize,
+    pub models: Vec<PlannedModel>,
+    pub materials: Vec<String>,
+    pub textures: Vec<PlannedTexture>,
+    pub missing_files: Vec<String>,
+}
+
+#[pyclass(module = "cod_asset_importer")]
+#[derive(Clone)]
+pub struct PlannedModel {
+    pub name: String,
+    pub lod: usize,
+    pub instances: usize,
+    pub surfaces: usize,
+    pub vertices: usize,
+    pub triangles: usize,
+}
+
+#[pyclass(module = "cod_asset_importer")]
+#[derive(Clone)]
+pub struct PlannedTexture {
+    pub name: String,
+    pub width: u16,
+    pub height: u16,
+}
+
 #[pymethods]
 impl LoadedModel {
     fn name(&self) -> &str {
@@ -108,16 +187,39 @@ impl LoadedModel {
         self.scale
     }
 
-    fn materials(&mut self) -> HashMap<String, LoadedMaterial> {
-        mem::take(&mut self.materials)
+    // world matrix of the instance. the angles are pitch, yaw and roll in degrees,
+    // which are the y, z and x rotations in blender
+    fn matrix(&self) -> Matrix4 {
+        let rotation = [
+            self.angles[2].to_radians(),
+            self.angles[0].to_radians(),
+            self.angles[1].to_radians(),
+        ];
+        matrix4_from_transform(self.origin, rotation, self.scale)
     }
 
-    fn surfaces(&mut self) -> Vec<LoadedSurface> {
-        mem::take(&mut self.surfaces)
+    fn materials(&self) -> HashMap<String, LoadedMaterial> {
+        (*self.materials).clone()
     }
 
-    fn bones(&mut self) -> Vec<LoadedBone> {
-        mem::take(&mut self.bones)
+    fn surfaces(&self) -> Vec<LoadedSurface> {
+        (*self.surfaces).clone()
+    }
+
+    fn bones(&self) -> Vec<LoadedBone> {
+        (*self.bones).clone()
+    }
+
+    fn source(&self) -> &str {
+        &self.source
+    }
+
+    fn fingerprint(&self) -> &str {
+        &self.fingerprint
+    }
+
+    fn reused(&self) -> bool {
+        self.reused
     }
 }
 
@@ -134,6 +236,14 @@ impl LoadedMaterial {
     fn textures(&mut self) -> Vec<LoadedTexture> {
         mem::take(&mut self.textures)
     }
+
+    fn source(&self) -> &str {
+        &self.source
+    }
+
+    fn fingerprint(&self) -> &str {
+        &self.fingerprint
+    }
 }
 
 #[pymethods]
@@ -154,31 +264,65 @@ impl LoadedTexture {
         self.height
     }
 
-    fn data(&mut self) -> Vec<f32> {
-        mem::take(&mut self.data)
+    fn data(&self, py: Python) -> PyObject {
+        self.data.to_object(py)
+    }
+
+    fn file_path(&self) -> Option<String> {
+        self.file_path.clone()
+    }
+
+    fn content_hash(&self) -> &str {
+        &self.content_hash
+    }
+
+    fn source(&self) -> &str {
+        &self.source
+    }
+
+    fn fingerprint(&self) -> &str {
+        &self.fingerprint
+    }
+
+    fn reused(&self) -> bool {
+        self.reused
     }
 }
 
 #[pymethods]
 impl LoadedSurface {
     fn material(&self) -> &str {
-        &self.material
+        self.materials
+            .first()
+            .map_or("", |material| material.as_str())
+    }
+
+    fn materials(&self) -> Vec<String> {
+        self.materials.clone()
     }
 
-    fn vertices(&mut self) -> Vec<f32> {
-        mem::take(&mut self.vertices)
+    fn polygon_material_indices(&self, py: Python) -> PyObject {
+        self.polygon_material_indices.to_object(py)
     }
 
-    fn normals(&mut self) -> Vec<[f32; 3]> {
-        mem::take(&mut self.normals)
+    fn validated(&self) -> bool {
+        self.validated
     }
 
-    fn colors(&mut self) -> Vec<f32> {
-        mem::take(&mut self.colors)
+    fn vertices(&self, py: Python) -> PyObject {
+        self.vertices.to_object(py)
     }
 
-    fn uvs(&mut self) -> Vec<f32> {
-        mem::take(&mut self.uvs)
+    fn normals(&self, py: Python) -> PyObject {
+        self.normals.to_object(py)
+    }
+
+    fn colors(&self, py: Python) -> PyObject {
+        self.colors.to_object(py)
+    }
+
+    fn uvs(&self, py: Python) -> PyObject {
+        self.uvs.to_object(py)
     }
 
     fn loops_len(&self) -> usize {
@@ -189,20 +333,20 @@ impl LoadedSurface {
         self.polygons_len
     }
 
-    fn polygon_loop_starts(&mut self) -> Vec<usize> {
-        mem::take(&mut self.polygon_loop_starts)
+    fn polygon_loop_starts(&self, py: Python) -> PyObject {
+        self.polygon_loop_starts.to_object(py)
     }
 
-    fn polygon_loop_totals(&mut self) -> Vec<usize> {
-        mem::take(&mut self.polygon_loop_totals)
+    fn polygon_loop_totals(&self, py: Python) -> PyObject {
+        self.polygon_loop_totals.to_object(py)
     }
 
-    fn polygon_vertices(&mut self) -> Vec<u32> {
-        mem::take(&mut self.polygon_vertices)
+    fn polygon_vertices(&self, py: Python) -> PyObject {
+        self.polygon_vertices.to_object(py)
     }
 
-    fn weight_groups(&mut self) -> HashMap<u16, HashMap<usize, f32>> {
-        mem::take(&mut self.weight_groups)
+    fn weight_groups(&self, py: Python) -> PyObject {
+        self.weight_groups.to_object(py)
     }
 }
 
@@ -225,6 +369,44 @@ impl LoadedBone {
     }
 }
 
+#[pymethods]
+impl LoadedAnimation {
+    fn name(&self) -> &str {
+        &self.name
+    }
+
+    fn framerate(&self) -> u16 {
+        self.framerate
+    }
+
+    fn frame_count(&self) -> u16 {
+        self.frame_count
+    }
+
+    fn looping(&self) -> bool {
+        self.looping
+    }
+
+    fn bones(&mut self) -> Vec<LoadedAnimationBone> {
+        mem::take(&mut self.bones)
+    }
+}
+
+#[pymethods]
+impl LoadedAnimationBone {
+    fn name(&self) -> &str {
+        &self.name
+    }
+
+    fn rotations(&mut self) -> Vec<Vec<f32>> {
+        mem::take(&mut self.rotations)
+    }
+
+    fn positions(&mut self) -> Vec<Vec<f32>> {
+        mem::take(&mut self.positions)
+    }
+}
+
 #[pymethods]
 impl LoadedIbsp {
     fn name(&self) -> &str {
@@ -234,6 +416,18 @@ impl LoadedIbsp {
     fn surfaces(&mut self) -> Vec<LoadedSurface> {
         mem::take(&mut self.surfaces)
     }
+
+    fn source(&self) -> &str {
+        &self.source
+    }
+
+    fn fingerprint(&self) -> &str {
+        &self.fingerprint
+    }
+
+    fn reused(&self) -> bool {
+        self.reused
+    }
 }
 
 #[pymethods]
@@ -255,6 +449,111 @@ impl LoadedIbspEntity {
     }
 }
 
+#[pymethods]
+impl ImportPlan {
+    fn name(&self) -> &str {
+        &self.name
+    }
+
+    fn models(&self) -> Vec<PlannedModel> {
+        self.models.clone()
+    }
+
+    fn materials(&self) -> Vec<String> {
+        self.materials.clone()
+    }
+
+    fn textures(&self) -> Vec<PlannedTexture> {
+        self.textures.clone()
+    }
+
+    fn missing_files(&self) -> Vec<String> {
+        self.missing_files.clone()
+    }
+
+    fn instances(&self) -> usize {
+        self.models.iter().map(|m| m.instances).sum()
+    }
+
+    fn surfaces(&self) -> usize {
+        self.surfaces
+            + self
+                .models
+                .iter()
+                .map(|m| m.surfaces * m.instances)
+                .sum::<usize>()
+    }
+
+    fn vertices(&self) -> usize {
+        self.vertices
+            + self
+                .models
+                .iter()
+                .map(|m| m.vertices * m.instances)
+                .sum::<usize>()
+    }
+
+    fn triangles(&self) -> usize {
+        self.triangles
+            + self
+                .models
+                .iter()
+                .map(|m| m.triangles * m.instances)
+                .sum::<usize>()
+    }
+
+    fn texture_bytes(&self) -> usize {
+        self.textures.iter().map(|t| t.decoded_bytes()).sum()
+    }
+}
+
+#[pymethods]
+impl PlannedModel {
+    fn name(&self) -> &str {
+        &self.name
+    }
+
+    fn lod(&self) -> usize {
+        self.lod
+    }
+
+    fn instances(&self) -> usize {
+        self.instances
+    }
+
+    fn surfaces(&self) -> usize {
+        self.surfaces
+    }
+
+    fn vertices(&self) -> usize {
+        self.vertices
+    }
+
+    fn triangles(&self) -> usize {
+        self.triangles
+    }
+}
+
+#[pymethods]
+impl PlannedTexture {
+    fn name(&self) -> &str {
+        &self.name
+    }
+
+    fn width(&self) -> u16 {
+        self.width
+    }
+
+    fn height(&self) -> u16 {
+        self.height
+    }
+
+    // textures are decoded into 4 float channels per pixel
+    fn decoded_bytes(&self) -> usize {
+        self.width as usize * self.height as usize * 4 * mem::size_of::<f32>()
+    }
+}
+
 impl LoadedModel {
     #[allow(clippy::too_many_arguments)]
     pub fn new(
@@ -273,12 +572,25 @@ impl LoadedModel {
             angles,
             origin,
             scale,
-            materials,
-            surfaces,
-            bones,
+            materials: Arc::new(materials),
+            surfaces: Arc::new(surfaces),
+            bones: Arc::new(bones),
+            source: String::new(),
+            fingerprint: String::new(),
+            reused: false,
         }
     }
 
+    pub fn set_source(&mut self, source: String, fingerprint: String) {
+        self.source = source;
+        self.fingerprint = fingerprint;
+    }
+
+    // the surfaces are not loaded, the scene already holds the meshes of this source
+    pub fn set_reused(&mut self) {
+        self.reused = true;
+    }
+
     pub fn set_angles(&mut self, angles: Vec3) {
         self.angles = angles;
     }
@@ -292,31 +604,387 @@ impl LoadedModel {
     }
 }
 
+impl LoadedAnimation {
+    // converts the parent relative keys of the xanim into pose space of the
+    // skeleton, basis = rest^-1 * key
+    pub fn new(xanim: XAnim, rest_poses: &HashMap<String, (Vec3, Quat)>) -> Self {
+        let bones = xanim
+            .bones
+            .into_iter()
+            .map(|bone| {
+                let (rest_position, rest_rotation) = rest_poses
+                    .get(&bone.name)
+                    .copied()
+                    .unwrap_or(([0.0, 0.0, 0.0], [1.0, 0.0, 0.0, 0.0]));
+                let rest_rotation_inverse = quat_conjugate(rest_rotation);
+
+                let mut rotations = vec![Vec::with_capacity(bone.rotations.len() * 2); 4];
+                let mut previous: Quat = [1.0, 0.0, 0.0, 0.0];
+                for (&frame, &rotation) in bone.rotation_frames.iter().zip(bone.rotations.iter()) {
+                    let mut rotation = quat_multiply(rest_rotation_inverse, rotation);
+
+                    // keep the quaternions on the same hemisphere for interpolation
+                    if quat_dot(previous, rotation) < 0.0 {
+                        rotation = rotation.map(|r| -r);
+                    }
+                    previous = rotation;
+
+                    for (channel, value) in rotations.iter_mut().zip(rotation) {
+                        channel.extend_from_slice(&[frame as f32, value]);
+                    }
+                }
+
+                let mut positions = vec![Vec::with_capacity(bone.positions.len() * 2); 3];
+                for (&frame, &position) in bone.position_frames.iter().zip(bone.positions.iter()) {
+                    let position =
+                        vec3_rotate(vec3_sub(position, rest_position), rest_rotation_inverse);
+
+                    for (channel, value) in positions.iter_mut().zip(position) {
+                        channel.extend_from_slice(&[frame as f32, value]);
+                    }
+                }
+
+                LoadedAnimationBone {
+                    name: bone.name,
+                    rotations,
+                    positions,
+                }
+            })
+            .collect();
+
+        LoadedAnimation {
+            name: xanim.name,
+            framerate: xanim.framerate,
+            frame_count: xanim.frame_count,
+            looping: xanim.looping,
+            bones,
+        }
+    }
+}
+
 impl LoadedMaterial {
     pub fn new(name: String, textures: Vec<LoadedTexture>, version: XModelVersion) -> Self {
         LoadedMaterial {
             name,
             textures,
             version,
+            source: String::new(),
+            fingerprint: String::new(),
         }
     }
+
+    pub fn set_source(&mut self, source: String, fingerprint: String) {
+        self.source = source;
+        self.fingerprint = fingerprint;
+    }
 }
 
 impl LoadedTexture {
+    // a texture without data, the scene already holds the image of this source
+    pub fn new_reused() -> Self {
+        Self {
+            name: "".to_string(),
+            texture_type: "".to_string().into(),
+            width: 0,
+            height: 0,
+            data: Arc::new(Vec::new()),
+            file_path: None,
+            content_hash: String::new(),
+            source: String::new(),
+            fingerprint: String::new(),
+            reused: true,
+        }
+    }
+    pub fn set_source(&mut self, source: String, fingerprint: String) {
+        self.source = source;
+        self.fingerprint = fingerprint;
+    }
     pub fn set_texture_type(&mut self, texture_type: TextureType) {
         self.texture_type = texture_type;
     }
     pub fn set_name(&mut self, name: String) {
         self.name = name;
     }
+    pub fn set_file_path(&mut self, file_path: String) {
+        self.file_path = Some(file_path);
+    }
+    pub fn set_content_hash(&mut self, content_hash: String) {
+        self.content_hash = content_hash;
+    }
 }
 
 impl LoadedSurface {
     pub fn set_material(&mut self, material: String) {
-        self.material = material;
+        self.materials = vec![material];
+    }
+
+    pub fn write_cache(&self, writer: &mut CacheWriter) {
+        writer.value(self.materials.len() as u32);
+        for material in self.materials.iter() {
+            writer.string(material);
+        }
+        writer.value(self.validated as u8);
+        writer.value(self.loops_len as u64);
+        writer.value(self.polygons_len as u64);
+        writer.array(&self.vertices);
+        writer.array(&self.normals.iter().flatten().copied().collect::<Vec<f32>>());
+        writer.array(&self.colors);
+        writer.array(&self.uvs);
+        writer.array(&usizes_to_u64(&self.polygon_loop_starts));
+        writer.array(&usizes_to_u64(&self.polygon_loop_totals));
+        writer.array(&self.polygon_vertices);
+        writer.array(&usizes_to_u64(&self.polygon_material_indices));
+
+        writer.value(self.weight_groups.len() as u32);
+        for (bone, weights) in self.weight_groups.iter() {
+            let (vertices, weights): (Vec<u64>, Vec<f32>) =
+                weights.iter().map(|(v, w)| (*v as u64, *w)).unzip();
+            writer.value(*bone);
+            writer.array(&vertices);
+            writer.array(&weights);
+        }
+    }
+
+    pub fn read_cache(reader: &mut CacheReader) -> Result<Self> {
+        let material_count = reader.value::<u32>()?;
+        let mut materials: Vec<String> = Vec::new();
+        for _ in 0..material_count {
+            materials.push(reader.string()?);
+        }
+        let validated = reader.value::<u8>()? != 0;
+        let loops_len = reader.value::<u64>()? as usize;
+        let polygons_len = reader.value::<u64>()? as usize;
+        let vertices = reader.array::<f32>()?;
+        let normals: Vec<[f32; 3]> = reader
+            .array::<f32>()?
+            .chunks_exact(3)
+            .map(|n| [n[0], n[1], n[2]])
+            .collect();
+        let colors = reader.array::<f32>()?;
+        let uvs = reader.array::<f32>()?;
+        let polygon_loop_starts = u64s_to_usize(reader.array::<u64>()?);
+        let polygon_loop_totals = u64s_to_usize(reader.array::<u64>()?);
+        let polygon_vertices = reader.array::<u32>()?;
+        let polygon_material_indices = u64s_to_usize(reader.array::<u64>()?);
+
+        let weight_group_count = reader.value::<u32>()?;
+        let mut weight_groups: HashMap<u16, HashMap<usize, f32>> = HashMap::new();
+        for _ in 0..weight_group_count {
+            let bone = reader.value::<u16>()?;
+            let vertices = reader.array::<u64>()?;
+            let weights = reader.array::<f32>()?;
+            weight_groups.insert(
+                bone,
+                vertices
+                    .into_iter()
+                    .map(|v| v as usize)
+                    .zip(weights)
+                    .collect(),
+            );
+        }
+
+        Ok(Self {
+            materials,
+            polygon_material_indices: Arc::new(polygon_material_indices),
+            validated,
+            vertices: Arc::new(vertices),
+            normals: Arc::new(normals),
+            colors: Arc::new(colors),
+            uvs: Arc::new(uvs),
+            loops_len,
+            polygons_len,
+            polygon_loop_starts: Arc::new(polygon_loop_starts),
+            polygon_loop_totals: Arc::new(polygon_loop_totals),
+            polygon_vertices: Arc::new(polygon_vertices),
+            weight_groups: Arc::new(weight_groups),
+        })
+    }
+
+    // merges the vertices with the same position, normal, color and weights and remaps the
+    // polygons onto them. the uvs are stored per loop, so vertices that only differ in their
+    // uvs are merged too. positions are snapped to a grid of the tolerance and vertices in
+    // the same grid cell are merged, so close vertices on both sides of a cell boundary are
+    // kept apart. a tolerance of 0 merges exact duplicates only. returns the vertex counts
+    // before and after welding
+    pub fn weld(&mut self, tolerance: f32) -> (usize, usize) {
+        let vertex_count = self.vertices.len() / 3;
+        if self
+            .polygon_vertices
+            .iter()
+            .any(|&v| v as usize >= vertex_count)
+        {
+            return (vertex_count, vertex_count);
+        }
+
+        // -0.0 and 0.0 are the same value with different bits. the grid cells are counted
+        // in 64 bits, large coordinates over a small tolerance overflow 32 bits
+        let exact = |v: f32| (v + 0.0).to_bits();
+        let position = |v: f32| match tolerance > 0.0 {
+            true => (v as f64 / tolerance as f64).round() as i64,
+            false => exact(v) as i64,
+        };
+
+        let mut vertex_weights: Vec<Vec<(u16, u32)>> = vec![Vec::new(); vertex_count];
+        for (bone, weights) in self.weight_groups.iter() {
+            for (&vertex_index, &weight) in weights.iter() {
+                vertex_weights[vertex_index].push((*bone, exact(weight)));
+            }
+        }
+
+        let mut keys: HashMap<WeldKey, u32> = HashMap::with_capacity(vertex_count);
+        let mut kept: Vec<usize> = Vec::new();
+        let mut remap: Vec<u32> = Vec::with_capacity(vertex_count);
+        for (i, mut weights) in vertex_weights.into_iter().enumerate() {
+            let p = &self.vertices[i * 3..i * 3 + 3];
+            let n = self.normals[i];
+            let c = &self.colors[i * 4..i * 4 + 4];
+            weights.sort_unstable();
+
+            let key = (
+                [position(p[0]), position(p[1]), position(p[2])],
+                [
+                    exact(n[0]),
+                    exact(n[1]),
+                    exact(n[2]),
+                    exact(c[0]),
+                    exact(c[1]),
+                    exact(c[2]),
+                    exact(c[3]),
+                ],
+                weights,
+            );
+            let index = *keys.entry(key).or_insert_with(|| {
+                kept.push(i);
+                kept.len() as u32 - 1
+            });
+            remap.push(index);
+        }
+
+        if kept.len() == vertex_count {
+            return (vertex_count, vertex_count);
+        }
+
+        let polygon_vertices: Vec<u32> = self
+            .polygon_vertices
+            .iter()
+            .map(|&v| remap[v as usize])
+            .collect();
+        let weight_groups: HashMap<u16, HashMap<usize, f32>> = self
+            .weight_groups
+            .iter()
+            .map(|(bone, weights)| {
+                let weights = weights
+                    .iter()
+                    .map(|(v, w)| (remap[*v] as usize, *w))
+                    .collect();
+                (*bone, weights)
+            })
+            .collect();
+
+        // a tolerance can collapse triangles, those are left to the mesh validation
+        self.validated = self.validated && triangles_validated(&polygon_vertices, kept.len());
+        self.vertices = Arc::new(
+            kept.iter()
+                .flat_map(|&i| self.vertices[i * 3..i * 3 + 3].iter().copied())
+                .collect(),
+        );
+        self.normals = Arc::new(kept.iter().map(|&i| self.normals[i]).collect());
+        self.colors = Arc::new(
+            kept.iter()
+                .flat_map(|&i| self.colors[i * 4..i * 4 + 4].iter().copied())
+                .collect(),
+        );
+        self.polygon_vertices = Arc::new(polygon_vertices);
+        self.weight_groups = Arc::new(weight_groups);
+
+        (vertex_count, kept.len())
+    }
+
+    // merges the surfaces of a model into one surface, the materials become
+    // slots of the merged surface that are assigned per polygon
+    pub fn merge(surfaces: &[LoadedSurface]) -> Self {
+        let mut materials: Vec<String> = Vec::new();
+        let mut vertices: Vec<f32> = Vec::new();
+        let mut normals: Vec<[f32; 3]> = Vec::new();
+        let mut colors: Vec<f32> = Vec::new();
+        let mut uvs: Vec<f32> = Vec::new();
+        let mut loops_len = 0;
+        let mut polygons_len = 0;
+        let mut polygon_loop_starts: Vec<usize> = Vec::new();
+        let mut polygon_loop_totals: Vec<usize> = Vec::new();
+        let mut polygon_vertices: Vec<u32> = Vec::new();
+        let mut polygon_material_indices: Vec<usize> = Vec::new();
+        let mut weight_groups: HashMap<u16, HashMap<usize, f32>> = HashMap::new();
+
+        for surface in surfaces {
+            let vertex_offset = vertices.len() / 3;
+            let material = surface.material().to_string();
+            let material_index = match materials.iter().position(|m| *m == material) {
+                Some(material_index) => material_index,
+                None => {
+                    materials.push(material);
+                    materials.len() - 1
+                }
+            };
+
+            vertices.extend_from_slice(&surface.vertices);
+            normals.extend_from_slice(&surface.normals);
+            colors.extend_from_slice(&surface.colors);
+            uvs.extend_from_slice(&surface.uvs);
+            polygon_loop_starts.extend(surface.polygon_loop_starts.iter().map(|s| s + loops_len));
+            polygon_loop_totals.extend_from_slice(&surface.polygon_loop_totals);
+            polygon_vertices.extend(
+                surface
+                    .polygon_vertices
+                    .iter()
+                    .map(|v| v + vertex_offset as u32),
+            );
+            polygon_material_indices
+                .extend(iter::repeat(material_index).take(surface.polygons_len));
+
+            for (bone, weights) in surface.weight_groups.iter() {
+                weight_groups
+                    .entry(*bone)
+                    .or_default()
+                    .extend(weights.iter().map(|(v, w)| (v + vertex_offset, *w)));
+            }
+
+            loops_len += surface.loops_len;
+            polygons_len += surface.polygons_len;
+        }
+
+        Self {
+            materials,
+            polygon_material_indices: Arc::new(polygon_material_indices),
+            validated: surfaces.iter().all(|s| s.validated),
+            vertices: Arc::new(vertices),
+            normals: Arc::new(normals),
+            colors: Arc::new(colors),
+            uvs: Arc::new(uvs),
+            loops_len,
+            polygons_len,
+            polygon_loop_starts: Arc::new(polygon_loop_starts),
+            polygon_loop_totals: Arc::new(polygon_loop_totals),
+            polygon_vertices: Arc::new(polygon_vertices),
+            weight_groups: Arc::new(weight_groups),
+        }
     }
 }
 
+// vertices with the same key are welded into one
+type WeldKey = ([i64; 3], [u32; 7], Vec<(u16, u32)>);
+
+// triangles that reference distinct vertices within the surface are what blender
+// checks with mesh validation, surfaces that pass can skip it
+fn triangles_validated(triangles: &[u32], vertex_count: usize) -> bool {
+    triangles.chunks_exact(3).all(|t| {
+        t[0] != t[1]
+            && t[1] != t[2]
+            && t[0] != t[2]
+            && t.iter().all(|&i| (i as usize) < vertex_count)
+    })
+}
+
 impl From<IWi> for LoadedTexture {
     fn from(iwi: IWi) -> Self {
         Self {
@@ -324,11 +992,65 @@ impl From<IWi> for LoadedTexture {
             texture_type: "".to_string().into(),
             width: iwi.width,
             height: iwi.height,
-            data: iwi.data,
+            data: Arc::new(iwi.data),
+            file_path: None,
+            content_hash: String::new(),
+            source: String::new(),
+            fingerprint: String::new(),
+            reused: false,
         }
     }
 }
 
+impl From<IWiDds> for LoadedTexture {
+    fn from(iwi_dds: IWiDds) -> Self {
+        Self {
+            name: "".to_string(),
+            texture_type: "".to_string().into(),
+            width: iwi_dds.width,
+            height: iwi_dds.height,
+            data: Arc::new(Vec::new()),
+            file_path: None,
+            content_hash: String::new(),
+            source: String::new(),
+            fingerprint: String::new(),
+            reused: false,
+        }
+    }
+}
+
+impl LoadedBone {
+    pub fn write_cache(&self, writer: &mut CacheWriter) {
+        writer.string(&self.name);
+        writer.value(self.parent);
+        for value in self.position.iter().chain(self.rotation.iter()) {
+            writer.value(*value);
+        }
+    }
+
+    pub fn read_cache(reader: &mut CacheReader) -> Result<Self> {
+        Ok(Self {
+            name: reader.string()?,
+            parent: reader.value::<i8>()?,
+            position: [reader.value()?, reader.value()?, reader.value()?],
+            rotation: [
+                reader.value()?,
+                reader.value()?,
+                reader.value()?,
+                reader.value()?,
+            ],
+        })
+    }
+}
+
+fn usizes_to_u64(values: &[usize]) -> Vec<u64> {
+    values.iter().map(|v| *v as u64).collect()
+}
+
+fn u64s_to_usize(values: Vec<u64>) -> Vec<usize> {
+    values.into_iter().map(|v| v as usize).collect()
+}
+
 impl From<XModelPartBone> for LoadedBone {
     fn from(xmodelpart_bone: XModelPartBone) -> Self {
         Self {
@@ -350,7 +1072,7 @@ impl From<IbspSurface> for LoadedSurface {
 
         let normals: Vec<[f32; 3]> = ibsp_surface.vertices.iter().map(|v| v.normal).collect();
 
-        let colors = ibsp_surface.vertices.iter().flat_map(|v| v.color).collect();
+        let colors: Vec<f32> = ibsp_surface.vertices.iter().flat_map(|v| v.color).collect();
 
         let uvs: Vec<f32> = ibsp_surface
             .triangles
@@ -368,18 +1090,22 @@ impl From<IbspSurface> for LoadedSurface {
 
         let weight_groups: HashMap<u16, HashMap<usize, f32>> = HashMap::new();
 
+        let validated = triangles_validated(&ibsp_surface.triangles, ibsp_surface.vertices.len());
+
         Self {
-            material: ibsp_surface.material,
-            vertices,
-            normals,
-            colors,
-            uvs,
+            materials: vec![ibsp_surface.material],
+            polygon_material_indices: Arc::new(Vec::new()),
+            validated,
+            vertices: Arc::new(vertices),
+            normals: Arc::new(normals),
+            colors: Arc::new(colors),
+            uvs: Arc::new(uvs),
             loops_len,
             polygons_len,
-            polygon_loop_starts,
-            polygon_loop_totals,
-            polygon_vertices: ibsp_surface.triangles,
-            weight_groups,
+            polygon_loop_starts: Arc::new(polygon_loop_starts),
+            polygon_loop_totals: Arc::new(polygon_loop_totals),
+            polygon_vertices: Arc::new(ibsp_surface.triangles),
+            weight_groups: Arc::new(weight_groups),
         }
     }
 }
@@ -398,7 +1124,7 @@ impl From<XModelSurfSurface> for LoadedSurface {
             .map(|v| v.normal)
             .collect();
 
-        let colors = xmodelsurf_surface
+        let colors: Vec<f32> = xmodelsurf_surface
             .vertices
             .iter()
             .flat_map(|v| v.color)
@@ -434,18 +1160,22 @@ impl From<XModelSurfSurface> for LoadedSurface {
             }
         }
 
+        let validated = triangles_validated(&polygon_vertices, xmodelsurf_surface.vertices.len());
+
         Self {
-            material: String::from(""),
-            vertices,
-            normals,
-            colors,
-            uvs,
+            materials: Vec::new(),
+            polygon_material_indices: Arc::new(Vec::new()),
+            validated,
+            vertices: Arc::new(vertices),
+            normals: Arc::new(normals),
+            colors: Arc::new(colors),
+            uvs: Arc::new(uvs),
             loops_len,
             polygons_len,
-            polygon_loop_starts,
-            polygon_loop_totals,
-            polygon_vertices,
-            weight_groups,
+            polygon_loop_starts: Arc::new(polygon_loop_starts),
+            polygon_loop_totals: Arc::new(polygon_loop_totals),
+            polygon_vertices: Arc::new(polygon_vertices),
+            weight_groups: Arc::new(weight_groups),
         }
     }
 }
@@ -468,7 +1198,10 @@ impl From<Ibsp> for LoadedIbsp {
             version: ibsp.version,
             materials: ibsp.materials.into_iter().map(|m| m.get_name()).collect(),
             entities: ibsp.entities.into_iter().map(|e| e.into()).collect(),
-            surfaces: ibsp.surfaces.into_iter().map(|s| s.into()).collect(),
+            surfaces: ibsp.surfaces.into_par_iter().map(|s| s.into()).collect(),
+            source: String::new(),
+            fingerprint: String::new(),
+            reused: false,
         }
     }
 }
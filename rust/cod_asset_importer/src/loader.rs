@@ -1,30 +1,48 @@
 use crate::{
     assets::{
-        ibsp::{Ibsp, IbspVersion},
-        iwi::{self, IWi},
-        material::{self, Material},
-        xmodel::{self, XModel, XModelVersion},
+        ibsp::{Ibsp, IbspSummary, IbspSurface, IbspVersion},
+        iwi::{self, IWi, IWiRaw},
+        material::{self, Material, MaterialTexture, TextureType},
+        xanim::XAnim,
+        xmodel::{self, XModel, XModelLod, XModelVersion},
         xmodelpart::{self, XModelPart},
-        xmodelsurf::{self, XModelSurf},
+        xmodelsurf::{self, XModelSurf, XModelSurfSurface},
         GameVersion,
     },
     error_log, info_log,
     loaded_assets::{
-        LoadedBone, LoadedIbsp, LoadedMaterial, LoadedModel, LoadedSurface, LoadedTexture,
+        ImportPlan, LoadedAnimation, LoadedBone, LoadedIbsp, LoadedMaterial, LoadedModel,
+        LoadedSurface, LoadedTexture, PlannedModel, PlannedTexture,
+    },
+    model_cache::ModelCache,
+    utils::{
+        dds,
+        error::Error,
+        math::{vec3_distance, Quat, Vec3},
+        path::{self, file_name},
+        Result,
     },
-    utils::{error::Error, path::file_name, Result},
 };
 use crossbeam_utils::sync::WaitGroup;
 use pyo3::{exceptions::PyBaseException, prelude::*};
-use rayon::ThreadPoolBuilder;
+use rayon::{prelude::*, ThreadPoolBuilder};
 use std::{
-    collections::{hash_map::Entry::Vacant, HashMap},
-    path::PathBuf,
+    collections::{HashMap, HashSet},
+    fs, mem,
+    path::{Path, PathBuf},
     sync::{mpsc::channel, Arc, Mutex},
     thread,
     time::{Duration, Instant},
 };
 
+// v14 models reference their textures directly by path relative to this folder
+const SKINS_ASSETPATH: &str = "skins";
+const BAKED_NORMAL_MAP: &str = ":normal";
+const CHUNKED_GEOMETRY: &str = ":chunks:";
+const WELDED_VERTICES: &str = ":weld:";
+// the most a map import reads ahead into memory, the files beyond it are read by the loaders
+const READ_AHEAD_SIZE: u64 = 256 * 1024 * 1024;
+
 #[pyclass(module = "cod_asset_importer")]
 pub struct Loader {
     importer: PyObject,
@@ -45,39 +63,131 @@ impl Loader {
         Loader { importer, threads }
     }
 
-    #[pyo3(signature = (asset_path, file_path))]
-    fn import_bsp(&self, py: Python, asset_path: &str, file_path: &str) -> PyResult<()> {
+    #[allow(clippy::too_many_arguments)]
+    #[pyo3(signature = (asset_path, file_path, lod=0, lod_reference=None, dds_path=None, fingerprints=None, merge_surfaces=false, model_cache_path=None, model_cache_size=1024, chunk_size=None, weld_tolerance=None))]
+    fn import_bsp(
+        &self,
+        py: Python,
+        asset_path: &str,
+        file_path: &str,
+        lod: usize,
+        lod_reference: Option<[f32; 3]>,
+        dds_path: Option<&str>,
+        fingerprints: Option<HashMap<String, String>>,
+        merge_surfaces: bool,
+        model_cache_path: Option<&str>,
+        model_cache_size: u64,
+        chunk_size: Option<f32>,
+        weld_tolerance: Option<f32>,
+    ) -> PyResult<()> {
         let start = Instant::now();
+        let dds_path = dds_path.map(PathBuf::from);
         let importer_ref = self.importer.as_ref(py);
+        let load_cache = LoadCache::new(
+            fingerprints.unwrap_or_default(),
+            model_cache_path,
+            model_cache_size,
+            weld_tolerance,
+        );
 
-        let loaded_ibsp = match Self::load_ibsp(PathBuf::from(file_path)) {
-            Ok(loaded_ibsp) => loaded_ibsp,
+        let pool = ThreadPoolBuilder::new()
+            .num_threads(self.threads)
+            .build()
+            .unwrap();
+
+        // the materials and entities come from the summary of the map, its geometry
+        // is loaded once the dependencies are resolved
+        let summary = match Ibsp::load_summary(PathBuf::from(file_path)) {
+            Ok(summary) => summary,
             Err(error) => {
                 error_log!("[MAP] {} - {}", file_name(PathBuf::from(file_path)), error);
                 return Err(PyBaseException::new_err(error.to_string()));
             }
         };
 
-        let ibsp_name = loaded_ibsp.name.clone();
-        let materials = loaded_ibsp.materials.clone();
-        let entities = loaded_ibsp.entities.clone();
-
         let mut version = XModelVersion::V14;
         let mut game_version = GameVersion::CoD;
-        if loaded_ibsp.version == IbspVersion::V4 as i32 {
+        if summary.version == IbspVersion::V4 as i32 {
             version = XModelVersion::V20;
             game_version = GameVersion::CoD2
         }
 
-        for material in materials {
-            let material_name = material.clone();
-            let start_material = Instant::now();
-            let loaded_material = if loaded_ibsp.version == IbspVersion::V59 as i32 {
-                Ok(LoadedMaterial::new(material, Vec::new(), version))
-            } else {
-                Self::load_material(PathBuf::from(asset_path), material, version)
-            };
+        let resolve_start = Instant::now();
+        let dependencies = pool.install(|| {
+            Self::resolve_ibsp_dependencies(
+                Path::new(asset_path),
+                &summary,
+                version,
+                game_version,
+                lod,
+                lod_reference,
+                merge_surfaces,
+                &load_cache,
+            )
+        });
+        info_log!(
+            "[DEPENDENCIES] {} files, {} bytes [{:?}]",
+            dependencies.len(),
+            dependencies.iter().map(|d| d.size).sum::<u64>(),
+            resolve_start.elapsed()
+        );
+
+        // the files are read ahead while the geometry of the map is decoded
+        let read_ahead_start = Instant::now();
+        let ((read_ahead_count, read_ahead_bytes), loaded_ibsp) = pool.install(|| {
+            rayon::join(
+                || Self::read_ahead(&dependencies, &load_cache),
+                || Self::load_ibsp(PathBuf::from(file_path), summary, chunk_size, &load_cache),
+            )
+        });
+        info_log!(
+            "[READ AHEAD] {} files, {} bytes [{:?}]",
+            read_ahead_count,
+            read_ahead_bytes,
+            read_ahead_start.elapsed()
+        );
+
+        let loaded_ibsp = match loaded_ibsp {
+            Ok(loaded_ibsp) => loaded_ibsp,
+            Err(error) => {
+                error_log!("[MAP] {} - {}", file_name(PathBuf::from(file_path)), error);
+                return Err(PyBaseException::new_err(error.to_string()));
+            }
+        };
 
+        let ibsp_name = loaded_ibsp.name.clone();
+        let materials = loaded_ibsp.materials.clone();
+        let entities = loaded_ibsp.entities.clone();
+
+        // the materials are loaded in parallel and handed to the importer in order
+        let loaded_materials: Vec<(Result<LoadedMaterial>, Duration)> = pool.install(|| {
+            materials
+                .par_iter()
+                .map(|material| {
+                    let start_material = Instant::now();
+                    let loaded_material = if loaded_ibsp.version == IbspVersion::V59 as i32 {
+                        Ok(LoadedMaterial::new(material.clone(), Vec::new(), version))
+                    } else {
+                        load_cache.materials.get_or_load(material, || {
+                            Self::load_material(
+                                PathBuf::from(asset_path),
+                                material.clone(),
+                                version,
+                                dds_path.clone(),
+                                &load_cache,
+                            )
+                        })
+                    };
+
+                    (loaded_material, start_material.elapsed())
+                })
+                .collect()
+        });
+
+        for (material_name, (loaded_material, load_duration)) in
+            materials.into_iter().zip(loaded_materials)
+        {
+            let import_start = Instant::now();
             match loaded_material {
                 Ok(loaded_material) => {
                     match importer_ref.call_method1("material", (loaded_material, false)) {
@@ -85,7 +195,7 @@ impl Loader {
                             info_log!(
                                 "[MATERIAL] {} [{:?}]",
                                 material_name,
-                                start_material.elapsed()
+                                load_duration + import_start.elapsed()
                             );
                         }
                         Err(error) => {
@@ -106,21 +216,18 @@ impl Loader {
             }
         }
 
-        let model_cache = ModelCache::new();
         let (sender, receiver) = channel::<(LoadedModel, Duration)>();
-        let pool = ThreadPoolBuilder::new()
-            .num_threads(self.threads)
-            .build()
-            .unwrap();
 
         for entity in entities {
-            let mut cache = model_cache.clone();
+            let cache = load_cache.clone();
             let sender_clone = sender.clone();
             let entity_name = entity.name.clone();
             let entity_asset_path = PathBuf::from(asset_path);
             let entity_path = PathBuf::from(asset_path)
                 .join(xmodel::ASSETPATH)
                 .join(entity.name);
+            let entity_dds_path = dds_path.clone();
+            let entity_lod = LodSelection::for_entity(lod, lod_reference, entity.origin);
 
             pool.spawn(move || {
                 let load_start = Instant::now();
@@ -129,7 +236,10 @@ impl Loader {
                     entity_path,
                     entity_name.clone(),
                     game_version,
-                    &mut cache,
+                    entity_lod,
+                    entity_dds_path,
+                    merge_surfaces,
+                    &cache,
                 ) {
                     Ok(loaded_model) => loaded_model,
                     Err(error) => {
@@ -165,12 +275,15 @@ impl Loader {
             }
         }
 
+        load_cache.report_weld();
+        load_cache.report_shared_textures();
+        load_cache.evict_model_cache();
         info_log!("[MAP] {} [{:?}]", ibsp_name, start.elapsed());
         Ok(())
     }
 
     #[allow(clippy::too_many_arguments)]
-    #[pyo3(signature = (asset_path, file_path, selected_version, angles, origin, scale))]
+    #[pyo3(signature = (asset_path, file_path, selected_version, angles, origin, scale, lod=0, dds_path=None, fingerprints=None, merge_surfaces=false, model_cache_path=None, model_cache_size=1024, weld_tolerance=None))]
     fn import_xmodel(
         &self,
         py: Python,
@@ -180,16 +293,39 @@ impl Loader {
         angles: [f32; 3],
         origin: [f32; 3],
         scale: [f32; 3],
+        lod: usize,
+        dds_path: Option<&str>,
+        fingerprints: Option<HashMap<String, String>>,
+        merge_surfaces: bool,
+        model_cache_path: Option<&str>,
+        model_cache_size: u64,
+        weld_tolerance: Option<f32>,
     ) -> PyResult<()> {
         let start = Instant::now();
 
         let importer_ref = self.importer.as_ref(py);
+        let load_cache = LoadCache::new(
+            fingerprints.unwrap_or_default(),
+            model_cache_path,
+            model_cache_size,
+            weld_tolerance,
+        );
+        let pool = ThreadPoolBuilder::new()
+            .num_threads(self.threads)
+            .build()
+            .unwrap();
 
-        let mut loaded_model = match Self::load_xmodel(
-            PathBuf::from(asset_path),
-            PathBuf::from(file_path),
-            selected_version,
-        ) {
+        let mut loaded_model = match pool.install(|| {
+            Self::load_xmodel(
+                PathBuf::from(asset_path),
+                PathBuf::from(file_path),
+                selected_version,
+                LodSelection::Index(lod),
+                dds_path.map(PathBuf::from),
+                merge_surfaces,
+                &load_cache,
+            )
+        }) {
             Ok(loaded_model) => loaded_model,
             Err(error) => {
                 error_log!(
@@ -200,6 +336,9 @@ impl Loader {
                 return Err(PyBaseException::new_err(error.to_string()));
             }
         };
+        load_cache.report_weld();
+        load_cache.report_shared_textures();
+        load_cache.evict_model_cache();
 
         loaded_model.set_angles(angles);
         loaded_model.set_origin(origin);
@@ -217,182 +356,1322 @@ impl Loader {
             }
         }
     }
+
+    #[allow(clippy::too_many_arguments)]
+    #[pyo3(signature = (asset_path, file_paths, selected_version, lod=0, dds_path=None, fingerprints=None, merge_surfaces=false, model_cache_path=None, model_cache_size=1024, weld_tolerance=None))]
+    fn import_xmodels(
+        &self,
+        py: Python,
+        asset_path: &str,
+        file_paths: Vec<String>,
+        selected_version: GameVersion,
+        lod: usize,
+        dds_path: Option<&str>,
+        fingerprints: Option<HashMap<String, String>>,
+        merge_surfaces: bool,
+        model_cache_path: Option<&str>,
+        model_cache_size: u64,
+        weld_tolerance: Option<f32>,
+    ) -> PyResult<()> {
+        let start = Instant::now();
+        let dds_path = dds_path.map(PathBuf::from);
+        let importer_ref = self.importer.as_ref(py);
+
+        let model_count = file_paths.len();
+        let load_cache = LoadCache::new(
+            fingerprints.unwrap_or_default(),
+            model_cache_path,
+            model_cache_size,
+            weld_tolerance,
+        );
+        let (sender, receiver) = channel::<(LoadedModel, Duration)>();
+        let pool = ThreadPoolBuilder::new()
+            .num_threads(self.threads)
+            .build()
+            .unwrap();
+
+        for file_path in file_paths {
+            let cache = load_cache.clone();
+            let sender_clone = sender.clone();
+            let model_asset_path = PathBuf::from(asset_path);
+            let model_dds_path = dds_path.clone();
+
+            pool.spawn(move || {
+                let load_start = Instant::now();
+                let loaded_model = match Self::load_xmodel(
+                    model_asset_path,
+                    PathBuf::from(&file_path),
+                    selected_version,
+                    LodSelection::Index(lod),
+                    model_dds_path,
+                    merge_surfaces,
+                    &cache,
+                ) {
+                    Ok(loaded_model) => loaded_model,
+                    Err(error) => {
+                        error_log!(
+                            "[MODEL] {} - {}",
+                            file_name(PathBuf::from(file_path)),
+                            error
+                        );
+                        return;
+                    }
+                };
+
+                sender_clone
+                    .send((loaded_model, load_start.elapsed()))
+                    .unwrap();
+            });
+        }
+
+        drop(sender);
+
+        for (loaded_model, load_duration) in receiver {
+            let import_start = Instant::now();
+            let model_name = loaded_model.name.clone();
+            match importer_ref.call_method1("xmodel", (loaded_model,)) {
+                Ok(_) => {
+                    let model_duration = load_duration + import_start.elapsed();
+                    info_log!("[MODEL] {} [{:?}]", model_name, model_duration);
+                }
+                Err(error) => {
+                    error_log!("[MODEL] {} - {}", model_name, error);
+                }
+            }
+        }
+
+        load_cache.report_weld();
+        load_cache.report_shared_textures();
+        load_cache.evict_model_cache();
+        info_log!("[MODELS] {} [{:?}]", model_count, start.elapsed());
+        Ok(())
+    }
+
+    #[pyo3(signature = (file_path, rest_poses))]
+    fn import_xanim(
+        &self,
+        py: Python,
+        file_path: &str,
+        rest_poses: HashMap<String, (Vec3, Quat)>,
+    ) -> PyResult<()> {
+        let start = Instant::now();
+        let importer_ref = self.importer.as_ref(py);
+
+        let loaded_animation = match Self::load_xanim(PathBuf::from(file_path), &rest_poses) {
+            Ok(loaded_animation) => loaded_animation,
+            Err(error) => {
+                error_log!(
+                    "[XANIM] {} - {}",
+                    file_name(PathBuf::from(file_path)),
+                    error
+                );
+                return Err(PyBaseException::new_err(error.to_string()));
+            }
+        };
+
+        let animation_name = loaded_animation.name.clone();
+        match importer_ref.call_method1("xanim", (loaded_animation,)) {
+            Ok(_) => {
+                info_log!("[XANIM] {} [{:?}]", animation_name, start.elapsed());
+                Ok(())
+            }
+            Err(error) => {
+                error_log!("[XANIM] {} - {}", animation_name, error);
+                Err(error)
+            }
+        }
+    }
+
+    // dry run of import_bsp, reads the headers of the map and its dependencies only
+    #[pyo3(signature = (asset_path, file_path, lod=0, lod_reference=None))]
+    fn plan_bsp(
+        &self,
+        asset_path: &str,
+        file_path: &str,
+        lod: usize,
+        lod_reference: Option<[f32; 3]>,
+    ) -> PyResult<ImportPlan> {
+        let start = Instant::now();
+        let summary = match Ibsp::load_summary(PathBuf::from(file_path)) {
+            Ok(summary) => summary,
+            Err(error) => {
+                error_log!("[PLAN] {} - {}", file_name(PathBuf::from(file_path)), error);
+                return Err(PyBaseException::new_err(error.to_string()));
+            }
+        };
+
+        let plan = Self::plan_ibsp_dependencies(Path::new(asset_path), summary, lod, lod_reference);
+        info_log!("[PLAN] {} [{:?}]", plan.name, start.elapsed());
+        Ok(plan)
+    }
+
+    // dry run of import_xmodel, reads the headers of the model and its dependencies only
+    #[pyo3(signature = (asset_path, file_path, selected_version, lod=0))]
+    fn plan_xmodel(
+        &self,
+        asset_path: &str,
+        file_path: &str,
+        selected_version: GameVersion,
+        lod: usize,
+    ) -> PyResult<ImportPlan> {
+        let start = Instant::now();
+        let file_path = PathBuf::from(file_path);
+        let model_name = file_name(file_path.clone());
+
+        let mut planner = ImportPlanner::new(Path::new(asset_path), model_name.clone());
+        planner.model(
+            &model_name,
+            file_path,
+            selected_version,
+            LodSelection::Index(lod),
+        );
+        let plan = planner.finish();
+
+        info_log!("[PLAN] {} [{:?}]", plan.name, start.elapsed());
+        Ok(plan)
+    }
 }
 
 impl Loader {
-    fn load_ibsp(file_path: PathBuf) -> Result<LoadedIbsp> {
-        let ibsp = Ibsp::load(file_path)?;
-        Ok(ibsp.into())
+    fn load_xanim(
+        file_path: PathBuf,
+        rest_poses: &HashMap<String, (Vec3, Quat)>,
+    ) -> Result<LoadedAnimation> {
+        let xanim = XAnim::load(file_path)?;
+        Ok(LoadedAnimation::new(xanim, rest_poses))
+    }
+
+    fn load_ibsp(
+        file_path: PathBuf,
+        summary: IbspSummary,
+        chunk_size: Option<f32>,
+        cache: &LoadCache,
+    ) -> Result<LoadedIbsp> {
+        if chunk_size.is_some_and(|chunk_size| chunk_size <= 0.0) {
+            return Err(Error::new(format!(
+                "invalid chunk size {}",
+                chunk_size.unwrap()
+            )));
+        }
+
+        let source = file_path.to_string_lossy().to_string();
+        let mut fingerprint = path::fingerprint(&[&file_path]);
+
+        // chunked geometry is split differently than the triangle soups, the meshes
+        // of imports with other chunk sizes are rebuilt
+        if let Some(chunk_size) = chunk_size {
+            fingerprint.push_str(&format!("{}{}", CHUNKED_GEOMETRY, chunk_size));
+        }
+        cache.weld_fingerprint(&mut fingerprint);
+
+        // the entities and materials are always needed, the geometry only when it
+        // changed. the lumps of an unchanged map's geometry are not read at all
+        let reused = cache.is_current(&source, &fingerprint);
+        let mut ibsp = match reused {
+            true => Ibsp {
+                name: summary.name,
+                version: summary.version,
+                materials: summary.materials,
+                entities: summary.entities,
+                surfaces: Vec::new(),
+            },
+            false => Ibsp::load(file_path)?,
+        };
+
+        // every chunk is a single surface with a material slot for each of its materials
+        let chunks = chunk_size.map(|chunk_size| {
+            IbspSurface::chunk(mem::take(&mut ibsp.surfaces), chunk_size)
+                .into_par_iter()
+                .map(|chunk| {
+                    let surfaces: Vec<LoadedSurface> =
+                        chunk.into_iter().map(|s| s.into()).collect();
+                    LoadedSurface::merge(&surfaces)
+                })
+                .collect()
+        });
+
+        let mut loaded_ibsp: LoadedIbsp = ibsp.into();
+        if let Some(chunks) = chunks {
+            loaded_ibsp.surfaces = chunks;
+        }
+        cache.weld(&mut loaded_ibsp.surfaces, true);
+        loaded_ibsp.source = source;
+        loaded_ibsp.fingerprint = fingerprint;
+        loaded_ibsp.reused = reused;
+        Ok(loaded_ibsp)
+    }
+
+    // walks the files a map import is going to read before any of them is loaded, in the
+    // order they are needed. the xmodel headers and material files are parsed in parallel
+    // and kept in the load cache for the loaders. the geometry of models and the textures
+    // the scene or the model cache already hold are left out, those files are not read
+    #[allow(clippy::too_many_arguments)]
+    fn resolve_ibsp_dependencies(
+        asset_path: &Path,
+        summary: &IbspSummary,
+        version: XModelVersion,
+        game_version: GameVersion,
+        lod: usize,
+        lod_reference: Option<Vec3>,
+        merge_surfaces: bool,
+        cache: &LoadCache,
+    ) -> Vec<Dependency> {
+        let mut dependencies = Dependencies::new();
+        let mut materials: Vec<(String, XModelVersion)> = Vec::new();
+
+        if summary.version != IbspVersion::V59 as i32 {
+            for material in &summary.materials {
+                materials.push((material.get_name(), version));
+            }
+        }
+
+        let mut model_names: Vec<&String> = summary.entities.iter().map(|e| &e.name).collect();
+        model_names.sort();
+        model_names.dedup();
+        let xmodels: HashMap<&String, Option<Arc<XModel>>> = model_names
+            .into_par_iter()
+            .map(|model_name| {
+                let xmodel_file_path = asset_path.join(xmodel::ASSETPATH).join(model_name);
+                (
+                    model_name,
+                    cache.xmodel(xmodel_file_path, game_version).ok(),
+                )
+            })
+            .collect();
+
+        let mut models: Vec<PathBuf> = Vec::new();
+        for entity in &summary.entities {
+            let xmodel_file_path = asset_path.join(xmodel::ASSETPATH).join(&entity.name);
+            dependencies.insert(xmodel_file_path.clone(), false);
+
+            let Some(xmodel) = &xmodels[&entity.name] else {
+                continue;
+            };
+
+            let lod_index =
+                LodSelection::for_entity(lod, lod_reference, entity.origin).resolve(xmodel);
+            let xmodel_lod = &xmodel.lods[lod_index];
+
+            // the lod is already resolved through another entity
+            if !dependencies.resolve(format!("{}:{}", entity.name, lod_index)) {
+                continue;
+            }
+
+            let xmodelpart_file_path = asset_path
+                .join(xmodelpart::ASSETPATH)
+                .join(&xmodel_lod.name);
+            let xmodelsurf_file_path = asset_path
+                .join(xmodelsurf::ASSETPATH)
+                .join(&xmodel_lod.name);
+            let (source, fingerprint) = Self::xmodel_lod_source(
+                &xmodel_file_path,
+                &xmodelpart_file_path,
+                &xmodelsurf_file_path,
+                lod_index,
+                merge_surfaces,
+                cache,
+            );
+
+            // lods that are current in the scene read their bones only, the model cache
+            // holds both the bones and the surfaces
+            if cache.is_current(&source, &fingerprint) {
+                models.push(xmodelpart_file_path);
+            } else if !cache
+                .model_cache
+                .as_ref()
+                .is_some_and(|model_cache| model_cache.contains(&source, &fingerprint))
+            {
+                models.push(xmodelpart_file_path);
+                models.push(xmodelsurf_file_path);
+            }
+
+            for material in &xmodel_lod.materials {
+                match xmodel.version {
+                    XModelVersion::V14 => {
+                        dependencies.insert(asset_path.join(SKINS_ASSETPATH).join(material), false);
+                    }
+                    _ => materials.push((material.clone(), xmodel.version)),
+                }
+            }
+        }
+
+        // the materials and their textures are loaded ahead of the model geometry, the
+        // materials of the map first
+        let mut material_names: HashSet<String> = HashSet::new();
+        materials.retain(|(material, _)| material_names.insert(material.clone()));
+        let material_textures: Vec<Vec<(PathBuf, String, String)>> = materials
+            .par_iter()
+            .map(|(material_name, version)| {
+                let material_file_path = asset_path.join(material::ASSETPATH).join(material_name);
+                match cache.material_file(material_file_path, *version) {
+                    Ok(material) => material
+                        .textures
+                        .iter()
+                        .map(|texture| Self::texture_source(asset_path, texture))
+                        .collect(),
+                    Err(_) => Vec::new(),
+                }
+            })
+            .collect();
+
+        for ((material_name, _), textures) in materials.iter().zip(material_textures) {
+            dependencies.insert(
+                asset_path.join(material::ASSETPATH).join(material_name),
+                false,
+            );
+            for (texture_file_path, texture_source, texture_fingerprint) in textures {
+                if !cache.is_current(&texture_source, &texture_fingerprint) {
+                    dependencies.insert(texture_file_path, true);
+                }
+            }
+        }
+
+        for model_file_path in models {
+            dependencies.insert(model_file_path, true);
+        }
+
+        // missing files are skipped, they are reported by the loaders later
+        dependencies
+            .file_paths
+            .into_par_iter()
+            .filter_map(|(file_path, read_ahead)| {
+                let size = fs::metadata(&file_path).ok()?.len();
+                Some(Dependency {
+                    file_path,
+                    size,
+                    read_ahead,
+                })
+            })
+            .collect()
+    }
+
+    // reads the files the loaders parse in full into the load cache, in the order they
+    // are needed and in parallel, up to READ_AHEAD_SIZE bytes. the loaders take their
+    // buffers from there instead of reading the files themselves. returns the number
+    // of files that are read ahead and their total size
+    fn read_ahead(dependencies: &[Dependency], cache: &LoadCache) -> (usize, u64) {
+        let mut size = 0;
+        let file_paths: Vec<&PathBuf> = dependencies
+            .iter()
+            .filter(|dependency| dependency.read_ahead)
+            .take_while(|dependency| {
+                size += dependency.size;
+                size <= READ_AHEAD_SIZE
+            })
+            .map(|dependency| &dependency.file_path)
+            .collect();
+
+        let buffers: Vec<(PathBuf, Vec<u8>)> = file_paths
+            .into_par_iter()
+            .filter_map(|file_path| {
+                fs::read(file_path)
+                    .ok()
+                    .map(|data| (file_path.clone(), data))
+            })
+            .collect();
+
+        let count = buffers.len();
+        let size = buffers.iter().map(|(_, data)| data.len() as u64).sum();
+        cache.read_ahead.lock().unwrap().extend(buffers);
+
+        (count, size)
+    }
+
+    fn plan_ibsp_dependencies(
+        asset_path: &Path,
+        summary: IbspSummary,
+        lod: usize,
+        lod_reference: Option<Vec3>,
+    ) -> ImportPlan {
+        let mut planner = ImportPlanner::new(asset_path, summary.name);
+        planner.plan.surfaces = summary.surface_count;
+        planner.plan.vertices = summary.vertex_count;
+        planner.plan.triangles = summary.triangle_count;
+
+        let mut version = XModelVersion::V14;
+        let mut game_version = GameVersion::CoD;
+        if summary.version == IbspVersion::V4 as i32 {
+            version = XModelVersion::V20;
+            game_version = GameVersion::CoD2
+        }
+
+        // the materials of v59 maps are names only, there are no files to read
+        for material in &summary.materials {
+            if summary.version == IbspVersion::V59 as i32 {
+                planner.material_name(&material.get_name());
+            } else {
+                planner.material(&material.get_name(), version);
+            }
+        }
+
+        for entity in &summary.entities {
+            let xmodel_file_path = asset_path.join(xmodel::ASSETPATH).join(&entity.name);
+            planner.model(
+                &entity.name,
+                xmodel_file_path,
+                game_version,
+                LodSelection::for_entity(lod, lod_reference, entity.origin),
+            );
+        }
+
+        planner.finish()
     }
 
     fn load_xmodel(
         asset_path: PathBuf,
         file_path: PathBuf,
         selected_version: GameVersion,
+        lod: LodSelection,
+        dds_path: Option<PathBuf>,
+        merge_surfaces: bool,
+        cache: &LoadCache,
     ) -> Result<LoadedModel> {
         let xmodel = XModel::load(file_path, selected_version)?;
-        let lod0 = xmodel.lods[0].clone();
+        let lod_index = lod.resolve(&xmodel);
+        Self::load_xmodel_lod(
+            asset_path,
+            &xmodel,
+            lod_index,
+            dds_path,
+            merge_surfaces,
+            cache,
+            true,
+        )
+    }
 
+    // the entities of a map are loaded through the model cache by load_xmodel_cached and
+    // are loaded serially. a thread that waits on a parallel load could otherwise steal a
+    // task which waits on the model that thread is loading. single and batch imports load
+    // in parallel, the closures they run through the material and texture caches never
+    // run rayon work on the loader pool, normal maps are baked on a pool of their own.
+    // so no thread of the loader pool waits on a key while it steals
+    fn load_xmodel_lod(
+        asset_path: PathBuf,
+        xmodel: &XModel,
+        lod_index: usize,
+        dds_path: Option<PathBuf>,
+        merge_surfaces: bool,
+        cache: &LoadCache,
+        parallel: bool,
+    ) -> Result<LoadedModel> {
+        let lod = xmodel.lods[lod_index].clone();
+
+        let xmodel_file_path = asset_path.join(xmodel::ASSETPATH).join(&xmodel.name);
         let xmodelpart_file_path = asset_path
             .join(xmodelpart::ASSETPATH)
-            .join(lod0.name.clone());
+            .join(lod.name.clone());
+        let xmodelsurf_file_path = asset_path.join(xmodelsurf::ASSETPATH).join(&lod.name);
 
-        let xmodelpart = match XModelPart::load(xmodelpart_file_path) {
-            Ok(xmodelpart) => Some(xmodelpart),
-            Err(error) => {
-                error_log!("[XMODELPART] {} - {}", lod0.name.clone(), error);
-                None
-            }
-        };
+        let (source, fingerprint) = Self::xmodel_lod_source(
+            &xmodel_file_path,
+            &xmodelpart_file_path,
+            &xmodelsurf_file_path,
+            lod_index,
+            merge_surfaces,
+            cache,
+        );
+        let reused = cache.is_current(&source, &fingerprint);
 
-        let xmodelsurf_file_path = asset_path.join(xmodelsurf::ASSETPATH).join(lod0.name);
-        let xmodelsurf = XModelSurf::load(xmodelsurf_file_path, xmodelpart.clone())?;
+        // the model cache holds the converted surfaces and bones of unchanged files
+        let cached = match (&cache.model_cache, reused) {
+            (Some(model_cache), false) => model_cache.read(&source, &fingerprint),
+            _ => None,
+        };
+        let load_files = cached.is_none();
 
-        let mut loaded_materials: HashMap<String, LoadedMaterial> = HashMap::new();
-        for mat in lod0.materials.clone() {
-            if let Vacant(entry) = loaded_materials.entry(mat.clone()) {
-                match xmodel.version {
-                    XModelVersion::V14 => {
-                        entry.insert(LoadedMaterial::new(mat, Vec::new(), xmodel.version));
-                    }
-                    _ => {
-                        let loaded_material = match Self::load_material(
-                            asset_path.clone(),
-                            mat.clone(),
-                            xmodel.version,
-                        ) {
-                            Ok(material) => material,
+        // the bones are applied to the surfaces after both files are loaded
+        let ((xmodelpart, xmodelsurf), loaded_materials) = Self::join(
+            parallel,
+            || {
+                Self::join(
+                    parallel,
+                    || match load_files {
+                        true => match cache
+                            .read_file(&xmodelpart_file_path)
+                            .and_then(|data| XModelPart::load(xmodelpart_file_path, data))
+                        {
+                            Ok(xmodelpart) => Some(xmodelpart),
                             Err(error) => {
-                                error_log!("[MATERIAL] {} - {}", mat, error);
-                                continue;
+                                error_log!("[XMODELPART] {} - {}", lod.name.clone(), error);
+                                None
                             }
+                        },
+                        false => None,
+                    },
+                    || match load_files && !reused {
+                        true => cache
+                            .read_file(&xmodelsurf_file_path)
+                            .and_then(|data| XModelSurf::load(xmodelsurf_file_path, data))
+                            .map(Some),
+                        false => Ok(None),
+                    },
+                )
+            },
+            || Self::load_xmodel_materials(&asset_path, xmodel, &lod, &dds_path, cache, parallel),
+        );
+
+        let (surfaces, bones) = match cached {
+            Some((surfaces, bones)) => (surfaces, bones),
+            None => {
+                let mut surfaces: Vec<LoadedSurface> = match xmodelsurf? {
+                    Some(mut xmodelsurf) => {
+                        if let Some(xmodelpart) = &xmodelpart {
+                            xmodelsurf.apply_bone_transforms(xmodelpart);
+                        }
+
+                        let load_surface = |(i, s): (usize, XModelSurfSurface)| {
+                            let mut loaded_surface: LoadedSurface = s.into();
+                            loaded_surface.set_material(lod.materials[i].clone());
+
+                            loaded_surface
                         };
 
-                        entry.insert(loaded_material);
+                        match parallel {
+                            true => xmodelsurf
+                                .surfaces
+                                .into_par_iter()
+                                .enumerate()
+                                .map(load_surface)
+                                .collect(),
+                            false => xmodelsurf
+                                .surfaces
+                                .into_iter()
+                                .enumerate()
+                                .map(load_surface)
+                                .collect(),
+                        }
+                    }
+                    None => Vec::new(),
+                };
+
+                if merge_surfaces && surfaces.len() > 1 {
+                    surfaces = vec![LoadedSurface::merge(&surfaces)];
+                }
+                cache.weld(&mut surfaces, parallel);
+
+                // models whose files failed to load are not cached
+                let loaded = xmodelpart.is_some() && !reused;
+                let bones: Vec<LoadedBone> = match xmodelpart {
+                    Some(xmodelpart) => xmodelpart.bones.into_iter().map(|b| b.into()).collect(),
+                    None => Vec::new(),
+                };
+
+                if let (Some(model_cache), true) = (&cache.model_cache, loaded) {
+                    if let Err(error) = model_cache.write(&source, &fingerprint, &surfaces, &bones)
+                    {
+                        error_log!("[MODEL CACHE] {} - {}", xmodel.name, error);
                     }
                 }
+
+                (surfaces, bones)
             }
-        }
+        };
 
-        Ok(LoadedModel::new(
-            xmodel.name,
+        let mut loaded_model = LoadedModel::new(
+            xmodel.name.clone(),
             xmodel.version,
             [0f32; 3],
             [0f32; 3],
             [1f32; 3],
             loaded_materials,
-            xmodelsurf
-                .surfaces
-                .into_iter()
-                .enumerate()
-                .map(|(i, s)| {
-                    let mut loaded_surface: LoadedSurface = s.into();
-                    loaded_surface.set_material(lod0.materials[i].clone());
-
-                    loaded_surface
-                })
-                .collect(),
-            match xmodelpart {
-                Some(xmodelpart) => xmodelpart.bones.into_iter().map(|b| b.into()).collect(),
-                None => Vec::<LoadedBone>::new(),
+            surfaces,
+            bones,
+        );
+        loaded_model.set_source(source, fingerprint);
+        if reused {
+            loaded_model.set_reused();
+        }
+
+        Ok(loaded_model)
+    }
+
+    fn xmodel_lod_source(
+        xmodel_file_path: &Path,
+        xmodelpart_file_path: &Path,
+        xmodelsurf_file_path: &Path,
+        lod_index: usize,
+        merge_surfaces: bool,
+        cache: &LoadCache,
+    ) -> (String, String) {
+        // merged and separate surfaces are different meshes in blender
+        let mut source = format!("{}:{}", xmodel_file_path.to_string_lossy(), lod_index);
+        if merge_surfaces {
+            source.push_str(":merged");
+        }
+        let mut fingerprint =
+            path::fingerprint(&[xmodel_file_path, xmodelpart_file_path, xmodelsurf_file_path]);
+        cache.weld_fingerprint(&mut fingerprint);
+
+        (source, fingerprint)
+    }
+
+    fn load_xmodel_materials(
+        asset_path: &Path,
+        xmodel: &XModel,
+        lod: &XModelLod,
+        dds_path: &Option<PathBuf>,
+        cache: &LoadCache,
+        parallel: bool,
+    ) -> HashMap<String, LoadedMaterial> {
+        let mut material_names: Vec<String> = Vec::new();
+        for mat in lod.materials.iter() {
+            if !material_names.contains(mat) {
+                material_names.push(mat.clone());
+            }
+        }
+
+        let load_material = |mat: &String| match xmodel.version {
+            XModelVersion::V14 => {
+                let skin_file_path = asset_path.join(SKINS_ASSETPATH).join(mat);
+                let mut loaded_material =
+                    LoadedMaterial::new(mat.clone(), Vec::new(), xmodel.version);
+                loaded_material.set_source(
+                    skin_file_path.to_string_lossy().to_string(),
+                    path::fingerprint(&[&skin_file_path]),
+                );
+                Some((mat.clone(), loaded_material))
+            }
+            _ => match cache.materials.get_or_load(mat, || {
+                Self::load_material(
+                    asset_path.to_path_buf(),
+                    mat.clone(),
+                    xmodel.version,
+                    dds_path.clone(),
+                    cache,
+                )
+            }) {
+                Ok(material) => Some((mat.clone(), material)),
+                Err(error) => {
+                    error_log!("[MATERIAL] {} - {}", mat, error);
+                    None
+                }
             },
-        ))
+        };
+
+        match parallel {
+            true => material_names
+                .par_iter()
+                .filter_map(load_material)
+                .collect(),
+            false => material_names.iter().filter_map(load_material).collect(),
+        }
     }
 
+    fn join<A, B, RA, RB>(parallel: bool, a: A, b: B) -> (RA, RB)
+    where
+        A: FnOnce() -> RA + Send,
+        B: FnOnce() -> RB + Send,
+        RA: Send,
+        RB: Send,
+    {
+        match parallel {
+            true => rayon::join(a, b),
+            false => (a(), b()),
+        }
+    }
+
+    #[allow(clippy::too_many_arguments)]
     fn load_xmodel_cached(
         asset_path: PathBuf,
         file_path: PathBuf,
         model_name: String,
         selected_version: GameVersion,
-        cache: &mut ModelCache,
+        lod: LodSelection,
+        dds_path: Option<PathBuf>,
+        merge_surfaces: bool,
+        cache: &LoadCache,
     ) -> Result<LoadedModel> {
-        match cache.get_model(&model_name) {
-            Some(cached_model) => match cached_model {
-                CachedModel::Cached(model) => Ok(model),
-                CachedModel::Loading(wg) => {
-                    wg.wait();
-
-                    let cached_model = cache.get_model(&model_name).unwrap();
-                    let CachedModel::Cached(model) = cached_model else {
-                        panic!("model {} still not cached\n", model_name);
-                    };
-
-                    Ok(model.clone())
-                }
-            },
-            None => {
-                let wg = WaitGroup::new();
-                cache.set_model(&model_name, CachedModel::Loading(wg.clone()));
+        // the header is read once per model, the lod of each instance is resolved
+        // from it before the cache key can be built
+        let xmodel = cache.xmodel(file_path, selected_version)?;
+        let lod_index = lod.resolve(&xmodel);
+        let cache_key = format!("{}:{}", model_name, lod_index);
 
-                let loaded_model = match Self::load_xmodel(asset_path, file_path, selected_version)
-                {
-                    Ok(loaded_model) => loaded_model,
-                    Err(error) => {
-                        error_log!("[MODEL] {} - {}", model_name, error);
-                        return Err(Error::new(error.to_string()));
-                    }
-                };
-
-                cache.set_model(&model_name, CachedModel::Cached(loaded_model.clone()));
-                drop(wg);
-                Ok(loaded_model.clone())
-            }
-        }
+        cache.models.get_or_load(&cache_key, || {
+            Self::load_xmodel_lod(
+                asset_path,
+                &xmodel,
+                lod_index,
+                dds_path,
+                merge_surfaces,
+                cache,
+                false,
+            )
+        })
     }
 
     fn load_material(
         asset_path: PathBuf,
         material_name: String,
         version: XModelVersion,
+        dds_path: Option<PathBuf>,
+        cache: &LoadCache,
     ) -> Result<LoadedMaterial> {
         let material_file_path = asset_path.join(material::ASSETPATH).join(&material_name);
-        let material = Material::load(material_file_path, version)?;
+        let mut material_fingerprint = path::fingerprint(&[&material_file_path]);
+        let material_source = material_file_path.to_string_lossy().to_string();
+        let material = cache.material_file(material_file_path, version)?;
+
+        // normal maps are baked while decoding, their fingerprints differ from the
+        // ones of unbaked imports so those are rebuilt
+        if material
+            .textures
+            .iter()
+            .any(|t| matches!(t.texture_type, TextureType::Normal))
+        {
+            material_fingerprint.push_str(BAKED_NORMAL_MAP);
+        }
 
         let mut loaded_textures: Vec<LoadedTexture> = Vec::new();
-        for texture in material.textures {
-            let mut texture_file_path = asset_path.join(iwi::ASSETPATH).join(&texture.name);
-            texture_file_path.set_extension("iwi");
-            let mut loaded_texture: LoadedTexture = match IWi::load(texture_file_path) {
-                Ok(iwi) => iwi.into(),
+        for texture in &material.textures {
+            let (texture_file_path, texture_source, texture_fingerprint) =
+                Self::texture_source(&asset_path, &texture);
+            let mut texture_key = texture.name.clone();
+
+            let normal_map = matches!(texture.texture_type, TextureType::Normal);
+            if normal_map {
+                texture_key.push_str(BAKED_NORMAL_MAP);
+            }
+
+            let loaded_texture = cache.textures.get_or_load(&texture_key, || {
+                if cache.is_current(&texture_source, &texture_fingerprint) {
+                    return Ok(LoadedTexture::new_reused());
+                }
+
+                // textures are keyed by the content of their highest mipmap, identical
+                // textures stored under different names are decoded once and share
+                // their data
+                let iwi_raw = IWi::load_raw(cache.read_file(&texture_file_path)?)?;
+                let mut content_hash = format!("{:016x}", iwi_raw.content_hash());
+                if normal_map {
+                    content_hash.push_str(BAKED_NORMAL_MAP);
+                }
+
+                let mut decoded = false;
+                let mut loaded_texture =
+                    cache.texture_contents.get_or_load(&content_hash, || {
+                        decoded = true;
+
+                        // the channels of compressed normal maps can not be baked, those are decoded
+                        match (&dds_path, normal_map) {
+                            (_, true) => iwi_raw.decode_normal_map().map(|iwi| iwi.into()),
+                            (Some(dds_path), false) => {
+                                Self::load_dds_texture(dds_path, iwi_raw, &texture.name)
+                            }
+                            (None, false) => iwi_raw.decode().map(|iwi| iwi.into()),
+                        }
+                    })?;
+
+                if !decoded {
+                    *cache.shared_textures.lock().unwrap() += 1;
+                }
+
+                loaded_texture.set_content_hash(content_hash);
+                Ok(loaded_texture)
+            });
+
+            let mut loaded_texture = match loaded_texture {
+                Ok(loaded_texture) => loaded_texture,
                 Err(error) => {
                     error_log!("[IWI] {} - {}", texture.name, error);
                     continue;
                 }
             };
 
-            loaded_texture.set_name(texture.name);
+            loaded_texture.set_name(texture.name.clone());
             loaded_texture.set_texture_type(texture.texture_type);
+            loaded_texture.set_source(texture_source, texture_fingerprint);
             loaded_textures.push(loaded_texture);
         }
 
-        Ok(LoadedMaterial::new(material_name, loaded_textures, version))
+        let mut loaded_material = LoadedMaterial::new(material_name, loaded_textures, version);
+        loaded_material.set_source(material_source, material_fingerprint);
+        Ok(loaded_material)
+    }
+
+    // normal maps are baked while decoding, their fingerprints differ from the ones of
+    // unbaked imports so those are rebuilt
+    fn texture_source(asset_path: &Path, texture: &MaterialTexture) -> (PathBuf, String, String) {
+        let mut texture_file_path = asset_path.join(iwi::ASSETPATH).join(&texture.name);
+        texture_file_path.set_extension("iwi");
+        let texture_source = texture_file_path.to_string_lossy().to_string();
+        let mut texture_fingerprint = path::fingerprint(&[&texture_file_path]);
+        if matches!(texture.texture_type, TextureType::Normal) {
+            texture_fingerprint.push_str(BAKED_NORMAL_MAP);
+        }
+
+        (texture_file_path, texture_source, texture_fingerprint)
+    }
+
+    fn load_dds_texture(
+        dds_path: &Path,
+        iwi_raw: IWiRaw,
+        texture_name: &str,
+    ) -> Result<LoadedTexture> {
+        let iwi_dds = iwi_raw.encode_dds()?;
+        let dds_file_path = dds::write(dds_path, texture_name, &iwi_dds.data)?;
+
+        let mut loaded_texture: LoadedTexture = iwi_dds.into();
+        loaded_texture.set_file_path(dds_file_path.to_string_lossy().to_string());
+        Ok(loaded_texture)
+    }
+}
+
+#[derive(Clone, Copy)]
+enum LodSelection {
+    Index(usize),
+    Distance(f32),
+}
+
+impl LodSelection {
+    fn for_entity(lod: usize, lod_reference: Option<Vec3>, origin: Vec3) -> Self {
+        match lod_reference {
+            Some(reference) => LodSelection::Distance(vec3_distance(origin, reference)),
+            None => LodSelection::Index(lod),
+        }
+    }
+
+    fn resolve(&self, xmodel: &XModel) -> usize {
+        match *self {
+            LodSelection::Index(lod) => xmodel.lod_index(lod),
+            LodSelection::Distance(distance) => xmodel.lod_index_for_distance(distance),
+        }
+    }
+}
+
+struct Dependency {
+    file_path: PathBuf,
+    size: u64,
+    // the file is parsed in full by a loader and can be read ahead
+    read_ahead: bool,
+}
+
+struct Dependencies {
+    file_paths: Vec<(PathBuf, bool)>,
+    inserted: HashSet<PathBuf>,
+    resolved: HashSet<String>,
+}
+
+impl Dependencies {
+    fn new() -> Self {
+        Dependencies {
+            file_paths: Vec::new(),
+            inserted: HashSet::new(),
+            resolved: HashSet::new(),
+        }
+    }
+
+    // keeps the first occurrence of each file
+    fn insert(&mut self, file_path: PathBuf, read_ahead: bool) {
+        if self.inserted.insert(file_path.clone()) {
+            self.file_paths.push((file_path, read_ahead));
+        }
+    }
+
+    // returns false for model lods that are already resolved
+    fn resolve(&mut self, lod: String) -> bool {
+        self.resolved.insert(lod)
+    }
+}
+
+// collects the plan of an import the way the loader walks the dependencies,
+// every model lod, material and texture is read once
+struct ImportPlanner<'a> {
+    asset_path: &'a Path,
+    plan: ImportPlan,
+    xmodels: HashMap<String, Option<XModel>>,
+    models: HashMap<String, usize>,
+    materials: HashSet<String>,
+    textures: HashSet<String>,
+    missing_files: HashSet<PathBuf>,
+}
+
+impl<'a> ImportPlanner<'a> {
+    fn new(asset_path: &'a Path, name: String) -> Self {
+        ImportPlanner {
+            asset_path,
+            plan: ImportPlan {
+                name,
+                surfaces: 0,
+                vertices: 0,
+                triangles: 0,
+                models: Vec::new(),
+                materials: Vec::new(),
+                textures: Vec::new(),
+                missing_files: Vec::new(),
+            },
+            xmodels: HashMap::new(),
+            models: HashMap::new(),
+            materials: HashSet::new(),
+            textures: HashSet::new(),
+            missing_files: HashSet::new(),
+        }
+    }
+
+    fn finish(self) -> ImportPlan {
+        self.plan
+    }
+
+    // records missing files once, returns whether the file exists
+    fn exists(&mut self, file_path: &Path) -> bool {
+        if file_path.is_file() {
+            return true;
+        }
+
+        if self.missing_files.insert(file_path.to_path_buf()) {
+            self.plan
+                .missing_files
+                .push(file_path.to_string_lossy().to_string());
+        }
+        false
+    }
+
+    fn model(
+        &mut self,
+        model_name: &str,
+        xmodel_file_path: PathBuf,
+        selected_version: GameVersion,
+        lod: LodSelection,
+    ) {
+        if !self.xmodels.contains_key(model_name) {
+            let xmodel = match self.exists(&xmodel_file_path) {
+                true => match XModel::load(xmodel_file_path, selected_version) {
+                    Ok(xmodel) => Some(xmodel),
+                    Err(error) => {
+                        error_log!("[PLAN] {} - {}", model_name, error);
+                        None
+                    }
+                },
+                false => None,
+            };
+            self.xmodels.insert(model_name.to_string(), xmodel);
+        }
+
+        let Some(xmodel) = &self.xmodels[model_name] else {
+            return;
+        };
+
+        let lod_index = lod.resolve(xmodel);
+        let xmodel_lod = xmodel.lods[lod_index].clone();
+        let version = xmodel.version;
+
+        let key = format!("{}:{}", model_name, lod_index);
+        if let Some(&model_index) = self.models.get(&key) {
+            self.plan.models[model_index].instances += 1;
+            return;
+        }
+
+        let mut planned_model = PlannedModel {
+            name: model_name.to_string(),
+            lod: lod_index,
+            instances: 1,
+            surfaces: 0,
+            vertices: 0,
+            triangles: 0,
+        };
+
+        self.exists(
+            &self
+                .asset_path
+                .join(xmodelpart::ASSETPATH)
+                .join(&xmodel_lod.name),
+        );
+        let xmodelsurf_file_path = self
+            .asset_path
+            .join(xmodelsurf::ASSETPATH)
+            .join(&xmodel_lod.name);
+        if self.exists(&xmodelsurf_file_path) {
+            match XModelSurf::load_counts(xmodelsurf_file_path) {
+                Ok(counts) => {
+                    planned_model.surfaces = counts.len();
+                    planned_model.vertices = counts.iter().map(|(v, _)| v).sum();
+                    planned_model.triangles = counts.iter().map(|(_, t)| t).sum();
+                }
+                Err(error) => error_log!("[PLAN] {} - {}", xmodel_lod.name, error),
+            }
+        }
+
+        for material in &xmodel_lod.materials {
+            self.material(material, version);
+        }
+
+        self.models.insert(key, self.plan.models.len());
+        self.plan.models.push(planned_model);
+    }
+
+    // returns false for materials that are already planned
+    fn material_name(&mut self, material_name: &str) -> bool {
+        if !self.materials.insert(material_name.to_string()) {
+            return false;
+        }
+
+        self.plan.materials.push(material_name.to_string());
+        true
+    }
+
+    fn material(&mut self, material_name: &str, version: XModelVersion) {
+        if !self.material_name(material_name) {
+            return;
+        }
+
+        if let XModelVersion::V14 = version {
+            self.exists(&self.asset_path.join(SKINS_ASSETPATH).join(material_name));
+            return;
+        }
+
+        let material_file_path = self
+            .asset_path
+            .join(material::ASSETPATH)
+            .join(material_name);
+        if !self.exists(&material_file_path) {
+            return;
+        }
+
+        let material = match Material::load(material_file_path, version) {
+            Ok(material) => material,
+            Err(error) => {
+                error_log!("[PLAN] {} - {}", material_name, error);
+                return;
+            }
+        };
+
+        for texture in material.textures {
+            self.texture(&texture.name);
+        }
+    }
+
+    fn texture(&mut self, texture_name: &str) {
+        if !self.textures.insert(texture_name.to_string()) {
+            return;
+        }
+
+        let mut texture_file_path = self.asset_path.join(iwi::ASSETPATH).join(texture_name);
+        texture_file_path.set_extension("iwi");
+        if !self.exists(&texture_file_path) {
+            return;
+        }
+
+        match IWi::load_size(texture_file_path) {
+            Ok((width, height)) => self.plan.textures.push(PlannedTexture {
+                name: texture_name.to_string(),
+                width,
+                height,
+            }),
+            Err(error) => error_log!("[PLAN] {} - {}", texture_name, error),
+        }
     }
 }
 
 #[derive(Clone)]
-enum CachedModel {
+enum CachedAsset<T> {
     Loading(WaitGroup),
-    Cached(LoadedModel),
+    Cached(T),
 }
+
 #[derive(Clone)]
-struct ModelCache {
-    loaded_models: Arc<Mutex<HashMap<String, CachedModel>>>,
+struct AssetCache<T> {
+    assets: Arc<Mutex<HashMap<String, CachedAsset<T>>>>,
 }
 
-impl ModelCache {
+impl<T: Clone> AssetCache<T> {
     fn new() -> Self {
-        ModelCache {
-            loaded_models: Arc::new(Mutex::new(HashMap::new())),
+        AssetCache {
+            assets: Arc::new(Mutex::new(HashMap::new())),
         }
     }
 
-    fn set_model(&mut self, model_name: &str, cached_model: CachedModel) {
-        let mut loaded_models = self.loaded_models.lock().unwrap();
-        loaded_models.insert(String::from(model_name), cached_model);
+    // the first caller of a key loads the asset, concurrent callers of the same
+    // key wait for it and share the result. failed loads are not cached
+    fn get_or_load<F>(&self, key: &str, load: F) -> Result<T>
+    where
+        F: FnOnce() -> Result<T>,
+    {
+        let mut assets = self.assets.lock().unwrap();
+        if let Some(cached_asset) = assets.get(key).cloned() {
+            drop(assets);
+
+            return match cached_asset {
+                CachedAsset::Cached(asset) => Ok(asset),
+                CachedAsset::Loading(wg) => {
+                    wg.wait();
+
+                    match self.assets.lock().unwrap().get(key) {
+                        Some(CachedAsset::Cached(asset)) => Ok(asset.clone()),
+                        _ => Err(Error::new(format!("{} failed to load", key))),
+                    }
+                }
+            };
+        }
+
+        let wg = WaitGroup::new();
+        assets.insert(String::from(key), CachedAsset::Loading(wg.clone()));
+        drop(assets);
+
+        let result = load();
+
+        let mut assets = self.assets.lock().unwrap();
+        match &result {
+            Ok(asset) => {
+                assets.insert(String::from(key), CachedAsset::Cached(asset.clone()));
+            }
+            Err(_) => {
+                assets.remove(key);
+            }
+        }
+        drop(assets);
+        drop(wg);
+
+        result
+    }
+}
+
+// the fingerprints of the sources that are already imported into the scene,
+// those are not loaded again as long as their files did not change
+#[derive(Clone)]
+struct LoadCache {
+    models: AssetCache<LoadedModel>,
+    materials: AssetCache<LoadedMaterial>,
+    textures: AssetCache<LoadedTexture>,
+    // parsed xmodel headers by file path, shared by all instances of a model
+    xmodels: AssetCache<Arc<XModel>>,
+    // parsed material files by file path
+    material_files: AssetCache<Arc<Material>>,
+    // files that are read ahead by file path, until a loader takes them
+    read_ahead: Arc<Mutex<HashMap<PathBuf, Vec<u8>>>>,
+    // decoded textures by the hash of their content
+    texture_contents: AssetCache<LoadedTexture>,
+    // textures that shared the decoded data of an identical texture
+    shared_textures: Arc<Mutex<usize>>,
+    scene_fingerprints: Arc<HashMap<String, String>>,
+    model_cache: Option<Arc<ModelCache>>,
+    weld_tolerance: Option<f32>,
+    // vertex counts of the welded surfaces before and after welding
+    welded_vertices: Arc<Mutex<(usize, usize)>>,
+}
+
+impl LoadCache {
+    fn new(
+        scene_fingerprints: HashMap<String, String>,
+        model_cache_path: Option<&str>,
+        model_cache_size: u64,
+        weld_tolerance: Option<f32>,
+    ) -> Self {
+        LoadCache {
+            models: AssetCache::new(),
+            materials: AssetCache::new(),
+            textures: AssetCache::new(),
+            xmodels: AssetCache::new(),
+            material_files: AssetCache::new(),
+            read_ahead: Arc::new(Mutex::new(HashMap::new())),
+            texture_contents: AssetCache::new(),
+            shared_textures: Arc::new(Mutex::new(0)),
+            scene_fingerprints: Arc::new(scene_fingerprints),
+            model_cache: model_cache_path.map(|model_cache_path| {
+                Arc::new(ModelCache::new(
+                    PathBuf::from(model_cache_path),
+                    model_cache_size * 1024 * 1024,
+                ))
+            }),
+            weld_tolerance,
+            welded_vertices: Arc::new(Mutex::new((0, 0))),
+        }
+    }
+
+    // welded geometry differs from unwelded geometry and from geometry that is
+    // welded with another tolerance, their meshes are rebuilt
+    fn weld_fingerprint(&self, fingerprint: &mut String) {
+        if let Some(weld_tolerance) = self.weld_tolerance {
+            fingerprint.push_str(&format!("{}{}", WELDED_VERTICES, weld_tolerance));
+        }
+    }
+
+    fn weld(&self, surfaces: &mut [LoadedSurface], parallel: bool) {
+        let Some(weld_tolerance) = self.weld_tolerance else {
+            return;
+        };
+
+        let counts: Vec<(usize, usize)> = match parallel {
+            true => surfaces
+                .par_iter_mut()
+                .map(|s| s.weld(weld_tolerance))
+                .collect(),
+            false => surfaces
+                .iter_mut()
+                .map(|s| s.weld(weld_tolerance))
+                .collect(),
+        };
+
+        let mut welded_vertices = self.welded_vertices.lock().unwrap();
+        for (before, after) in counts {
+            welded_vertices.0 += before;
+            welded_vertices.1 += after;
+        }
+    }
+
+    fn report_weld(&self) {
+        let (before, after) = *self.welded_vertices.lock().unwrap();
+        if self.weld_tolerance.is_none() || before == 0 {
+            return;
+        }
+
+        info_log!(
+            "[WELD] {} vertices welded into {}, {:.1}% fewer",
+            before,
+            after,
+            (before - after) as f64 / before as f64 * 100.0
+        );
+    }
+
+    fn report_shared_textures(&self) {
+        let shared_textures = *self.shared_textures.lock().unwrap();
+        if shared_textures == 0 {
+            return;
+        }
+
+        info_log!(
+            "[IWI] {} textures share the data of identical textures",
+            shared_textures
+        );
+    }
+
+    // keeps the model cache within its size once an import is done
+    fn evict_model_cache(&self) {
+        if let Some(model_cache) = &self.model_cache {
+            match model_cache.evict() {
+                Ok((removed, size)) => {
+                    info_log!("[MODEL CACHE] {} bytes, {} files evicted", size, removed)
+                }
+                Err(error) => error_log!("[MODEL CACHE] {}", error),
+            }
+        }
+    }
+
+    fn xmodel(&self, file_path: PathBuf, selected_version: GameVersion) -> Result<Arc<XModel>> {
+        let key = file_path.to_string_lossy().to_string();
+        self.xmodels.get_or_load(&key, || {
+            XModel::load(file_path, selected_version).map(Arc::new)
+        })
+    }
+
+    fn material_file(&self, file_path: PathBuf, version: XModelVersion) -> Result<Arc<Material>> {
+        let key = file_path.to_string_lossy().to_string();
+        self.material_files
+            .get_or_load(&key, || Material::load(file_path, version).map(Arc::new))
+    }
+
+    // the buffer of a file that is read ahead is handed out once, other files are
+    // read from disk
+    fn read_file(&self, file_path: &Path) -> Result<Vec<u8>> {
+        if let Some(data) = self.read_ahead.lock().unwrap().remove(file_path) {
+            return Ok(data);
+        }
+
+        Ok(fs::read(file_path)?)
     }
 
-    fn get_model(&self, loaded_model_name: &str) -> Option<CachedModel> {
-        let loaded_models = self.loaded_models.lock().unwrap();
-        loaded_models.get(loaded_model_name).cloned()
+    fn is_current(&self, source: &str, fingerprint: &str) -> bool {
+        self.scene_fingerprints
+            .get(source)
+            .is_some_and(|scene_fingerprint| scene_fingerprint == fingerprint)
     }
 }
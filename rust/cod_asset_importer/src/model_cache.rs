@@ -0,0 +1,291 @@
+use crate::{
+    loaded_assets::{LoadedBone, LoadedSurface},
+    utils::{
+        binary::{self, BinBytes},
+        error::Error,
+        hash::StableHasher,
+        Result,
+    },
+};
+use std::{
+    fs::{self, File},
+    io::Read,
+    mem::size_of,
+    path::PathBuf,
+    thread,
+    time::SystemTime,
+};
+
+const MAGIC: &[u8; 8] = b"CODMODEL";
+// files written with another version are ignored and overwritten, bump it whenever
+// the layout of the file, of the cached surfaces and bones or the naming of the files
+// changes
+const FORMAT_VERSION: u32 = 2;
+const FILE_EXTENSION: &str = "model";
+// arrays start at multiples of this, so a mapped file could be used in place
+const ALIGNMENT: usize = 8;
+
+// converted geometry and bones of model lods on disk, keyed by the source of the
+// model. a file is only used while the fingerprint of the source files matches
+pub struct ModelCache {
+    directory: PathBuf,
+    max_size: u64,
+}
+
+impl ModelCache {
+    pub fn new(directory: PathBuf, max_size: u64) -> Self {
+        ModelCache {
+            directory,
+            max_size,
+        }
+    }
+
+    // missing, outdated and broken files are all a miss, the model is loaded from
+    // its source files and the cache file is rewritten
+    pub fn read(
+        &self,
+        source: &str,
+        fingerprint: &str,
+    ) -> Option<(Vec<LoadedSurface>, Vec<LoadedBone>)> {
+        let file_path = self.file_path(source);
+        let data = fs::read(&file_path).ok()?;
+        let model = Self::decode(&data, source, fingerprint).ok()?;
+
+        // the modification time orders the files for eviction
+        if let Ok(file) = File::options().write(true).open(&file_path) {
+            let _ = file.set_modified(SystemTime::now());
+        }
+
+        Some(model)
+    }
+
+    // compares the header of the file only, the surfaces and bones are not read
+    pub fn contains(&self, source: &str, fingerprint: &str) -> bool {
+        let Ok(mut file) = File::open(self.file_path(source)) else {
+            return false;
+        };
+
+        let mut header = vec![0u8; Self::header_size(source, fingerprint)];
+        if file.read_exact(&mut header).is_err() {
+            return false;
+        }
+
+        Self::decode_header(&mut CacheReader::new(&header), source, fingerprint).is_ok()
+    }
+
+    // writes through a temporary file, so concurrent readers and writers of
+    // the same model never see a partially written file
+    pub fn write(
+        &self,
+        source: &str,
+        fingerprint: &str,
+        surfaces: &[LoadedSurface],
+        bones: &[LoadedBone],
+    ) -> Result<()> {
+        let mut writer = CacheWriter::new();
+        writer.bytes(MAGIC);
+        writer.value(FORMAT_VERSION);
+        writer.string(source);
+        writer.string(fingerprint);
+
+        writer.value(bones.len() as u32);
+        for bone in bones {
+            bone.write_cache(&mut writer);
+        }
+
+        writer.value(surfaces.len() as u32);
+        for surface in surfaces {
+            surface.write_cache(&mut writer);
+        }
+
+        let file_path = self.file_path(source);
+        let temp_file_path = file_path.with_extension(format!("{:?}.tmp", thread::current().id()));
+        fs::create_dir_all(&self.directory)?;
+        fs::write(&temp_file_path, writer.finish())?;
+        fs::rename(&temp_file_path, &file_path)?;
+
+        Ok(())
+    }
+
+    // removes the least recently used files until the cache fits into its size,
+    // returns the number of removed files and the size of the remaining ones
+    pub fn evict(&self) -> Result<(usize, u64)> {
+        if !self.directory.is_dir() {
+            return Ok((0, 0));
+        }
+
+        let mut files: Vec<(SystemTime, u64, PathBuf)> = Vec::new();
+        for entry in fs::read_dir(&self.directory)? {
+            let file_path = entry?.path();
+            if file_path.extension().map_or(true, |e| e != FILE_EXTENSION) {
+                continue;
+            }
+
+            // files can be replaced by a concurrent import while listing them
+            if let Ok(metadata) = fs::metadata(&file_path) {
+                files.push((metadata.modified()?, metadata.len(), file_path));
+            }
+        }
+
+        let mut size: u64 = files.iter().map(|(_, len, _)| len).sum();
+        let mut removed = 0;
+        files.sort();
+        for (_, len, file_path) in files {
+            if size <= self.max_size {
+                break;
+            }
+
+            if fs::remove_file(file_path).is_ok() {
+                removed += 1;
+            }
+            size -= len;
+        }
+
+        Ok((removed, size))
+    }
+
+    fn file_path(&self, source: &str) -> PathBuf {
+        let mut hasher = StableHasher::new();
+        hasher.write_str(source);
+        self.directory
+            .join(format!("{:016x}.{}", hasher.finish(), FILE_EXTENSION))
+    }
+
+    fn header_size(source: &str, fingerprint: &str) -> usize {
+        MAGIC.len() + size_of::<u32>() * 3 + source.len() + fingerprint.len()
+    }
+
+    fn decode_header(reader: &mut CacheReader, source: &str, fingerprint: &str) -> Result<()> {
+        if reader.bytes(MAGIC.len())? != MAGIC {
+            return Err(Error::new(String::from("invalid magic")));
+        }
+
+        let version = reader.value::<u32>()?;
+        if version != FORMAT_VERSION {
+            return Err(Error::new(format!("invalid version {}", version)));
+        }
+
+        if reader.string()? != source || reader.string()? != fingerprint {
+            return Err(Error::new(String::from("outdated")));
+        }
+
+        Ok(())
+    }
+
+    fn decode(
+        data: &[u8],
+        source: &str,
+        fingerprint: &str,
+    ) -> Result<(Vec<LoadedSurface>, Vec<LoadedBone>)> {
+        let mut reader = CacheReader::new(data);
+        Self::decode_header(&mut reader, source, fingerprint)?;
+
+        let bone_count = reader.value::<u32>()?;
+        let mut bones: Vec<LoadedBone> = Vec::with_capacity(bone_count as usize);
+        for _ in 0..bone_count {
+            bones.push(LoadedBone::read_cache(&mut reader)?);
+        }
+
+        let surface_count = reader.value::<u32>()?;
+        let mut surfaces: Vec<LoadedSurface> = Vec::with_capacity(surface_count as usize);
+        for _ in 0..surface_count {
+            surfaces.push(LoadedSurface::read_cache(&mut reader)?);
+        }
+
+        reader.finish()?;
+        Ok((surfaces, bones))
+    }
+}
+
+// values are stored little endian, strings and arrays are prefixed with their length
+pub struct CacheWriter {
+    data: Vec<u8>,
+}
+
+impl CacheWriter {
+    fn new() -> Self {
+        CacheWriter { data: Vec::new() }
+    }
+
+    fn bytes(&mut self, bytes: &[u8]) {
+        self.data.extend_from_slice(bytes);
+    }
+
+    pub fn value<T: BinBytes>(&mut self, value: T) {
+        value.extend_bytes(&mut self.data);
+    }
+
+    pub fn string(&mut self, value: &str) {
+        self.value(value.len() as u32);
+        self.bytes(value.as_bytes());
+    }
+
+    pub fn array<T: BinBytes>(&mut self, values: &[T]) {
+        self.value(values.len() as u64);
+        self.align();
+        self.data.reserve(values.len() * T::size());
+        for value in values {
+            value.extend_bytes(&mut self.data);
+        }
+    }
+
+    fn align(&mut self) {
+        let padding = (ALIGNMENT - self.data.len() % ALIGNMENT) % ALIGNMENT;
+        self.data.resize(self.data.len() + padding, 0);
+    }
+
+    fn finish(self) -> Vec<u8> {
+        self.data
+    }
+}
+
+pub struct CacheReader<'a> {
+    data: &'a [u8],
+    offset: usize,
+}
+
+impl<'a> CacheReader<'a> {
+    fn new(data: &'a [u8]) -> Self {
+        CacheReader { data, offset: 0 }
+    }
+
+    fn bytes(&mut self, length: usize) -> Result<&'a [u8]> {
+        let bytes = binary::slice(self.data, self.offset, length)?;
+        self.offset += length;
+        Ok(bytes)
+    }
+
+    pub fn value<T: BinBytes>(&mut self) -> Result<T> {
+        let value = binary::read_at::<T>(self.data, self.offset)?;
+        self.offset += T::size();
+        Ok(value)
+    }
+
+    pub fn string(&mut self) -> Result<String> {
+        let length = self.value::<u32>()? as usize;
+        Ok(String::from_utf8(self.bytes(length)?.to_vec())?)
+    }
+
+    pub fn array<T: BinBytes>(&mut self) -> Result<Vec<T>> {
+        let length = self.value::<u64>()? as usize;
+        self.offset += (ALIGNMENT - self.offset % ALIGNMENT) % ALIGNMENT;
+
+        let size = length
+            .checked_mul(T::size())
+            .filter(|size| *size <= self.data.len())
+            .ok_or_else(|| Error::new(format!("invalid array length {}", length)))?;
+        let values = binary::read_vec_at::<T>(self.data, self.offset, length)?;
+        self.offset += size;
+        Ok(values)
+    }
+
+    fn finish(&self) -> Result<()> {
+        match self.offset == self.data.len() {
+            true => Ok(()),
+            false => Err(Error::new(format!(
+                "{} trailing bytes",
+                self.data.len() - self.offset
+            ))),
+        }
+    }
+}
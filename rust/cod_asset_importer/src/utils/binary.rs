@@ -1,8 +1,5 @@
-use super::Result;
-use std::{
-    fs::File,
-    io::{Read, Seek, SeekFrom},
-};
+use super::{error::Error, Result};
+use std::io::{Read, Seek, SeekFrom};
 
 const SIZE_BYTE: usize = 1;
 const SIZE_SHORT: usize = 2;
@@ -12,33 +9,62 @@ const SIZE_FLOAT: usize = 4;
 const SIZE_DOUBLE: usize = 8;
 
 pub trait BinBytes {
-    fn from_bytes(bytes: Vec<u8>) -> Self;
+    fn from_bytes(bytes: &[u8]) -> Self;
     fn buffer(n: usize) -> Vec<u8>;
     fn size() -> usize;
+    fn extend_bytes(&self, bytes: &mut Vec<u8>);
 }
 
-pub fn read<T: BinBytes>(f: &mut File) -> Result<T> {
+pub fn read<T: BinBytes>(f: &mut impl Read) -> Result<T> {
     let mut buffer = T::buffer(1);
     f.read_exact(&mut buffer)?;
-    Ok(T::from_bytes(buffer))
+    Ok(T::from_bytes(&buffer))
 }
 
-pub fn read_vec<T: BinBytes>(f: &mut File, n: usize) -> Result<Vec<T>> {
+pub fn read_vec<T: BinBytes>(f: &mut impl Read, n: usize) -> Result<Vec<T>> {
     let mut buffer = T::buffer(n);
     f.read_exact(&mut buffer)?;
     let mut items: Vec<T> = Vec::new();
     for i in 0..n {
         let start = i * T::size();
         let end = start + T::size();
-        let item = T::from_bytes(buffer[start..end].to_vec());
+        let item = T::from_bytes(&buffer[start..end]);
         items.push(item)
     }
 
     Ok(items)
 }
 
+// reads from a buffer that is already in memory, so independent parts of
+// a file can be decoded without sharing a file cursor
+pub fn read_at<T: BinBytes>(data: &[u8], offset: usize) -> Result<T> {
+    let bytes = slice(data, offset, T::size())?;
+    Ok(T::from_bytes(bytes))
+}
+
+pub fn read_vec_at<T: BinBytes>(data: &[u8], offset: usize, n: usize) -> Result<Vec<T>> {
+    let bytes = slice(data, offset, n * T::size())?;
+    Ok(bytes.chunks_exact(T::size()).map(T::from_bytes).collect())
+}
+
+// reads the value at the offset and moves the offset past it
+pub fn read_next<T: BinBytes>(data: &[u8], offset: &mut usize) -> Result<T> {
+    let value = read_at::<T>(data, *offset)?;
+    *offset += T::size();
+    Ok(value)
+}
+
+pub fn slice(data: &[u8], offset: usize, length: usize) -> Result<&[u8]> {
+    data.get(offset..offset + length).ok_or_else(|| {
+        Error::new(format!(
+            "reading {} bytes at offset {} is out of bounds",
+            length, offset
+        ))
+    })
+}
+
 impl BinBytes for i8 {
-    fn from_bytes(bytes: Vec<u8>) -> Self {
+    fn from_bytes(bytes: &[u8]) -> Self {
         i8::from_le_bytes([bytes[0]])
     }
     fn buffer(n: usize) -> Vec<u8> {
@@ -47,10 +73,14 @@ impl BinBytes for i8 {
     fn size() -> usize {
         SIZE_BYTE
     }
+
+    fn extend_bytes(&self, bytes: &mut Vec<u8>) {
+        bytes.extend_from_slice(&self.to_le_bytes());
+    }
 }
 
 impl BinBytes for u8 {
-    fn from_bytes(bytes: Vec<u8>) -> Self {
+    fn from_bytes(bytes: &[u8]) -> Self {
         u8::from_le_bytes([bytes[0]])
     }
     fn buffer(n: usize) -> Vec<u8> {
@@ -59,10 +89,14 @@ impl BinBytes for u8 {
     fn size() -> usize {
         SIZE_BYTE
     }
+
+    fn extend_bytes(&self, bytes: &mut Vec<u8>) {
+        bytes.extend_from_slice(&self.to_le_bytes());
+    }
 }
 
 impl BinBytes for i16 {
-    fn from_bytes(bytes: Vec<u8>) -> Self {
+    fn from_bytes(bytes: &[u8]) -> Self {
         i16::from_le_bytes([bytes[0], bytes[1]])
     }
 
@@ -72,9 +106,13 @@ impl BinBytes for i16 {
     fn size() -> usize {
         SIZE_SHORT
     }
+
+    fn extend_bytes(&self, bytes: &mut Vec<u8>) {
+        bytes.extend_from_slice(&self.to_le_bytes());
+    }
 }
 impl BinBytes for u16 {
-    fn from_bytes(bytes: Vec<u8>) -> Self {
+    fn from_bytes(bytes: &[u8]) -> Self {
         u16::from_le_bytes([bytes[0], bytes[1]])
     }
 
@@ -84,10 +122,14 @@ impl BinBytes for u16 {
     fn size() -> usize {
         SIZE_SHORT
     }
+
+    fn extend_bytes(&self, bytes: &mut Vec<u8>) {
+        bytes.extend_from_slice(&self.to_le_bytes());
+    }
 }
 
 impl BinBytes for i32 {
-    fn from_bytes(bytes: Vec<u8>) -> Self {
+    fn from_bytes(bytes: &[u8]) -> Self {
         i32::from_le_bytes([bytes[0], bytes[1], bytes[2], bytes[3]])
     }
 
@@ -97,9 +139,13 @@ impl BinBytes for i32 {
     fn size() -> usize {
         SIZE_INT
     }
+
+    fn extend_bytes(&self, bytes: &mut Vec<u8>) {
+        bytes.extend_from_slice(&self.to_le_bytes());
+    }
 }
 impl BinBytes for u32 {
-    fn from_bytes(bytes: Vec<u8>) -> Self {
+    fn from_bytes(bytes: &[u8]) -> Self {
         u32::from_le_bytes([bytes[0], bytes[1], bytes[2], bytes[3]])
     }
 
@@ -109,10 +155,14 @@ impl BinBytes for u32 {
     fn size() -> usize {
         SIZE_INT
     }
+
+    fn extend_bytes(&self, bytes: &mut Vec<u8>) {
+        bytes.extend_from_slice(&self.to_le_bytes());
+    }
 }
 
 impl BinBytes for i64 {
-    fn from_bytes(bytes: Vec<u8>) -> Self {
+    fn from_bytes(bytes: &[u8]) -> Self {
         i64::from_le_bytes([
             bytes[0], bytes[1], bytes[2], bytes[3], bytes[4], bytes[5], bytes[6], bytes[7],
         ])
@@ -125,9 +175,13 @@ impl BinBytes for i64 {
     fn size() -> usize {
         SIZE_LONG
     }
+
+    fn extend_bytes(&self, bytes: &mut Vec<u8>) {
+        bytes.extend_from_slice(&self.to_le_bytes());
+    }
 }
 impl BinBytes for u64 {
-    fn from_bytes(bytes: Vec<u8>) -> Self {
+    fn from_bytes(bytes: &[u8]) -> Self {
         u64::from_le_bytes([
             bytes[0], bytes[1], bytes[2], bytes[3], bytes[4], bytes[5], bytes[6], bytes[7],
         ])
@@ -140,10 +194,14 @@ impl BinBytes for u64 {
     fn size() -> usize {
         SIZE_LONG
     }
+
+    fn extend_bytes(&self, bytes: &mut Vec<u8>) {
+        bytes.extend_from_slice(&self.to_le_bytes());
+    }
 }
 
 impl BinBytes for f32 {
-    fn from_bytes(bytes: Vec<u8>) -> Self {
+    fn from_bytes(bytes: &[u8]) -> Self {
         f32::from_le_bytes([bytes[0], bytes[1], bytes[2], bytes[3]])
     }
 
@@ -154,10 +212,14 @@ impl BinBytes for f32 {
     fn size() -> usize {
         SIZE_FLOAT
     }
+
+    fn extend_bytes(&self, bytes: &mut Vec<u8>) {
+        bytes.extend_from_slice(&self.to_le_bytes());
+    }
 }
 
 impl BinBytes for f64 {
-    fn from_bytes(bytes: Vec<u8>) -> Self {
+    fn from_bytes(bytes: &[u8]) -> Self {
         f64::from_le_bytes([
             bytes[0], bytes[1], bytes[2], bytes[3], bytes[4], bytes[5], bytes[6], bytes[7],
         ])
@@ -170,9 +232,13 @@ impl BinBytes for f64 {
     fn size() -> usize {
         SIZE_DOUBLE
     }
+
+    fn extend_bytes(&self, bytes: &mut Vec<u8>) {
+        bytes.extend_from_slice(&self.to_le_bytes());
+    }
 }
 
-pub fn read_string(f: &mut File) -> Result<String> {
+pub fn read_string(f: &mut impl Read) -> Result<String> {
     let mut buffer = [0u8; SIZE_BYTE];
     let mut nullstr: String = String::new();
     loop {
@@ -184,12 +250,12 @@ pub fn read_string(f: &mut File) -> Result<String> {
     }
 }
 
-pub fn skip(f: &mut File, n: i64) -> Result<u64> {
+pub fn skip(f: &mut impl Seek, n: i64) -> Result<u64> {
     let offset = f.seek(SeekFrom::Current(n))?;
     Ok(offset)
 }
 
-pub fn current_offset(f: &mut File) -> Result<u64> {
+pub fn current_offset(f: &mut impl Seek) -> Result<u64> {
     let offset = f.stream_position()?;
     Ok(offset)
 }
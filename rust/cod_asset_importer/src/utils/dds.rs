@@ -0,0 +1,155 @@
+use super::Result;
+use std::{
+    fs,
+    path::{Path, PathBuf},
+    thread,
+};
+
+const DDS_MAGIC: &[u8; 4] = b"DDS ";
+const DDS_HEADER_SIZE: u32 = 124;
+const DDS_PIXELFORMAT_SIZE: u32 = 32;
+
+const DDSD_CAPS: u32 = 0x1;
+const DDSD_HEIGHT: u32 = 0x2;
+const DDSD_WIDTH: u32 = 0x4;
+const DDSD_PIXELFORMAT: u32 = 0x1000;
+const DDSD_LINEARSIZE: u32 = 0x80000;
+const DDPF_FOURCC: u32 = 0x4;
+const DDSCAPS_TEXTURE: u32 = 0x1000;
+
+#[derive(Clone, Copy)]
+pub enum DxtFormat {
+    DXT1,
+    DXT3,
+    DXT5,
+}
+
+impl DxtFormat {
+    fn fourcc(&self) -> &'static [u8; 4] {
+        match self {
+            DxtFormat::DXT1 => b"DXT1",
+            DxtFormat::DXT3 => b"DXT3",
+            DxtFormat::DXT5 => b"DXT5",
+        }
+    }
+
+    fn block_size(&self) -> usize {
+        match self {
+            DxtFormat::DXT1 => 8,
+            DxtFormat::DXT3 | DxtFormat::DXT5 => 16,
+        }
+    }
+}
+
+// wraps raw dxt block data into a single mip dds file. blender flips dds images
+// on load, so the blocks are flipped beforehand to end up with the same orientation
+// as the decoded textures
+pub fn encode(format: DxtFormat, width: u16, height: u16, data: &[u8]) -> Vec<u8> {
+    let mut dds: Vec<u8> = Vec::with_capacity(4 + DDS_HEADER_SIZE as usize + data.len());
+
+    let mut header = [0u32; 31];
+    header[0] = DDS_HEADER_SIZE;
+    header[1] = DDSD_CAPS | DDSD_HEIGHT | DDSD_WIDTH | DDSD_PIXELFORMAT | DDSD_LINEARSIZE;
+    header[2] = height as u32;
+    header[3] = width as u32;
+    header[4] = data.len() as u32;
+    header[18] = DDS_PIXELFORMAT_SIZE;
+    header[19] = DDPF_FOURCC;
+    header[20] = u32::from_le_bytes(*format.fourcc());
+    header[26] = DDSCAPS_TEXTURE;
+
+    dds.extend_from_slice(DDS_MAGIC);
+    for value in header {
+        dds.extend_from_slice(&value.to_le_bytes());
+    }
+    dds.extend_from_slice(&flip_blocks(format, width as usize, height as usize, data));
+
+    dds
+}
+
+// writes the dds file through a temporary file, so concurrent writers of the same
+// texture never leave a partially written file behind. an existing file is always
+// replaced, files of other textures with the same name would be loaded otherwise
+pub fn write(directory: &Path, texture_name: &str, dds: &[u8]) -> Result<PathBuf> {
+    let file_name = texture_name.replace(['/', '\\', ':'], "_");
+    let file_path = directory.join(format!("{}.dds", file_name));
+
+    fs::create_dir_all(directory)?;
+    let temp_file_path = directory.join(format!("{}.{:?}.tmp", file_name, thread::current().id()));
+    fs::write(&temp_file_path, dds)?;
+    fs::rename(&temp_file_path, &file_path)?;
+
+    Ok(file_path)
+}
+
+fn flip_blocks(format: DxtFormat, width: usize, height: usize, data: &[u8]) -> Vec<u8> {
+    let block_size = format.block_size();
+    let block_count_x = (width + 3) / 4;
+    let block_count_y = (height + 3) / 4;
+    let row_size = block_count_x * block_size;
+
+    if height < 4 || data.len() < row_size * block_count_y {
+        return data.to_vec();
+    }
+
+    let mut output = vec![0u8; data.len()];
+    for y in 0..block_count_y {
+        let src = &data[y * row_size..(y + 1) * row_size];
+        let dst_start = (block_count_y - 1 - y) * row_size;
+        let dst = &mut output[dst_start..dst_start + row_size];
+
+        for (src_block, dst_block) in src
+            .chunks_exact(block_size)
+            .zip(dst.chunks_exact_mut(block_size))
+        {
+            flip_block(format, src_block, dst_block);
+        }
+    }
+
+    output[row_size * block_count_y..].copy_from_slice(&data[row_size * block_count_y..]);
+    output
+}
+
+fn flip_block(format: DxtFormat, src: &[u8], dst: &mut [u8]) {
+    match format {
+        DxtFormat::DXT1 => flip_color_block(src, dst),
+        DxtFormat::DXT3 => {
+            // 4 rows of 4 bit alphas, 2 bytes per row
+            for row in 0..4 {
+                dst[row * 2] = src[(3 - row) * 2];
+                dst[row * 2 + 1] = src[(3 - row) * 2 + 1];
+            }
+            flip_color_block(&src[8..], &mut dst[8..]);
+        }
+        DxtFormat::DXT5 => {
+            dst[0] = src[0];
+            dst[1] = src[1];
+
+            // 4 rows of 3 bit alpha indices, 12 bits per row
+            let mut bits = 0u64;
+            for i in 0..6 {
+                bits |= (src[2 + i] as u64) << (8 * i);
+            }
+
+            let mut flipped = 0u64;
+            for row in 0..4 {
+                let row_bits = (bits >> (12 * row)) & 0xFFF;
+                flipped |= row_bits << (12 * (3 - row));
+            }
+
+            for i in 0..6 {
+                dst[2 + i] = (flipped >> (8 * i)) as u8;
+            }
+            flip_color_block(&src[8..], &mut dst[8..]);
+        }
+    }
+}
+
+fn flip_color_block(src: &[u8], dst: &mut [u8]) {
+    dst[..4].copy_from_slice(&src[..4]);
+
+    // 4 rows of 2 bit color indices, 1 byte per row
+    for row in 0..4 {
+        dst[4 + row] = src[7 - row];
+    }
+}
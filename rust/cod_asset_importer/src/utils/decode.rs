@@ -1,3 +1,6 @@
+use rayon::{prelude::*, ThreadPool, ThreadPoolBuilder};
+use std::sync::{mpsc::channel, OnceLock};
+
 fn unpack_565(color: u32) -> (u32, u32, u32) {
     let mut r = (color & 0xF800) >> 8;
     let mut g = (color & 0x07E0) >> 3;
@@ -278,3 +281,87 @@ pub fn decode_dxt5(input: Vec<u8>, width: usize, height: usize) -> Vec<f32> {
 
     output
 }
+
+// normal maps store x in alpha and y in green. the channels are moved into rgb and
+// z is rebuilt from the unit length, so the pixels are a tangent space normal map
+pub fn bake_normal_map(data: Vec<f32>) -> Vec<f32> {
+    let (sender, receiver) = channel();
+    pixel_pool().spawn(move || {
+        let mut data = data;
+        data.par_chunks_mut(4).for_each(bake_normal_pixel);
+        let _ = sender.send(data);
+    });
+
+    receiver.recv().unwrap()
+}
+
+fn bake_normal_pixel(pixel: &mut [f32]) {
+    if pixel.len() < 4 {
+        return;
+    }
+
+    let x = pixel[3] * 2.0 - 1.0;
+    let y = pixel[1] * 2.0 - 1.0;
+    let z = (1.0 - x * x - y * y).max(0.0).sqrt();
+
+    pixel[0] = pixel[3];
+    pixel[2] = z * 0.5 + 0.5;
+    pixel[3] = 1.0;
+}
+
+// textures are decoded while the load cache holds their key. a loader thread that joins
+// pixel work on the loader pool can steal a task which waits on that key, so the pixel
+// work runs on a pool of its own and the calling thread blocks until it is done
+fn pixel_pool() -> &'static ThreadPool {
+    static PIXEL_POOL: OnceLock<ThreadPool> = OnceLock::new();
+    PIXEL_POOL.get_or_init(|| {
+        ThreadPoolBuilder::new()
+            .thread_name(|i| format!("cod_asset_importer_pixels_{}", i))
+            .build()
+            .unwrap()
+    })
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn assert_pixel(pixel: &[f32], expected: [f32; 4]) {
+        for (value, expected) in pixel.iter().zip(expected) {
+            assert!(
+                (value - expected).abs() < 1e-6,
+                "{:?} != {:?}",
+                pixel,
+                expected
+            );
+        }
+    }
+
+    #[test]
+    fn bake_normal_map_rebuilds_z() {
+        // x = 0.6 in alpha, y = 0 in green, so z = 0.8
+        let pixel = [0.1, 0.5, 0.2, 0.8];
+        let flat = [0.3, 0.5, 0.7, 0.5];
+
+        let mut data: Vec<f32> = Vec::new();
+        for i in 0..4096 {
+            data.extend_from_slice(if i % 2 == 0 { &pixel } else { &flat });
+        }
+
+        let baked = bake_normal_map(data);
+        assert_eq!(baked.len(), 4096 * 4);
+        for (i, pixel) in baked.chunks_exact(4).enumerate() {
+            match i % 2 {
+                0 => assert_pixel(pixel, [0.8, 0.5, 0.9, 1.0]),
+                _ => assert_pixel(pixel, [0.5, 0.5, 1.0, 1.0]),
+            }
+        }
+    }
+
+    #[test]
+    fn bake_normal_map_clamps_z() {
+        // x and y outside of the unit circle, z is clamped to 0
+        let baked = bake_normal_map(vec![0.0, 1.0, 0.0, 1.0]);
+        assert_pixel(&baked, [1.0, 1.0, 0.5, 1.0]);
+    }
+}
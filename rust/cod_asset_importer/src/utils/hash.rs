@@ -0,0 +1,45 @@
+// 64 bit FNV-1a. the hashes end up in blend files and in the names of cache files, so
+// they have to stay the same across builds, which the hashers of std do not promise.
+// values are fed as explicit bytes, the Hash impls of std do not promise a stable
+// byte stream either
+const OFFSET_BASIS: u64 = 0xcbf29ce484222325;
+const PRIME: u64 = 0x100000001b3;
+
+pub struct StableHasher {
+    state: u64,
+}
+
+impl StableHasher {
+    pub fn new() -> Self {
+        StableHasher {
+            state: OFFSET_BASIS,
+        }
+    }
+
+    pub fn write(&mut self, bytes: &[u8]) {
+        for byte in bytes {
+            self.state ^= *byte as u64;
+            self.state = self.state.wrapping_mul(PRIME);
+        }
+    }
+
+    pub fn write_u64(&mut self, value: u64) {
+        self.write(&value.to_le_bytes());
+    }
+
+    // strings are prefixed with their length, so consecutive strings can not run into each other
+    pub fn write_str(&mut self, value: &str) {
+        self.write_u64(value.len() as u64);
+        self.write(value.as_bytes());
+    }
+
+    pub fn finish(&self) -> u64 {
+        self.state
+    }
+}
+
+impl Default for StableHasher {
+    fn default() -> Self {
+        Self::new()
+    }
+}
@@ -3,6 +3,7 @@ pub type UV = [f32; 2]; // u, v
 pub type Quat = [f32; 4]; // w, x, y, z
 pub type Color = [f32; 4]; // r, g, b, a
 pub type Triangle = [u16; 3]; // v1, v2, v3
+pub type Matrix4 = [[f32; 4]; 4]; // rows
 
 pub fn vec3_from_vec(v: Vec<f32>) -> Option<Vec3> {
     if v.len() != 3 {
@@ -53,6 +54,14 @@ pub fn vec3_add(v1: Vec3, v2: Vec3) -> Vec3 {
     [x, y, z]
 }
 
+pub fn vec3_sub(v1: Vec3, v2: Vec3) -> Vec3 {
+    let x = v1[0] - v2[0];
+    let y = v1[1] - v2[1];
+    let z = v1[2] - v2[2];
+
+    [x, y, z]
+}
+
 pub fn vec3_div(v: Vec3, d: f32) -> Vec3 {
     let x = v[0] / d;
     let y = v[1] / d;
@@ -61,6 +70,14 @@ pub fn vec3_div(v: Vec3, d: f32) -> Vec3 {
     [x, y, z]
 }
 
+pub fn vec3_distance(v1: Vec3, v2: Vec3) -> f32 {
+    let x = v1[0] - v2[0];
+    let y = v1[1] - v2[1];
+    let z = v1[2] - v2[2];
+
+    f32::sqrt(x * x + y * y + z * z)
+}
+
 pub fn vec3_rotate(v: Vec3, q: Quat) -> Vec3 {
     let a = [
         q[2] * v[2] - q[3] * v[1] + v[0] * q[0],
@@ -81,6 +98,14 @@ pub fn vec3_rotate(v: Vec3, q: Quat) -> Vec3 {
     [x, y, z]
 }
 
+pub fn quat_conjugate(q: Quat) -> Quat {
+    [q[0], -q[1], -q[2], -q[3]]
+}
+
+pub fn quat_dot(q1: Quat, q2: Quat) -> f32 {
+    q1[0] * q2[0] + q1[1] * q2[1] + q1[2] * q2[2] + q1[3] * q2[3]
+}
+
 pub fn quat_multiply(q1: Quat, q2: Quat) -> Quat {
     let w = q1[0] * q2[0] - q1[1] * q2[1] - q1[2] * q2[2] - q1[3] * q2[3];
     let x = q1[0] * q2[1] + q1[1] * q2[0] + q1[2] * q2[3] - q1[3] * q2[2];
@@ -89,3 +114,23 @@ pub fn quat_multiply(q1: Quat, q2: Quat) -> Quat {
 
     [w, x, y, z]
 }
+
+// translation @ rotation @ scale, the rotation is an xyz euler in radians
+pub fn matrix4_from_transform(translation: Vec3, rotation: Vec3, scale: Vec3) -> Matrix4 {
+    let (sx, cx) = rotation[0].sin_cos();
+    let (sy, cy) = rotation[1].sin_cos();
+    let (sz, cz) = rotation[2].sin_cos();
+
+    let r = [
+        [cz * cy, cz * sy * sx - sz * cx, cz * sy * cx + sz * sx],
+        [sz * cy, sz * sy * sx + cz * cx, sz * sy * cx - cz * sx],
+        [-sy, cy * sx, cy * cx],
+    ];
+
+    let mut matrix = [[0.0, 0.0, 0.0, 1.0]; 4];
+    for (row, (r, t)) in matrix.iter_mut().zip(r.iter().zip(translation)) {
+        *row = [r[0] * scale[0], r[1] * scale[1], r[2] * scale[2], t];
+    }
+
+    matrix
+}
@@ -1,8 +1,10 @@
 use std::result;
 
 pub mod binary;
+pub mod dds;
 pub mod decode;
 pub mod error;
+pub mod hash;
 pub mod log;
 pub mod math;
 pub mod path;
@@ -1,4 +1,13 @@
-use std::path::PathBuf;
+use super::hash::StableHasher;
+use std::{
+    fs::{self, File},
+    io::{self, Read, Seek, SeekFrom},
+    path::{Path, PathBuf},
+    time::UNIX_EPOCH,
+};
+
+// bytes read from the start and from the end of each file for its fingerprint
+const FINGERPRINT_SAMPLE_SIZE: u64 = 4096;
 
 pub fn file_name_without_ext(file_path: PathBuf) -> String {
     file_path
@@ -17,3 +26,46 @@ pub fn file_name(file_path: PathBuf) -> String {
         .unwrap_or_default()
         .to_string()
 }
+
+// fingerprint of the given files built from their path, size, modification time and
+// the first and last few kilobytes of their content, the rest of the files is not read.
+// it changes whenever one of the files is rewritten, also by copies and extractions
+// that keep the modification time, unless the rewrite keeps the size and only changes
+// the middle of the file. the hash is stable across builds, fingerprints are kept in
+// blend files
+pub fn fingerprint(file_paths: &[&Path]) -> String {
+    let mut hasher = StableHasher::new();
+    for file_path in file_paths {
+        hasher.write_str(&file_path.to_string_lossy());
+        if let Ok(metadata) = fs::metadata(file_path) {
+            hasher.write_u64(metadata.len());
+            if let Ok(modified) = metadata.modified() {
+                let modified = modified.duration_since(UNIX_EPOCH).unwrap_or_default();
+                hasher.write_u64(modified.as_secs());
+                hasher.write_u64(modified.subsec_nanos() as u64);
+            }
+            if let Ok(sample) = fingerprint_sample(file_path, metadata.len()) {
+                hasher.write(&sample);
+            }
+        }
+    }
+
+    format!("{:016x}", hasher.finish())
+}
+
+fn fingerprint_sample(file_path: &Path, length: u64) -> io::Result<Vec<u8>> {
+    let mut file = File::open(file_path)?;
+
+    let head = length.min(FINGERPRINT_SAMPLE_SIZE);
+    let mut sample = vec![0u8; head as usize];
+    file.read_exact(&mut sample)?;
+
+    let tail = (length - head).min(FINGERPRINT_SAMPLE_SIZE);
+    if tail > 0 {
+        file.seek(SeekFrom::End(-(tail as i64)))?;
+        sample.resize((head + tail) as usize, 0);
+        file.read_exact(&mut sample[head as usize..])?;
+    }
+
+    Ok(sample)
+}